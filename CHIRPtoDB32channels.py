@@ -1,26 +1,71 @@
 ## EXAMPLE USE
 ## python CHIRPtoDB32channels.py "C:\Users\grant\Downloads\h8.csv" "C:\Users\grant\Downloads\xx.csv"
 ## if the second file doesn't exist, it will create it. If it does exist, it will append to it.
+## python CHIRPtoDB32channels.py --batch "C:\Users\grant\Downloads\repeaters\*.csv" "C:\Users\grant\Downloads\xx.csv"
+## converts every matching file (or every .csv in a directory) in parallel into one output file.
+## add --dedupe to skip channels already in the output (same frequencies, mode, CC, slot and tones)
+## and --merge-report merged.csv to list every channel that was dropped.
+## add --mmap to read large inputs through a memory map (see mapped_csv.py).
+## add --validate problems.csv to check every row first, list the problems in problems.csv
+## and convert only the rows without errors (single file only, see validation.py).
+## add --profile profile.json to record where the time goes (see profiling.py).
+## add --cache to keep the parsed input in h8.csv.cache/ and skip parsing it next time (see channel_cache.py).
+## add --pipeline to overlap reading, mapping and writing, with --workers N to map in N processes (see pipeline.py).
 
 import csv
+import glob
 import os
 import argparse
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+import profiling
+from channel_engine import BUFFER_SIZE, DM32Writer, convert, dm32_row, read_chirp, read_dm32
+from merge_engine import Deduplicator, channel_key
+from radio_formats import DM32
 
-def convert_tidradio_to_dm32(input_file, output_file):
-    # Define DM32 headers
-    dm32_headers = [
-        "No.","Channel Name","Channel Type","RX Frequency[MHz]","TX Frequency[MHz]",
-        "Power","Band Width","Scan List","TX Admit","Emergency System","Squelch Level",
-        "APRS Report Type","Forbid TX","APRS Receive","Forbid Talkaround","Auto Scan",
-        "Lone Work","Emergency Indicator","Emergency ACK","Analog APRS PTT Mode",
-        "Digital APRS PTT Mode","TX Contact","RX Group List","Color Code","Time Slot",
-        "Encryption","Encryption ID","APRS Report Channel","Direct Dual Mode",
-        "Private Confirm","Short Data Confirm","DMR ID","CTC/DCS Decode","CTC/DCS Encode",
-        "Scramble","RX Squelch Mode","Signaling Type","PTT ID","VOX Function","PTT ID Display"
-    ]
+DM32_HEADERS = DM32.headers
+_NO, _NAME = DM32.indices("No.", "Channel Name")
 
+
+def last_channel_number(output_file, block_size=4096):
+    """Return the "No." of the last record in a DM32 CSV by reading only the end of the file.
+
+    Returns 0 if the file holds nothing but a header, or None if the last
+    record doesn't start with a channel number.
+    """
+    try:
+        with open(output_file, 'rb') as of:
+            pos = of.seek(0, os.SEEK_END)
+            tail = b""
+            while pos > 0:
+                read_size = min(block_size, pos)
+                pos -= read_size
+                of.seek(pos)
+                tail = of.read(read_size) + tail
+                if b"\n" in tail.rstrip(b"\r\n"):
+                    break
+    except OSError:
+        return None
+
+    tail = tail.rstrip(b"\r\n")
+    if b"\n" not in tail:
+        return 0  # header only
+    last_line = tail.rsplit(b"\n", 1)[1].decode(errors="replace")
+    last_record = next(csv.reader([last_line]), [])
+    try:
+        return int(last_record[0])
+    except (IndexError, ValueError):
+        return None
+
+
+def dm32_output_state(output_file):
+    """Check an existing DM32 output file.
+
+    Returns (write_header, start_index): whether a header still needs to be
+    written and the "No." to give the next appended channel.
+    """
     # If the output exists and has content, append; otherwise create and write header.
     output_exists = os.path.isfile(output_file)
     write_header = True
@@ -30,106 +75,200 @@ def convert_tidradio_to_dm32(input_file, output_file):
                 existing_header = next(csv.reader(of), None)
                 if existing_header:
                     write_header = False
-                    if existing_header != dm32_headers:
+                    if existing_header != DM32_HEADERS:
                         print(f"Warning: existing header in '{output_file}' differs from expected DM32 headers.", file=sys.stderr)
         except Exception as e:
             print(f"Warning reading existing output file header: {e}", file=sys.stderr)
 
-    # If appending to an existing file, continue numbering after existing rows
+    # If appending to an existing file, continue numbering after the last row
     start_index = 1
     if output_exists and not write_header:
-        try:
-            with open(output_file, newline='') as of:
-                existing_reader = csv.reader(of)
-                next(existing_reader, None)
-                start_index = sum(1 for _ in existing_reader) + 1
-        except Exception:
-            start_index = 1
-
-    with open(input_file, newline='') as infile, open(output_file, 'a', newline='') as outfile:
-        reader = csv.DictReader(infile)
-        writer = csv.DictWriter(outfile, fieldnames=dm32_headers)
+        last_no = last_channel_number(output_file)
+        if last_no is None:
+            # The last record has no usable "No." (edited by hand?), so count rows instead
+            try:
+                with open(output_file, newline='') as of:
+                    existing_reader = csv.reader(of)
+                    next(existing_reader, None)
+                    last_no = sum(1 for _ in existing_reader)
+            except Exception:
+                last_no = 0
+        start_index = last_no + 1
+
+    return write_header, start_index
+
+
+def convert_tidradio_to_dm32(input_file, output_file, dedupe=None, mapped=False, skip_rows=None, cache=False,
+                             pipelined=False, workers=None):
+    """Append a CHIRP/TID radio export to a DM32 file.
+
+    If `dedupe` (a merge_engine.Deduplicator) is given, channels already in
+    the output file or earlier in the input are dropped and recorded in it.
+    With `mapped`, the input is read through a memory map. Rows numbered
+    in `skip_rows` (see validation.py) are left out. With `cache`, the
+    input is read from its columnar cache (see channel_cache.py).
+    With `pipelined`, reading, mapping and writing overlap on separate
+    threads, mapping in `workers` processes if more than one is given and
+    the file is read as is (see pipeline.py).
+    """
+    write_header, start_index = dm32_output_state(output_file)
+    if cache:
+        from channel_cache import read_cached
+        channels = read_cached("chirp", input_file, mapped=mapped, skip_rows=skip_rows)
+    else:
+        channels = read_chirp(input_file, mapped=mapped, skip_rows=skip_rows)
+    if dedupe is not None:
+        if not write_header:
+            dedupe.seed(read_dm32(output_file))
+        channels = dedupe.unique(channels)
+
+    if pipelined:
+        from pipeline import convert_pipelined
+        as_is = not (dedupe is not None or mapped or skip_rows or cache)
+        with open(output_file, 'a', newline='', buffering=BUFFER_SIZE) as outfile:
+            convert_pipelined("chirp", input_file, "dm32", outfile, None if as_is else channels, workers,
+                              write_header, start_index)
+        return
+
+    with open(output_file, 'a', newline='') as outfile:
+        convert(channels, [DM32Writer(outfile, write_header, start_index)])
+
+
+def expand_inputs(patterns, exclude=None):
+    """Expand files, directories (all *.csv inside) and glob patterns into a sorted file list."""
+    exclude = os.path.abspath(exclude) if exclude else None
+    files = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.csv"))
+        else:
+            matches = glob.glob(pattern) or [pattern]
+        for path in sorted(matches):
+            full = os.path.abspath(path)
+            if full != exclude and full not in seen:
+                seen.add(full)
+                files.append(path)
+    return files
+
+
+def _convert_file_rows(input_file, with_keys=False, mapped=False):
+    """Worker for convert_batch_to_dm32: map one CHIRP file, leaving "No." to the caller.
+
+    With `with_keys` the duplicate key of every row is returned too, so the
+    caller can deduplicate without parsing the rows again.
+    """
+    start = time.perf_counter()
+    rows = []
+    keys = [] if with_keys else None
+    for channel in read_chirp(input_file, mapped=mapped):
+        rows.append(dm32_row(channel, None))
+        if with_keys:
+            keys.append(channel_key(channel))
+    return rows, keys, time.perf_counter() - start
+
+
+def convert_batch_to_dm32(inputs, output_file, workers=None, dedupe=None, mapped=False):
+    """Convert many CHIRP/TID radio CSV files into one DM32 file.
+
+    Files are mapped in parallel across processes and merged in sorted
+    input order, so "No." numbering is continuous and deterministic. A file
+    that fails to convert is reported and skipped instead of stopping the batch.
+
+    With `dedupe` (a merge_engine.Deduplicator) duplicates of channels already
+    in the output or in an earlier file are dropped; the per-file channel
+    count is the number actually written. With `mapped`, inputs are read
+    through a memory map.
+
+    Returns a list of (input_file, channels, seconds, error) tuples, one per file.
+    """
+    files = expand_inputs(inputs, exclude=output_file)
+    write_header, number = dm32_output_state(output_file)
+    if dedupe is not None and not write_header:
+        dedupe.seed(read_dm32(output_file))
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(output_file, 'a', newline='') as outfile:
+        writer = csv.writer(outfile)
         if write_header:
-            writer.writeheader()
-
-        for i, row in enumerate(reader, start=start_index):
-            rx_freq = float(row["Frequency"])
-            duplex = row["Duplex"].strip()
-            offset = float(row["Offset"]) if row["Offset"] else 0.0
-
-            # Calculate TX frequency based on duplex
-            if duplex == "+":
-                tx_freq = rx_freq + offset
-            elif duplex == "-":
-                tx_freq = rx_freq - offset
-            else:
-                tx_freq = rx_freq  # simplex
-
-            # Map power
-            power_map = {"8.0W": "High", "4.0W": "Low"}
-            power = power_map.get(row.get("Power",""), "High")
-
-            # Bandwidth: assume FM channels are 25kHz, narrow FM 12.5kHz
-            bandwidth = "25KHz" if rx_freq < 400 else "12.5KHz"
-
-            dm32_row = {
-                "No.": i,
-                "Channel Name": row["Name"],
-                "Channel Type": "Analog" if row["Mode"] == "FM" else "Digital",
-                "RX Frequency[MHz]": f"{rx_freq:.5f}",
-                "TX Frequency[MHz]": f"{tx_freq:.5f}",
-                "Power": power,
-                "Band Width": bandwidth,
-                "Scan List": "None",
-                "TX Admit": "Always",
-                "Emergency System": "None",
-                "Squelch Level": "3",
-                "APRS Report Type": "Off",
-                "Forbid TX": "0",
-                "APRS Receive": "0",
-                "Forbid Talkaround": "0",
-                "Auto Scan": "0",
-                "Lone Work": "0",
-                "Emergency Indicator": "0",
-                "Emergency ACK": "0",
-                "Analog APRS PTT Mode": "0",
-                "Digital APRS PTT Mode": "0",
-                "TX Contact": row["Name"],
-                "RX Group List": row["Name"],
-                "Color Code": "1",
-                "Time Slot": "Slot 1",
-                "Encryption": "0",
-                "Encryption ID": "None",
-                "APRS Report Channel": "1",
-                "Direct Dual Mode": "0",
-                "Private Confirm": "0",
-                "Short Data Confirm": "0",
-                "DMR ID": "DM32",
-                "CTC/DCS Decode": row.get("cToneFreq","None"),
-                "CTC/DCS Encode": row.get("cToneFreq","None"),
-                "Scramble": "None",
-                "RX Squelch Mode": "Carrier/CTC",
-                "Signaling Type": "None",
-                "PTT ID": "OFF",
-                "VOX Function": "0",
-                "PTT ID Display": "0"
-            }
-
-            writer.writerow(dm32_row)
+            writer.writerow(DM32_HEADERS)
+
+        futures = [pool.submit(_convert_file_rows, path, dedupe is not None, mapped) for path in files]
+        for path, future in zip(files, futures):
+            try:
+                rows, keys, elapsed = future.result()
+            except Exception as e:
+                results.append((path, 0, 0.0, str(e)))
+                continue
+            if dedupe is not None:
+                rows = [row for row, key in zip(rows, keys) if dedupe.add_key(key, row[_NAME])]
+            for row in rows:
+                row[_NO] = number
+                number += 1
+            writer.writerows(rows)
+            results.append((path, len(rows), elapsed, None))
+
+    return results
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Convert CHIRP/TID radio CSV to DM32 format")
-    parser.add_argument("input", help="Input CSV file")
+    parser.add_argument("input", help="Input CSV file (with --batch: a directory or glob pattern)")
     parser.add_argument("output", nargs="?", default="DM32_converted.csv", help="Output CSV file (default: DM32_converted.csv)")
+    parser.add_argument("--batch", action="store_true", help="Convert every matching CSV in parallel into one output file")
+    parser.add_argument("--workers", type=int,
+                        help="Worker processes for --batch (default: one per CPU) or --pipeline (default: none)")
+    parser.add_argument("--dedupe", action="store_true", help="Skip channels that duplicate one already in the output")
+    parser.add_argument("--merge-report", help="With --dedupe, write every dropped channel to this CSV")
+    parser.add_argument("--mmap", action="store_true", help="Read inputs through a memory map (UTF-8 only)")
+    parser.add_argument("--validate", metavar="REPORT", help="Write every problem row to REPORT and convert only rows without errors")
+    parser.add_argument("--cache", action="store_true", help="Read the input from its columnar cache, building it if needed")
+    parser.add_argument("--pipeline", action="store_true", help="Overlap reading, mapping and writing (single file)")
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    if (args.validate or args.cache or args.pipeline) and args.batch:
+        parser.error("--validate, --cache and --pipeline work on a single input file")
 
-    if not os.path.isfile(args.input):
-        print(f"Input file '{args.input}' not found.", file=sys.stderr)
-        sys.exit(2)
+    dedupe = Deduplicator() if args.dedupe or args.merge_report else None
 
-    try:
-        convert_tidradio_to_dm32(args.input, args.output)
-        print(f"Wrote output to '{args.output}'")
-    except Exception as e:
-        print(f"Error converting file: {e}", file=sys.stderr)
-        sys.exit(1)
\ No newline at end of file
+    def report_merge():
+        if dedupe is None:
+            return
+        print("\n".join(dedupe.report()))
+        if args.merge_report:
+            dedupe.write_report(args.merge_report)
+
+    with profiling.profiled(args, [None if args.batch else args.input], [args.output]) as profiler:
+        if args.batch:
+            results = convert_batch_to_dm32([args.input], args.output, args.workers, dedupe, args.mmap)
+            if profiler is not None:
+                for path, *_ in results:
+                    profiler.file(path, "read")
+            failed = 0
+            for path, count, elapsed, error in results:
+                if error:
+                    failed += 1
+                    print(f"Error converting '{path}': {error}", file=sys.stderr)
+                else:
+                    print(f"{path}: {count} channels in {elapsed:.3f}s")
+            print(f"Wrote {len(results) - failed} of {len(results)} files to '{args.output}'")
+            report_merge()
+            sys.exit(1 if failed else 0)
+
+        if not os.path.isfile(args.input):
+            print(f"Input file '{args.input}' not found.", file=sys.stderr)
+            sys.exit(2)
+
+        try:
+            skip_rows = None
+            if args.validate:
+                from validation import validate_to_report
+                with profiling.stage("validate"):
+                    skip_rows = validate_to_report("chirp", args.input, args.validate, mapped=args.mmap)
+            convert_tidradio_to_dm32(args.input, args.output, dedupe, args.mmap, skip_rows, args.cache,
+                                     args.pipeline, args.workers)
+            print(f"Wrote output to '{args.output}'")
+            report_merge()
+        except Exception as e:
+            print(f"Error converting file: {e}", file=sys.stderr)
+            sys.exit(1)
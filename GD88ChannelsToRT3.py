@@ -1,87 +1,85 @@
-import csv
+## EXAMPLE USE
+## python GD88ChannelsToRT3.py try.csv converted_rt3s.csv
+## python GD88ChannelsToRT3.py try.csv converted_rt3s.csv --incremental
+## --incremental keeps converted_rt3s.csv.manifest and only maps rows that changed since the last run.
+## --mmap reads a large export through a memory map (see mapped_csv.py); the output is the same.
+## --validate problems.csv checks every row first, lists the problems and converts only rows without errors.
+## --profile profile.json records stage times, rows, bytes and peak memory (see profiling.py).
+## --pipeline overlaps reading, mapping and writing; add --workers N to map in N processes (see pipeline.py).
+## --cache keeps the parsed export in try.csv.cache/ so the next run skips parsing it (see channel_cache.py).
 
-def convert_try_to_rt3s(try_file, rt3s_file):
-    with open(try_file, newline='') as infile, open(rt3s_file, 'w', newline='') as outfile:
-        reader = csv.DictReader(infile)
-        fieldnames = [
-            "Channel Mode", "Channel Name", "RX Frequency(MHz)", "TX Frequency(MHz)", "Band Width",
-            "Scan List", "Squelch", "RX Ref Frequency", "TX Ref Frequency", "TOT[s]", "TOT Rekey Delay[s]",
-            "Power", "Admit Criteria", "Auto Scan", "Rx Only", "Lone Worker", "VOX", "Allow Talkaround",
-            "Send GPS Info", "Receive GPS Info", "Private Call Confirmed", "Emergency Alarm Ack",
-            "Data Call Confirmed", "Allow Interrupt", "DCDM Switch", "Leader/MS", "Emergency System",
-            "Contact Name", "Group List", "Color Code", "Repeater Slot", "In Call Criteria", "Privacy",
-            "Privacy No.", "GPS System", "CTCSS/DCS Dec", "CTCSS/DCS Enc", "Rx Signaling System",
-            "Tx Signaling System", "QT Reverse", "Non-QT/DQT Turn-off Freq", "Display PTT ID",
-            "Reverse Burst/Turn-off Code", "Decode 1", "Decode 2", "Decode 3", "Decode 4", "Decode 5",
-            "Decode 6", "Decode 7", "Decode 8"
-        ]
-        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-        writer.writeheader()
+import argparse
 
-        for row in reader:
-            mode = "1" if row["Type"].upper() == "ANALOG" else "2"
-            power = "2" if row["Power"].upper() == "HIGH" else "0"
-            rx_freq = f"{int(row['RX Freq']) / 1e6:.5f}"
-            tx_freq = f"{int(row['TX Freq']) / 1e6:.5f}"
-            slot = "1" if row["TX TS"] == "TS1" else "2"
-            color_code = row.get("TX CC", "1")
+import profiling
+from channel_engine import BUFFER_SIZE, GD88Columns, RT3Writer, convert, read_gd88, rt3_row
+from incremental import convert_incremental, render_lines
+from radio_formats import RT3_CHANNELS
 
-            rt3s_row = {
-                "Channel Mode": mode,
-                "Channel Name": row["CH Name"],
-                "RX Frequency(MHz)": rx_freq,
-                "TX Frequency(MHz)": tx_freq,
-                "Band Width": "0",
-                "Scan List": "0",
-                "Squelch": "3",
-                "RX Ref Frequency": "0",
-                "TX Ref Frequency": "0",
-                "TOT[s]": "4",
-                "TOT Rekey Delay[s]": "0",
-                "Power": power,
-                "Admit Criteria": "0",
-                "Auto Scan": "0",
-                "Rx Only": "0",
-                "Lone Worker": "0",
-                "VOX": "0",
-                "Allow Talkaround": "0",
-                "Send GPS Info": "0",
-                "Receive GPS Info": "0",
-                "Private Call Confirmed": "0",
-                "Emergency Alarm Ack": "0",
-                "Data Call Confirmed": "0",
-                "Allow Interrupt": "0",
-                "DCDM Switch": "1",
-                "Leader/MS": "0",
-                "Emergency System": "1",
-                "Contact Name": row.get("Contact Name", "None"),
-                "Group List": row.get("RX Group Name", "None"),
-                "Color Code": color_code,
-                "Repeater Slot": slot,
-                "In Call Criteria": "1",
-                "Privacy": "0",
-                "Privacy No.": "0",
-                "GPS System": "0",
-                "CTCSS/DCS Dec": row.get("RX Tone", "None"),
-                "CTCSS/DCS Enc": row.get("TX Tone", "None"),
-                "Rx Signaling System": "0",
-                "Tx Signaling System": "0",
-                "QT Reverse": "0",
-                "Non-QT/DQT Turn-off Freq": "0",
-                "Display PTT ID": "0",
-                "Reverse Burst/Turn-off Code": "0",
-                "Decode 1": "0",
-                "Decode 2": "0",
-                "Decode 3": "0",
-                "Decode 4": "0",
-                "Decode 5": "0",
-                "Decode 6": "0",
-                "Decode 7": "0",
-                "Decode 8": "0"
-            }
+# Default input and output file paths
+INPUT_FILE = r"C:\Users\grant\Downloads\try.csv"
+OUTPUT_FILE = r"C:\Users\grant\Downloads\converted_rt3s.csv"
 
-            writer.writerow(rt3s_row)
 
-# Example usage:
-convert_try_to_rt3s(r"C:\Users\grant\Downloads\try.csv", r"C:\Users\grant\Downloads\converted_rt3s.csv")
+def _render_rt3(header, changed, new_number):
+    columns = GD88Columns(header)
+    rows = (rt3_row(columns.channel(columns.pad(row))) for _, row, _ in changed)
+    return [(None, line) for line in render_lines(rows)]
 
+
+def convert_try_to_rt3s(try_file, rt3s_file, incremental=False, mapped=False, skip_rows=None, cache=False,
+                        pipelined=False, workers=None):
+    """Convert a GD88 channel CSV to RT3 format. Returns the number of channels.
+
+    With `incremental`, rows unchanged since the last incremental run are
+    copied from the manifest next to the output instead of being mapped again.
+    With `mapped`, the input is read through a memory map. Rows numbered
+    in `skip_rows` (see validation.py) are left out. With `cache`, the
+    input is read from its columnar cache (see channel_cache.py).
+    With `pipelined`, reading, mapping and writing overlap on separate
+    threads, mapping in `workers` processes if more than one is given and
+    the file is read as is (see pipeline.py).
+    """
+    if incremental:
+        rows, _ = convert_incremental(try_file, rt3s_file, render_lines([RT3_CHANNELS.headers])[0],
+                                      _render_rt3, context=("rt3",),
+                                      namer=lambda header: GD88Columns(header).name)
+        return rows
+
+    if cache:
+        from channel_cache import read_cached
+        channels = read_cached("gd88", try_file, mapped=mapped, skip_rows=skip_rows)
+    else:
+        channels = read_gd88(try_file, mapped=mapped, skip_rows=skip_rows)
+    if pipelined:
+        from pipeline import convert_pipelined
+        as_is = not (mapped or skip_rows or cache)
+        with open(rt3s_file, 'w', newline='', buffering=BUFFER_SIZE) as outfile:
+            return convert_pipelined("gd88", try_file, "rt3", outfile, None if as_is else channels, workers)
+
+    with open(rt3s_file, 'w', newline='') as outfile:
+        return convert(channels, [RT3Writer(outfile)])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a GD88 channel CSV to RT3 format")
+    parser.add_argument("input", nargs="?", default=INPUT_FILE, help=f"GD88 channel CSV (default: {INPUT_FILE})")
+    parser.add_argument("output", nargs="?", default=OUTPUT_FILE, help=f"RT3 channel CSV (default: {OUTPUT_FILE})")
+    parser.add_argument("--incremental", action="store_true", help="Only reconvert rows that changed since the last --incremental run")
+    parser.add_argument("--mmap", action="store_true", help="Read the input through a memory map (UTF-8 only)")
+    parser.add_argument("--validate", metavar="REPORT", help="Write every problem row to REPORT and convert only rows without errors")
+    parser.add_argument("--cache", action="store_true", help="Read the input from its columnar cache, building it if needed")
+    parser.add_argument("--pipeline", action="store_true", help="Overlap reading, mapping and writing")
+    parser.add_argument("--workers", type=int, help="With --pipeline, map in this many processes (default: none)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    if (args.validate or args.cache or args.pipeline) and args.incremental:
+        parser.error("--validate, --cache and --pipeline can't be combined with --incremental")
+
+    with profiling.profiled(args, [args.input], [args.output]):
+        skip_rows = None
+        if args.validate:
+            from validation import validate_to_report
+            with profiling.stage("validate"):
+                skip_rows = validate_to_report("gd88", args.input, args.validate, mapped=args.mmap)
+        convert_try_to_rt3s(args.input, args.output, args.incremental, args.mmap, skip_rows, args.cache,
+                            args.pipeline, args.workers)
@@ -1,8 +1,33 @@
+## EXAMPLE USE
+## python GD88ContactsToRT3.py 88contacts.csv rt3contacts.csv
+## python GD88ContactsToRT3.py users.csv rt3contacts.csv --stream --workers 4 --max-contacts 10000
+## --stream converts in chunks (across processes with --workers) and splits the
+## output into rt3contacts_001.csv, rt3contacts_002.csv, ... once it exceeds
+## --max-contacts, so a full DMR user database fits the radio's contact list.
+## --dedupe drops repeated DMR IDs (same ID and call type) and prints what was merged.
+## --profile profile.json records stage times, rows, bytes and peak memory (see profiling.py).
+
+import argparse
 import csv
+import io
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import profiling
+from channel_engine import BUFFER_SIZE
+from mapped_csv import read_blocks
+from merge_engine import Deduplicator, contact_key
+from radio_formats import RT3_CONTACTS
 
-# Input and output file paths
-input_file = r'C:\Users\grant\Downloads\88contacts.csv'
-output_file = r'C:\Users\grant\Downloads\rt3contacts_converted.csv'
+# Default input and output file paths
+INPUT_FILE = r'C:\Users\grant\Downloads\88contacts.csv'
+OUTPUT_FILE = r'C:\Users\grant\Downloads\rt3contacts_converted.csv'
+
+# Digital contacts an RT3/RT3S holds on stock firmware
+CONTACT_CAPACITY = 10000
 
 # Mapping for Call Type
 call_type_map = {
@@ -10,25 +35,217 @@ call_type_map = {
     'Private': '2'
 }
 
-# Read from 88contacts.csv and write to RT3 format
-with open(input_file, mode='r', newline='', encoding='utf-8') as infile, \
-     open(output_file, mode='w', newline='', encoding='utf-8') as outfile:
 
-    reader = csv.DictReader(infile)
-    fieldnames = ['Contact Name', 'Call Type', 'Call ID', 'Call Receive Tone']
-    writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-    writer.writeheader()
+def convert_gd88_contacts_to_rt3(input_file, output_file, dedupe=None):
+    """Read a GD88 contact list and write it in RT3 format. Returns the number of contacts written.
+
+    With `dedupe` (a merge_engine.Deduplicator) repeated DMR IDs are dropped
+    and recorded in it.
+    """
+    count = 0
+    with open(input_file, mode='r', newline='', encoding='utf-8-sig') as infile, \
+         open(output_file, mode='w', newline='', encoding='utf-8') as outfile:
+
+        reader = csv.reader(infile)
+        writer = csv.writer(outfile)
+        writer.writerow(RT3_CONTACTS.headers)
+
+        header = next(reader, None)
+        if header is None:
+            reader = ()
+        else:
+            columns = _contact_columns(header)
+            name_i, id_i, type_i = columns
+            width = max(columns) + 1
+
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row += [''] * (width - len(row))
+            contact_name = row[name_i].strip()
+            call_id = row[id_i].strip()
+            call_type = call_type_map.get(row[type_i].strip(), '1')  # Default to Group if unknown
+            if dedupe is not None and not dedupe.add_key(contact_key(call_type, call_id), contact_name):
+                continue
+
+            writer.writerow((contact_name, call_type, call_id, '0'))
+            count += 1
+
+    profiling.count("convert", count)
+    return count
+
+
+def _contact_columns(header):
+    """Positions of the Name, DMR ID and Type columns in a GD88 contacts header."""
+    header = [name.strip() for name in header]
+    try:
+        return tuple(header.index(column) for column in ('Name', 'DMR ID', 'Type'))
+    except ValueError as e:
+        raise ValueError(f"GD88 contacts header is missing a column: {e}") from None
+
+
+def _convert_contact_block(block, columns, with_keys=False):
+    """Map a block of GD88 contact CSV lines to rendered RT3 rows, one string per contact.
+
+    Returns (lines, keys); keys holds (duplicate key, name) pairs when
+    `with_keys` is set and is None otherwise.
+    """
+    name_i, id_i, type_i = columns
+    width = max(columns) + 1
+    out = io.StringIO()
+    writer = csv.writer(out)
+    lines = []
+    keys = [] if with_keys else None
+    for row in csv.reader(io.StringIO(block)):
+        if not row:
+            continue
+        if len(row) < width:
+            row += [''] * (width - len(row))
+        name = row[name_i].strip()
+        call_type = call_type_map.get(row[type_i].strip(), '1')
+        call_id = row[id_i].strip()
+        writer.writerow((name, call_type, call_id, '0'))
+        lines.append(out.getvalue())
+        out.seek(0)
+        out.truncate()
+        if with_keys:
+            keys.append((contact_key(call_type, call_id), name))
+    return lines, keys
+
+
+class _SplitOutput:
+    """Writes RT3 contact rows, starting a new file every max_contacts rows.
+
+    The first file is written to output_file. If a second one is needed the
+    first is renamed to <stem>_001<suffix> and the rest follow as _002, _003...
+    """
+
+    def __init__(self, output_file, max_contacts, buffer_size):
+        self.output_file = Path(output_file)
+        self.max_contacts = max_contacts
+        self.buffer_size = buffer_size
+        self.paths = []
+        self.file = None
+        self.room = 0
+
+    def _part(self, number):
+        return self.output_file.with_name(f"{self.output_file.stem}_{number:03d}{self.output_file.suffix}")
+
+    def _next_file(self):
+        if self.file is not None:
+            self.file.close()
+        if len(self.paths) == 1:
+            first = self._part(1)
+            os.replace(self.output_file, first)
+            self.paths[0] = first
+        path = self._part(len(self.paths) + 1) if self.paths else self.output_file
+        self.file = open(path, mode='w', newline='', encoding='utf-8', buffering=self.buffer_size)
+        csv.writer(self.file).writerow(RT3_CONTACTS.headers)
+        self.paths.append(path)
+        self.room = self.max_contacts or sys.maxsize
+
+    def writelines(self, lines):
+        start = 0
+        while start < len(lines):
+            if self.file is None or not self.room:
+                self._next_file()
+            end = min(len(lines), start + self.room)
+            self.file.writelines(lines[start:end])
+            self.room -= end - start
+            start = end
+
+    def close(self):
+        if self.file is None:
+            self._next_file()  # header-only output for an empty input
+        self.file.close()
+
+
+def convert_gd88_contacts_streaming(input_file, output_file, chunksize=20000, workers=None,
+                                    max_contacts=CONTACT_CAPACITY, buffer_size=BUFFER_SIZE, dedupe=None):
+    """Convert a GD88 contact list of any size to RT3 contact files.
+
+    The input is read in blocks of `chunksize` contacts. With more than one
+    worker the blocks are parsed and mapped in parallel processes, with at
+    most two blocks per worker in flight, so memory stays bounded by the
+    chunk size rather than the file size. Output keeps the input order and
+    is split into files of at most `max_contacts` contacts (0 or None for a
+    single file). With `dedupe` (a merge_engine.Deduplicator) repeated DMR
+    IDs are dropped as the blocks arrive.
+
+    Returns (contacts written, output_paths).
+    """
+    workers = workers or os.cpu_count() or 1
+    with_keys = dedupe is not None
+    count = 0
+    output = _SplitOutput(output_file, max_contacts, buffer_size)
+
+    def emit(result):
+        nonlocal count
+        lines, keys = result
+        with profiling.stage("write", len(lines)):
+            if with_keys:
+                lines = [line for line, (key, name) in zip(lines, keys) if dedupe.add_key(key, name)]
+            output.writelines(lines)
+        count += len(lines)
+
+    try:
+        with open(input_file, mode='r', newline='', encoding='utf-8-sig') as infile:
+            header = next(csv.reader([infile.readline()]), None)
+            columns = _contact_columns(header) if header else None
+            blocks = read_blocks(infile, chunksize) if header else ()
+
+            if workers == 1:
+                for block in blocks:
+                    with profiling.stage("map"):
+                        result = _convert_contact_block(block, columns, with_keys)
+                    emit(result)
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    pending = deque()
+                    for block in blocks:
+                        pending.append(pool.submit(_convert_contact_block, block, columns, with_keys))
+                        if len(pending) >= 2 * workers:
+                            with profiling.stage("wait for workers"):
+                                result = pending.popleft().result()
+                            emit(result)
+                    while pending:
+                        with profiling.stage("wait for workers"):
+                            result = pending.popleft().result()
+                        emit(result)
+    finally:
+        output.close()
+
+    return count, output.paths
 
-    for row in reader:
-        contact_name = row['Name'].strip()
-        call_id = row['DMR ID'].strip()
-        call_type = call_type_map.get(row['Type'].strip(), '1')  # Default to Group if unknown
 
-        writer.writerow({
-            'Contact Name': contact_name,
-            'Call Type': call_type,
-            'Call ID': call_id,
-            'Call Receive Tone': '0'
-        })
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a GD88 contact list to RT3 format")
+    parser.add_argument("input", nargs="?", default=INPUT_FILE, help=f"GD88 contacts CSV (default: {INPUT_FILE})")
+    parser.add_argument("output", nargs="?", default=OUTPUT_FILE, help=f"RT3 contacts CSV (default: {OUTPUT_FILE})")
+    parser.add_argument("--stream", action="store_true", help="Convert in chunks for very large contact lists")
+    parser.add_argument("--chunksize", type=int, default=20000, help="Contacts per chunk with --stream (default: 20000)")
+    parser.add_argument("--workers", type=int, help="Processes with --stream (default: CPU count, 1 = no pool)")
+    parser.add_argument("--max-contacts", type=int, default=CONTACT_CAPACITY,
+                        help=f"Contacts per output file with --stream, 0 for one file (default: {CONTACT_CAPACITY})")
+    parser.add_argument("--dedupe", action="store_true", help="Drop contacts whose DMR ID and call type repeat an earlier one")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
 
-print(f"✅ Conversion complete. Output saved to {output_file}")
+    dedupe = Deduplicator() if args.dedupe else None
+    with profiling.profiled(args, [args.input]) as profiler:
+        if args.stream:
+            count, paths = convert_gd88_contacts_streaming(args.input, args.output, args.chunksize,
+                                                           args.workers, args.max_contacts, dedupe=dedupe)
+            print(f"✅ Converted {count} contacts into {len(paths)} file(s):")
+            for path in paths:
+                print(f"   {path}")
+        else:
+            paths = [args.output]
+            convert_gd88_contacts_to_rt3(args.input, args.output, dedupe)
+            print(f"✅ Conversion complete. Output saved to {args.output}")
+        if profiler is not None:
+            for path in paths:
+                profiler.file(path, "written")
+    if dedupe is not None:
+        print("\n".join(dedupe.report()))
@@ -0,0 +1,132 @@
+## EXAMPLE USE
+## python GD88toAllFormats.py gd88.csv --rt3 converted_rt3s.csv --dm32 dm32.csv --maverick maverick_from_gd88_final.csv
+## Reads the GD88 export once and writes every requested format in the same pass.
+## --dm32 maps each block of the export with GD88toDB32channels.py's mapping as it
+## is read, so it is byte-identical to that script's output.
+## --maverick needs maverick_working_copy.csv and talkgroups.CSV (see --maverick-template/--talkgroups).
+## --mmap reads a large export through a memory map (see mapped_csv.py); not with --dm32.
+## --profile profile.json records stage times, rows, bytes and peak memory (see profiling.py).
+## --cache keeps the parsed export in gd88.csv.cache/ so the next RT3/Maverick run skips parsing it (see channel_cache.py).
+
+import argparse
+import io
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+
+import profiling
+from channel_engine import BUFFER_SIZE, MaverickWriter, RT3Writer, convert, read_gd88
+from GD88toDB32channels import DM32BlockWriter, gd88_text_blocks
+from GD88toMaverickChannels import (LOG_LEVELS, MAV_WORKING_FILE, TG_FILE, contact_report,
+                                     load_maverick_templates, load_tg_mapping)
+
+
+def _read_with_dm32(gd88_file, dm32_writer, parse=True):
+    """Channels of a GD88 export read as blocks of text, each block also mapped to DM32 on the way."""
+    for text in gd88_text_blocks(gd88_file):
+        dm32_writer.write(text)
+        if parse:
+            yield from read_gd88(io.StringIO(text, newline=""))
+
+
+def convert_gd88_to_all(gd88_file, rt3_file=None, dm32_file=None, maverick_file=None,
+                        mav_working_file=MAV_WORKING_FILE, tg_file=TG_FILE, buffer_size=BUFFER_SIZE,
+                        log_level="summary", mapped=False, cache=False):
+    """
+    Converts one GD88 channel export to RT3, DM32 and/or Maverick in a single pass.
+
+    Each GD88 row is parsed and decoded once and the resulting channel is
+    handed to every requested writer, so the cost grows with the input and
+    not with the number of targets. With a DM32 output the export is read
+    as blocks of text: each block is mapped with GD88toDB32channels.py's
+    mapping (which keeps the GD88 text as is) and parsed into channels for
+    the other writers, so the file is still read once.
+
+    Args:
+        gd88_file (str): Path to the GD88 channel CSV file.
+        rt3_file (str): RT3 output path, or None to skip RT3.
+        dm32_file (str): DM32 output path, or None to skip DM32.
+        maverick_file (str): Maverick output path, or None to skip Maverick.
+        mav_working_file (Path): Maverick working copy holding the template rows.
+        tg_file (Path): talkgroups.CSV used for Maverick contact lookup.
+        buffer_size (int): Write buffer size for each output file.
+        log_level (str): Maverick contact diagnostics: "quiet", "summary" or "verbose".
+        mapped (bool): Read the GD88 file through a memory map (not with dm32_file).
+        cache (bool): Read the GD88 file from its columnar cache (see channel_cache.py).
+
+    Returns:
+        int: The number of GD88 channels read.
+    """
+    with ExitStack() as stack:
+        def open_output(path, **kwargs):
+            return stack.enter_context(open(path, "w", newline="", buffering=buffer_size, **kwargs))
+
+        writers = []
+        maverick_writer = None
+        if rt3_file:
+            writers.append(RT3Writer(open_output(rt3_file)))
+        if maverick_file:
+            header, digital_template, analog_template = load_maverick_templates(Path(mav_working_file))
+            if digital_template is None or analog_template is None:
+                raise ValueError(f"{mav_working_file} is missing digital/analog template rows.")
+            tg_mapping = load_tg_mapping(Path(tg_file), verbose=log_level != "quiet")
+            maverick_writer = MaverickWriter(open_output(maverick_file, encoding="utf-8-sig"), header,
+                                             digital_template, analog_template, tg_mapping)
+            writers.append(maverick_writer)
+        if not writers and not dm32_file:
+            raise ValueError("No output formats requested.")
+        if mapped and dm32_file:
+            raise ValueError("--mmap can't be combined with --dm32, which reads the export as text")
+
+        dm32_writer = DM32BlockWriter(open_output(dm32_file)) if dm32_file else None
+        if cache:
+            from channel_cache import read_cached
+            channels = read_cached("gd88", gd88_file, mapped=mapped) if writers else ()
+            if dm32_writer is not None:
+                for text in gd88_text_blocks(gd88_file):
+                    dm32_writer.write(text)
+        elif dm32_writer is not None:
+            channels = _read_with_dm32(gd88_file, dm32_writer, parse=bool(writers))
+        else:
+            channels = read_gd88(gd88_file, mapped=mapped)
+        count = convert(channels, writers)
+        if dm32_writer is not None:
+            dm32_writer.finish()
+            if not writers:
+                count = dm32_writer.count
+
+    if maverick_writer is not None:
+        report = contact_report(maverick_writer, log_level)
+        if report:
+            print("\n".join(report))
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a GD88 channel CSV to several radio formats in one pass")
+    parser.add_argument("input", help="GD88 channel CSV file")
+    parser.add_argument("--rt3", help="RT3 channel output CSV")
+    parser.add_argument("--dm32", help="DM32 channel output CSV")
+    parser.add_argument("--maverick", help="Maverick channel output CSV")
+    parser.add_argument("--maverick-template", default=str(MAV_WORKING_FILE), help=f"Maverick working copy (default: {MAV_WORKING_FILE})")
+    parser.add_argument("--talkgroups", default=str(TG_FILE), help=f"Talkgroup list for Maverick (default: {TG_FILE})")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="summary", help="Maverick contact diagnostics (default: summary)")
+    parser.add_argument("--mmap", action="store_true", help="Read the input through a memory map (UTF-8 only)")
+    parser.add_argument("--cache", action="store_true", help="Read the input from its columnar cache, building it if needed")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not (args.rt3 or args.dm32 or args.maverick):
+        parser.error("give at least one of --rt3, --dm32 or --maverick")
+
+    try:
+        with profiling.profiled(args, [args.input], [args.rt3, args.dm32, args.maverick]):
+            count = convert_gd88_to_all(args.input, args.rt3, args.dm32, args.maverick,
+                                        args.maverick_template, args.talkgroups, log_level=args.log_level,
+                                        mapped=args.mmap, cache=args.cache)
+    except (OSError, ValueError) as e:
+        print(f"Error converting file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.log_level != "quiet":
+        print(f"Converted {count} GD88 channels")
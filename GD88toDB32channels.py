@@ -1,4 +1,64 @@
-import pandas as pd
+import argparse
+import io
+
+import profiling
+from mapped_csv import read_blocks
+from radio_formats import DM32, DM32_GD88_DEFAULTS
+
+# pandas is imported inside the functions that use it, so importing this
+# module (e.g. for DM32_COLUMNS) stays cheap
+
+DM32_COLUMNS = DM32.headers
+
+# GD88 columns are read as text and only the frequencies are made numbers,
+# so a column is written the same way whether the file is read whole or in
+# chunks (a blank no longer turns "11" into "11.0" in one chunk only)
+GD88_DTYPE = str
+
+# GD88 rows mapped per block when the export is read as text (see DM32BlockWriter)
+GD88_BLOCK_ROWS = 50000
+
+# Every DM32 column's default (radio_formats.DM32_GD88_DEFAULTS); the mapping
+# below replaces the columns that change per channel
+DM32_DEFAULTS = dict(zip(DM32_COLUMNS, DM32_GD88_DEFAULTS))
+
+
+def gd88_frame_to_dm32(gd88_df):
+    """
+    Maps a GD88 channel DataFrame to the DM32 column structure.
+
+    Every field is computed with whole-column operations and the constant
+    DM32 fields are broadcast, so no Python code runs per row.
+
+    Args:
+        gd88_df (pandas.DataFrame): GD88 channels as read by pandas.read_csv.
+
+    Returns:
+        pandas.DataFrame: A DataFrame containing the converted data.
+    """
+    import pandas as pd
+
+    digital = gd88_df["Type"].str.upper() != "ANALOG"
+
+    columns = dict(DM32_DEFAULTS)
+    columns.update({
+        "No.": gd88_df.index + 1,
+        "Channel Name": gd88_df["CH Name"],
+        "Channel Type": digital.map({True: "Digital", False: "Analog"}),
+        "RX Frequency[MHz]": pd.to_numeric(gd88_df["RX Freq"]) / 1000000.0,
+        "TX Frequency[MHz]": pd.to_numeric(gd88_df["TX Freq"]) / 1000000.0,
+        "Power": gd88_df["Power"],
+        "Band Width": gd88_df["Bandwidth"],
+        "Scan List": gd88_df["Scan List Name"],
+        "TX Contact": gd88_df["Contact Name"],
+        "RX Group List": gd88_df["RX Group Name"],
+        "Color Code": gd88_df["RX CC"].where(digital, 0),
+        "Time Slot": gd88_df["RX TS"].where(digital, "Slot 1"),
+    })
+
+    dm32_df = pd.DataFrame(columns, index=gd88_df.index, columns=DM32_COLUMNS)
+    return dm32_df.reset_index(drop=True)
+
 
 def convert_gd88_to_dm32(gd88_file, dm32_file):
     """
@@ -12,6 +72,173 @@ def convert_gd88_to_dm32(gd88_file, dm32_file):
         pandas.DataFrame: A DataFrame containing the converted data.
     """
 
+    import pandas as pd
+
+    # Read the GD88 CSV file into a DataFrame
+    with profiling.stage("read_csv"):
+        gd88_df = pd.read_csv(gd88_file, dtype=GD88_DTYPE)
+    profiling.count("read_csv", len(gd88_df))
+
+    with profiling.stage("map", len(gd88_df)):
+        return gd88_frame_to_dm32(gd88_df)
+
+
+def convert_gd88_to_dm32_chunked(gd88_file, output_file, chunksize=50000):
+    """
+    Converts a GD88 channel CSV file to DM32 format one batch at a time.
+
+    Only one chunk of the input is held in memory at once, so peak memory
+    depends on the chunk size rather than the size of the input. "No."
+    numbering carries on across chunks.
+
+    Args:
+        gd88_file (str): Path to the GD88 channel CSV file.
+        output_file (str): Path of the DM32 CSV file to write.
+        chunksize (int): Number of GD88 rows converted per batch.
+
+    Returns:
+        int: The number of channels written.
+    """
+    import pandas as pd
+
+    rows_written = 0
+    with open(output_file, "w", newline="") as outfile:
+        chunks = iter(pd.read_csv(gd88_file, dtype=GD88_DTYPE, chunksize=chunksize))
+        while True:
+            with profiling.stage("read_csv"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            profiling.count("read_csv", len(chunk))
+            with profiling.stage("map", len(chunk)):
+                dm32_chunk = gd88_frame_to_dm32(chunk)
+            with profiling.stage("to_csv", len(dm32_chunk)):
+                dm32_chunk.to_csv(outfile, header=rows_written == 0, index=False)
+            rows_written += len(dm32_chunk)
+
+        if rows_written == 0:
+            pd.DataFrame(columns=DM32_COLUMNS).to_csv(outfile, index=False)
+
+    return rows_written
+
+
+class DM32BlockWriter:
+    """Maps blocks of GD88 CSV text with gd88_frame_to_dm32 and appends the DM32 rows to outfile.
+
+    Each block starts with the GD88 header line (see gd88_text_blocks), so
+    the output is the same as convert_gd88_to_dm32's for the whole file;
+    "No." carries on across blocks. Call finish() after the last block.
+    """
+
+    __slots__ = ("outfile", "count")
+
+    def __init__(self, outfile):
+        self.outfile = outfile
+        self.count = 0
+
+    def write(self, text):
+        import pandas as pd
+
+        gd88_df = pd.read_csv(io.StringIO(text), dtype=GD88_DTYPE)
+        if gd88_df.empty:
+            return
+        gd88_df.index += self.count
+        gd88_frame_to_dm32(gd88_df).to_csv(self.outfile, header=self.count == 0, index=False)
+        self.count += len(gd88_df)
+
+    def finish(self):
+        if self.count == 0:
+            import pandas as pd
+            pd.DataFrame(columns=DM32_COLUMNS).to_csv(self.outfile, index=False)
+
+
+def gd88_text_blocks(infile, block_rows=GD88_BLOCK_ROWS):
+    """Yield blocks of up to block_rows records of a GD88 export (a path or open text file), each with the header line."""
+    if not hasattr(infile, "read"):
+        with open(infile, newline="", encoding="utf-8-sig") as f:
+            yield from gd88_text_blocks(f, block_rows)
+        return
+    header = infile.readline()
+    for block in read_blocks(infile, block_rows):
+        yield header + block
+
+
+def write_gd88_as_dm32(infile, outfile, block_rows=GD88_BLOCK_ROWS):
+    """
+    Converts a GD88 export (a path or open text file) to DM32 on an open file, a block at a time.
+
+    The output is the same as convert_gd88_to_dm32's; GD88toAllFormats.py
+    and conversion_server.py write DM32 this way.
+
+    Returns:
+        int: The number of channels written.
+    """
+    writer = DM32BlockWriter(outfile)
+    for text in gd88_text_blocks(infile, block_rows):
+        writer.write(text)
+    writer.finish()
+    return writer.count
+
+
+def _ch_name_getter(header):
+    """Function returning the "CH Name" field of a GD88 row (a list), or None."""
+    i = header.index("CH Name") if "CH Name" in header else len(header)
+    return lambda row: row[i] if i < len(row) else None
+
+
+def convert_gd88_to_dm32_incremental(gd88_file, output_file):
+    """
+    Converts a GD88 channel CSV file to DM32, mapping only rows that changed.
+
+    Unchanged rows are copied from the manifest kept next to the output
+    (see incremental.py) and keep their "No.". When there are changed rows
+    the whole input is still read with pandas, so their values are typed
+    and formatted exactly as in a full conversion, but only those rows are
+    mapped and written out.
+
+    Args:
+        gd88_file (str): Path to the GD88 channel CSV file.
+        output_file (str): Path of the DM32 CSV file to write.
+
+    Returns:
+        tuple: (channels written, channels that had to be mapped).
+    """
+    import pandas as pd
+    from incremental import convert_incremental
+
+    def render(header, changed, new_number):
+        if not changed:
+            return []
+        gd88_df = pd.read_csv(gd88_file, dtype=GD88_DTYPE)
+        dm32_df = gd88_frame_to_dm32(gd88_df.iloc[[position for position, _, _ in changed]])
+        numbers = [number if number is not None else new_number() for _, _, number in changed]
+        dm32_df["No."] = numbers
+
+        lines = dm32_df.to_csv(index=False, header=False).splitlines(keepends=True)
+        if len(lines) != len(numbers):  # a quoted field contains a line break
+            lines = [dm32_df.iloc[[i]].to_csv(index=False, header=False) for i in range(len(numbers))]
+        return list(zip(numbers, lines))
+
+    return convert_incremental(gd88_file, output_file, pd.DataFrame(columns=DM32_COLUMNS).to_csv(index=False),
+                               render, context=("dm32",), encoding="utf-8",
+                               namer=_ch_name_getter,
+                               skip_row=lambda row: not row)
+
+
+def convert_gd88_to_dm32_iterrows(gd88_file, dm32_file):
+    """
+    Row-by-row reference implementation of convert_gd88_to_dm32.
+
+    This is the original script's loop, kept as it was for benchmarking
+    and for checking the vectorized path against the original behaviour
+    (see bench_gd88_to_dm32.py). The vectorized path differs on purpose in
+    two ways: its columns follow radio_formats.DM32, which puts "CTC/DCS
+    Decode" before "CTC/DCS Encode", and a color code is written as read
+    ("1"), where this loop writes "1.0" once a blank makes pandas read the
+    RX CC column as floats.
+    """
+    import pandas as pd
+
     # Read the GD88 CSV file into a DataFrame
     gd88_df = pd.read_csv(gd88_file)
 
@@ -82,16 +309,30 @@ def convert_gd88_to_dm32(gd88_file, dm32_file):
 
     return dm32_df
 
-# File paths
-gd88_file = "gd88channel.csv"
-dm32_file = "dm32channel.csv"
-output_file = "output.csv"  # Specify the output file name
 
-# Convert the data
-converted_df = convert_gd88_to_dm32(gd88_file, dm32_file)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert GD88 channel CSV to DM32 format")
+    parser.add_argument("input", nargs="?", default="gd88channel.csv", help="GD88 channel CSV (default: gd88channel.csv)")
+    parser.add_argument("output", nargs="?", default="output.csv", help="Output CSV file (default: output.csv)")
+    parser.add_argument("--chunksize", type=int, help="Stream the conversion in batches of this many rows")
+    parser.add_argument("--incremental", action="store_true", help="Only reconvert rows that changed since the last --incremental run")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    with profiling.profiled(args, [args.input], [args.output]):
+        if args.incremental:
+            count, converted = convert_gd88_to_dm32_incremental(args.input, args.output)
+            print(f"Wrote {count} channels to '{args.output}' ({converted} reconverted)")
+        elif args.chunksize:
+            count = convert_gd88_to_dm32_chunked(args.input, args.output, args.chunksize)
+            print(f"Wrote {count} channels to '{args.output}'")
+        else:
+            # Convert the data
+            converted_df = convert_gd88_to_dm32(args.input, "dm32channel.csv")
 
-# Save the converted data to a CSV file
-converted_df.to_csv(output_file, index=False)
+            # Save the converted data to a CSV file
+            with profiling.stage("to_csv", len(converted_df)):
+                converted_df.to_csv(args.output, index=False)
 
-# Display the first 3 rows of the converted data
-print(converted_df.head(3))
+            # Display the first 3 rows of the converted data
+            print(converted_df.head(3))
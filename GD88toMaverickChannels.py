@@ -1,5 +1,13 @@
+import argparse
 import csv
+from collections import Counter
 from pathlib import Path
+from types import SimpleNamespace
+
+import profiling
+from channel_engine import GD88Columns, MaverickWriter, convert, read_gd88
+from incremental import convert_incremental, file_stamp
+from talkgroup_index import load_talkgroups
 
 GD88_FILE = Path("gd88.csv")
 MAV_WORKING_FILE = Path("maverick_working_copy.csv")
@@ -7,71 +15,52 @@ TG_FILE = Path("talkgroups.CSV")
 OUTPUT_FILE = Path("maverick_from_gd88_final.csv")
 
 
-def hz_to_mhz(val: str) -> str:
-    if not val:
-        return ""
-    s = str(val).strip()
-    try:
-        f = float(s)
-        if f > 1000:
-            f = f / 1_000_000.0
-        return f"{f:.5f}"
-    except ValueError:
-        return s
-
-
-def load_tg_mapping(tg_file: Path):
-    """Load talkgroups.CSV into {name: radio_id} dict for lookup."""
-    mapping = {}
-    with tg_file.open("r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            name = (row.get("Name") or "").strip()
-            radio_id = row.get("Radio ID", "").strip()
-            if name and radio_id:
-                mapping[name] = radio_id
-    print(f"Loaded {len(mapping)} talkgroups: {list(mapping.keys())[:5]}...")
-    return mapping
+LOG_LEVELS = ("quiet", "summary", "verbose")
 
 
-def map_channel_type(gd_type: str, template_type: str) -> str:
-    if not gd_type:
-        return template_type
-    t = gd_type.strip().upper()
-    if "ANALOG" in t:
-        return "A-Analog"
-    if "DIGITAL" in t:
-        return "D-Digital"
-    return template_type
+def load_tg_mapping(tg_file: Path, verbose: bool = True):
+    """Load talkgroups.CSV into {name: radio_id} dict for lookup.
+
+    The parsed table is cached next to the CSV (see talkgroup_index) and
+    only re-parsed when the CSV changes.
+    """
+    mapping = load_talkgroups(tg_file).by_name
+    if verbose:
+        print(f"Loaded {len(mapping)} talkgroups: {list(mapping.keys())[:5]}...")
+    return mapping
 
 
-def slot_from_gd88(row: dict, default_slot: str) -> str:
-    for key in ("CCTX", "TSTX", "TS TX", "TS"):
-        if key in row and row[key]:
-            ts = row[key].strip().upper()
-            if ts.startswith("TS"):
-                return ts[2:]
-            return ts
-    return default_slot
+def contact_report(writer: MaverickWriter, log_level: str = "summary", top: int = 10):
+    """Lines describing how a MaverickWriter's contacts were matched to talkgroups.
 
+    "summary" gives the totals and the most common unknown contacts,
+    "verbose" lists every mapped and unknown contact, "quiet" gives nothing.
+    """
+    if log_level == "quiet":
+        return []
 
-def color_code_from_gd88(row: dict, default_cc: str) -> str:
-    for key in ("CC", "CC TX", "CCTX"):
-        if key in row and row[key]:
-            return row[key].strip()
-    return default_cc
+    mapped = sum(writer.mapped.values())
+    unknown = sum(writer.unknown.values())
+    unknown_contacts = writer.unknown.most_common(None if log_level == "verbose" else top)
+    line = f"{mapped} mapped, {unknown} unknown contacts"
+    if log_level != "verbose" and len(writer.unknown) > top:
+        line += f" (top {top} listed)"
+    lines = [line]
 
+    if log_level == "verbose":
+        for contact, hits in writer.mapped.most_common():
+            lines.append(f"Mapped '{contact}' -> TG {writer.tg_mapping[contact]} ({hits} channels)")
+    for contact, hits in unknown_contacts:
+        lines.append(f"WARNING: '{contact}' not found in talkgroups.CSV ({hits} channels)")
+    return lines
 
-def main():
-    print("1. Loading talkgroups.CSV...")
-    tg_mapping = load_tg_mapping(TG_FILE)
 
-    print("2. Loading Maverick working file...")
-    if not MAV_WORKING_FILE.exists():
-        print(f"ERROR: {MAV_WORKING_FILE} not found.")
-        return
+def load_maverick_templates(working_file: Path):
+    """Read the Maverick working copy; return (header, digital_template, analog_template).
 
-    with MAV_WORKING_FILE.open("r", encoding="utf-8-sig", newline="") as f:
+    A template is None if the working copy has no channel of that type.
+    """
+    with working_file.open("r", encoding="utf-8-sig", newline="") as f:
         mreader = csv.DictReader(f)
         header = mreader.fieldnames
         working_rows = list(mreader)
@@ -84,90 +73,132 @@ def main():
         (r for r in working_rows if (r.get("Channel Type") or "").startswith("A")),
         None,
     )
+    return header, digital_template, analog_template
+
+
+def _write_incremental(gd88_file: Path, working_file: Path, tg_file: Path, output_file: Path, writer_args):
+    """Incremental version of the conversion step; returns (writer, rows_written, rows_converted)."""
+    lines = []
+    # MaverickWriter issues one write() per row, so each output line lands in `lines` on its own
+    writer = MaverickWriter(SimpleNamespace(write=lines.append), *writer_args)
+    header_text = lines.pop()
+
+    def render(header, changed, new_number):
+        columns = GD88Columns(header)
+        rendered = []
+        for _, row, number in changed:
+            channel = columns.channel(columns.pad(row))
+            if not channel.name:  # the writer skips unnamed channels without using a number
+                rendered.append((None, None))
+                continue
+            writer.number = number if number is not None else new_number()
+            writer.write(channel)
+            rendered.append((writer.number - 1, lines.pop()))
+        return rendered
+
+    rows_written, converted = convert_incremental(
+        gd88_file, output_file, header_text, render,
+        context=("maverick", file_stamp(working_file), file_stamp(tg_file)),
+        start_number=writer.number, encoding="utf-8-sig",
+        namer=lambda header: GD88Columns(header).name)
+    return writer, rows_written, converted
+
+
+def _write_planned(gd88_file: Path, output_file: Path, writer_args):
+    """Planned version of the conversion step (see channel_planner.py); returns (writer totals, rows_written, report)."""
+    from channel_planner import CAPACITIES, plan_channels, plan_report, write_plan
+
+    capacity = CAPACITIES["maverick"]
+    writers = []
+
+    def make_writer(outfile):
+        writers.append(MaverickWriter(outfile, *writer_args, start_number=capacity.first_number))
+        return writers[-1]
+
+    # Scan list names are kept, so a plan that fits writes the same file as a plain run
+    results = write_plan(plan_channels(read_gd88(gd88_file), capacity, continue_scan_lists=False), output_file,
+                         make_writer, encoding="utf-8-sig", lists_if_split=True)
+    # contact_report only needs the lookup counts, summed over every file
+    totals = SimpleNamespace(mapped=sum((w.mapped for w in writers), Counter()),
+                             unknown=sum((w.unknown for w in writers), Counter()),
+                             tg_mapping=writer_args[-1])
+    return totals, sum(w.count for w in writers), plan_report(results)
+
+
+def convert_gd88_to_maverick(gd88_file: Path = GD88_FILE, working_file: Path = MAV_WORKING_FILE,
+                             tg_file: Path = TG_FILE, output_file: Path = OUTPUT_FILE,
+                             log_level: str = "summary", incremental: bool = False, plan: bool = False):
+    """Convert GD88 channels to Maverick format. Returns the number of channels written, or None on error.
+
+    With `incremental`, only rows changed since the last incremental run are
+    converted (and counted in the contact report); the rest are copied from
+    the manifest next to the output with their "No." unchanged.
+    With `plan`, channels are given unique names and split over several files,
+    each with its zone and scan list files, to fit the radio (see
+    channel_planner.py). Scan list names are kept; a plan that splits nothing
+    writes only the channel file.
+    """
+    gd88_file, working_file, tg_file, output_file = map(Path, (gd88_file, working_file, tg_file, output_file))
+
+    # Progress goes to a no-op in quiet mode; errors are always printed
+    info = print if log_level != "quiet" else (lambda *args: None)
+
+    info(f"1. Loading {tg_file.name}...")
+    with profiling.stage("load talkgroups"):
+        tg_mapping = load_tg_mapping(tg_file, verbose=log_level != "quiet")
+
+    info("2. Loading Maverick working file...")
+    if not working_file.exists():
+        print(f"ERROR: {working_file} not found.")
+        return None
+
+    with profiling.stage("load templates"):
+        header, digital_template, analog_template = load_maverick_templates(working_file)
 
     if digital_template is None or analog_template is None:
         print("ERROR: Missing digital/analog template rows.")
-        return
-
-    print("3. Converting GD88 channels...")
-    if not GD88_FILE.exists():
-        print(f"ERROR: {GD88_FILE} not found.")
-        return
-
-    with GD88_FILE.open("r", encoding="utf-8-sig", newline="") as src, \
-         OUTPUT_FILE.open("w", encoding="utf-8-sig", newline="") as dst:
-
-        gd_reader = csv.DictReader(src)
-        writer = csv.DictWriter(dst, fieldnames=header)
-        writer.writeheader()
-
-        next_no = 1000  # Adjust if needed to avoid existing channels
-        rows_written = 0
-
-        for gd_row in gd_reader:
-            if not any(gd_row.values()):
-                continue
-
-            # === ADJUST THESE GD88 FIELD NAMES TO MATCH YOUR HEADER ===
-            gd_name = (
-                gd_row.get("Name")
-                or gd_row.get("CH Name")
-                or gd_row.get("NameRX")
-                or ""
-            ).strip()
-            if not gd_name:
-                continue
-
-            gd_rx = gd_row.get("RX Freq") or ""
-            gd_tx = gd_row.get("TX Freq") or ""
-            gd_type = gd_row.get("Type") or ""
-            gd_contact = (
-                gd_row.get("Contact Name")
-                or gd_row.get("Contact NameRX Group Name")
-                or ""
-            ).strip()
-
-            is_digital = "DIGITAL" in gd_type.upper()
-            template = digital_template if is_digital else analog_template
-
-            out = dict(template)
-
-            # Core channel fields
-            out["No."] = str(next_no)
-            next_no += 1
-            out["Channel Name"] = gd_name[:16]
-            out["Receive Frequency"] = hz_to_mhz(gd_rx)
-            out["Transmit Frequency"] = hz_to_mhz(gd_tx)
-            out["Channel Type"] = map_channel_type(gd_type, template.get("Channel Type", ""))
-
-            # Contact/TG lookup using talkgroups.CSV
-            if gd_contact and gd_contact in tg_mapping:
-                out["Contact/TG"] = gd_contact[:16]
-                out["Contact/TG TG/DMR ID"] = tg_mapping[gd_contact]
-                print(f"Mapped '{gd_contact}' -> TG {tg_mapping[gd_contact]}")
-            elif gd_contact:
-                print(f"WARNING: '{gd_contact}' not found in talkgroups.CSV")
-
-            # DMR-specific fields
-            if is_digital:
-                out["Slot"] = slot_from_gd88(gd_row, template.get("Slot", "1"))
-                out["RX Color Code"] = color_code_from_gd88(gd_row, template.get("RX Color Code", "1"))
-
-            # Optional fields
-            gd_scan = gd_row.get("Scan List Name") or ""
-            if gd_scan:
-                out["Scan List"] = gd_scan[:16]
-
-            gd_rxgrp = gd_row.get("RX Group Name") or ""
-            if gd_rxgrp:
-                out["Receive Group List"] = gd_rxgrp[:16]
-
-            writer.writerow(out)
-            rows_written += 1
-
-    print(f"✅ SUCCESS: Wrote {rows_written} channels to {OUTPUT_FILE.resolve()}")
-    print("CPS Import: Tools → Import → Channels → maverick_from_gd88_final.csv")
+        return None
+
+    info("3. Converting GD88 channels...")
+    if not gd88_file.exists():
+        print(f"ERROR: {gd88_file} not found.")
+        return None
+
+    if incremental:
+        writer, rows_written, converted = _write_incremental(
+            gd88_file, working_file, tg_file, output_file, (header, digital_template, analog_template, tg_mapping))
+        info(f"Reconverted {converted} changed rows; the rest were unchanged since the last run.")
+    elif plan:
+        writer, rows_written, lines = _write_planned(
+            gd88_file, output_file, (header, digital_template, analog_template, tg_mapping))
+        info("\n".join(lines))
+    else:
+        with output_file.open("w", encoding="utf-8-sig", newline="") as dst:
+            writer = MaverickWriter(dst, header, digital_template, analog_template, tg_mapping)
+            convert(read_gd88(gd88_file), [writer])
+            rows_written = writer.count
+
+    report = contact_report(writer, log_level)
+    if report:
+        print("\n".join(report))
+    info(f"✅ SUCCESS: Wrote {rows_written} channels to {output_file.resolve()}")
+    info(f"CPS Import: Tools → Import → Channels → {output_file.name}")
+    return rows_written
+
+
+def main(log_level: str = "summary", incremental: bool = False, plan: bool = False):
+    convert_gd88_to_maverick(log_level=log_level, incremental=incremental, plan=plan)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Convert GD88 channels to Maverick format using a working copy as template")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="summary",
+                        help="quiet: errors only; summary: totals and top unknown contacts (default); verbose: every contact")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only reconvert rows that changed since the last --incremental run")
+    parser.add_argument("--plan", action="store_true",
+                        help="Fit the radio: pack zones and scan lists, make names unique, split files at capacity")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    with profiling.profiled(args, [GD88_FILE, MAV_WORKING_FILE, TG_FILE], [OUTPUT_FILE]):
+        main(args.log_level, args.incremental, args.plan)
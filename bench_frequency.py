@@ -0,0 +1,129 @@
+## EXAMPLE USE
+## python bench_frequency.py --samples 200000 --distinct 2000
+## Checks the integer-Hz frequency functions against the float-based code
+## they replaced on seeded random frequencies, then prints calls/sec for
+## each, both on all-distinct values and on a column drawn from --distinct
+## frequencies (as in a real export). Exits non-zero if any check fails.
+
+import argparse
+import random
+import sys
+import time
+
+from frequency import format_mhz, parse_hz, parse_mhz
+
+
+def clear_caches():
+    parse_mhz.cache_clear()
+    parse_hz.cache_clear()
+    format_mhz.cache_clear()
+
+
+# --- The float-based versions, kept here as the reference ------------------
+
+def float_parse_hz(text):
+    if not text:
+        return None
+    try:
+        f = float(str(text).strip())
+    except ValueError:
+        return None
+    if f > 1000:
+        return int(round(f))
+    return int(round(f * 1_000_000))
+
+
+def float_freq_to_hz(freq_str):
+    try:
+        return str(int(float(freq_str) * 1_000_000))
+    except ValueError:
+        return "0"
+
+
+def float_format_mhz(hz):
+    if hz is None:
+        return ""
+    return f"{hz / 1e6:.5f}"
+
+
+# --- Checks -----------------------------------------------------------------
+
+def run_checks(rng, samples):
+    """Return a list of (check, failures, samples) tuples."""
+    results = []
+
+    def check(name, cases, ok):
+        failures = sum(1 for case in cases if not ok(case))
+        results.append((name, failures, len(cases)))
+
+    # 100 kHz - 1.3 GHz on a 1 Hz grid, and on the 1.25 kHz channel raster
+    any_hz = [rng.randrange(100_000, 1_300_000_000) for _ in range(samples)]
+    raster_hz = [rng.randrange(80, 1_040_000) * 1250 for _ in range(samples)]
+
+    check("parse_mhz exact on 6-decimal MHz", any_hz,
+          lambda hz: parse_mhz(f"{hz // 1_000_000}.{hz % 1_000_000:06d}") == hz)
+    check("parse_mhz(format_mhz(hz, 6)) round trip", any_hz,
+          lambda hz: parse_mhz(format_mhz(hz, 6)) == hz)
+    check("parse_hz matches float parse_hz (MHz text)", raster_hz,
+          lambda hz: parse_hz(f"{hz / 1e6:.6f}") == float_parse_hz(f"{hz / 1e6:.6f}"))
+    check("parse_hz matches float parse_hz (Hz text)", any_hz,
+          lambda hz: parse_hz(str(hz)) == float_parse_hz(str(hz)))
+    # Exact ties (a 5 in the 1 Hz place) are rounded on the binary float before; skip them
+    check("format_mhz matches float format_mhz", [hz for hz in any_hz if hz % 10 != 5],
+          lambda hz: format_mhz(hz) == float_format_mhz(hz))
+    check("format_mhz matches float format_mhz (raster)", raster_hz,
+          lambda hz: format_mhz(hz) == float_format_mhz(hz))
+    check("parse_mhz never truncates", raster_hz,
+          lambda hz: parse_mhz(f"{hz / 1e6:.6f}") == hz)
+
+    truncated = sum(1 for hz in raster_hz if float_freq_to_hz(f"{hz / 1e6:.6f}") != str(hz))
+    return results, truncated, len(raster_hz)
+
+
+def calls_per_sec(func, values, repeat=3):
+    best = None
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        for value in values:
+            func(value)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(values) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark the integer-Hz frequency functions")
+    parser.add_argument("--samples", type=int, default=100000, help="Random frequencies per check (default: 100000)")
+    parser.add_argument("--distinct", type=int, default=2000, help="Distinct frequencies in the repeating column (default: 2000)")
+    parser.add_argument("--seed", type=int, default=88, help="Random seed (default: 88)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results, truncated, raster = run_checks(rng, args.samples)
+    failed = False
+    for name, failures, count in results:
+        print(f"{'ok  ' if not failures else 'FAIL'} {name}: {count - failures}/{count}")
+        failed = failed or failures
+    print(f"     float freq_to_hz truncated {truncated}/{raster} raster frequencies (now exact)")
+
+    unique_hz = [rng.randrange(80, 1_040_000) * 1250 for _ in range(args.samples)]
+    pool = unique_hz[:args.distinct]
+    columns = (("distinct", unique_hz), (f"{args.distinct} repeating", [rng.choice(pool) for _ in unique_hz]))
+    for label, column_hz in columns:
+        mhz_text = [f"{hz / 1e6:.6f}" for hz in column_hz]
+        print(f"\n{len(column_hz)} values, {label}")
+        for name, old, new, values in (
+            ("parse MHz text", float_parse_hz, parse_hz, mhz_text),
+            ("FT3 freq_to_hz", lambda s: int(float_freq_to_hz(s)), parse_mhz, mhz_text),
+            ("format MHz", float_format_mhz, format_mhz, column_hz),
+        ):
+            old_rate = calls_per_sec(old, values)
+            new_rate = calls_per_sec(new, values)
+            print(f"{name:>15}: float {old_rate:12,.0f}/s  integer {new_rate:12,.0f}/s  ({new_rate / old_rate:.2f}x)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
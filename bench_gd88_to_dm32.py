@@ -0,0 +1,102 @@
+## EXAMPLE USE
+## python bench_gd88_to_dm32.py --rows 50000
+## Generates a synthetic GD88 channel export, converts it with both the
+## vectorized engine and the original script's iterrows loop, checks the
+## CSV output is identical apart from the intended differences (see
+## intended_differences) and prints rows/sec for each. Some fields in the
+## middle of the export are blanked, and the chunked converter's output is
+## checked against the full conversion as well, since pandas types each
+## chunk on its own.
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+from GD88toDB32channels import (DM32_COLUMNS, convert_gd88_to_dm32, convert_gd88_to_dm32_chunked,
+                                convert_gd88_to_dm32_iterrows)
+from synthetic_data import write_gd88_channels
+
+
+# Blanked in a run of rows halfway through the export
+BLANK_COLUMNS = ("RX CC", "TX CC", "Bandwidth", "RX Tone")
+
+
+def blank_middle_rows(gd88_file, count):
+    """Blank BLANK_COLUMNS in `count` rows halfway through a GD88 export."""
+    with open(gd88_file, newline="") as f:
+        rows = list(csv.reader(f))
+    positions = [rows[0].index(name) for name in BLANK_COLUMNS]
+    middle = len(rows) // 2
+    for row in rows[middle:middle + count]:
+        for i in positions:
+            row[i] = ""
+    with open(gd88_file, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def intended_differences(reference_df):
+    """The original loop's output with the vectorized engine's intended differences applied:
+    columns in radio_formats order ("CTC/DCS Decode" before "CTC/DCS Encode") and color
+    codes written as read ("1", not the "1.0" of a column pandas read as floats)."""
+    import pandas as pd
+
+    df = reference_df[DM32_COLUMNS].copy()
+    codes = [int(v) if isinstance(v, float) and v.is_integer() else v for v in df["Color Code"]]
+    df["Color Code"] = pd.Series(codes, index=df.index, dtype=object)
+    return df
+
+
+def time_engine(func, gd88_file, out_file):
+    """Convert and write out_file; returns the seconds taken and the DataFrame."""
+    start = time.perf_counter()
+    df = func(gd88_file, None)
+    df.to_csv(out_file, index=False)
+    return time.perf_counter() - start, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GD88 to DM32 conversion engines")
+    parser.add_argument("--rows", type=int, default=20000, help="Number of synthetic channels (default: 20000)")
+    parser.add_argument("--seed", type=int, default=88, help="Random seed for the synthetic export")
+    parser.add_argument("--chunksize", type=int, help="Rows per chunk for the chunked check (default: a quarter of --rows)")
+    args = parser.parse_args()
+    chunksize = args.chunksize or max(1, args.rows // 4)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gd88_file = os.path.join(tmp, "gd88.csv")
+        write_gd88_channels(gd88_file, args.rows, args.seed)
+        blank_middle_rows(gd88_file, max(1, args.rows // 100))
+
+        results = {}
+        outputs = {}
+        for name, func in (("iterrows", convert_gd88_to_dm32_iterrows), ("vectorized", convert_gd88_to_dm32)):
+            out_file = os.path.join(tmp, f"{name}.csv")
+            results[name], df = time_engine(func, gd88_file, out_file)
+            if func is convert_gd88_to_dm32_iterrows:
+                intended_differences(df).to_csv(out_file, index=False)
+            with open(out_file, "rb") as f:
+                outputs[name] = f.read()
+
+        chunked_file = os.path.join(tmp, "chunked.csv")
+        convert_gd88_to_dm32_chunked(gd88_file, chunked_file, chunksize)
+        with open(chunked_file, "rb") as f:
+            outputs["chunked"] = f.read()
+
+    for name, elapsed in results.items():
+        print(f"{name:>10}: {args.rows / elapsed:12,.0f} rows/sec ({elapsed:.3f}s)")
+    print(f"   speedup: {results['iterrows'] / results['vectorized']:.1f}x")
+
+    if outputs["iterrows"] != outputs["vectorized"]:
+        print("ERROR: vectorized output differs from the original iterrows output.", file=sys.stderr)
+        sys.exit(1)
+    if outputs["chunked"] != outputs["vectorized"]:
+        print(f"ERROR: chunked output (chunks of {chunksize}) differs from the full conversion.", file=sys.stderr)
+        sys.exit(1)
+    print("Outputs match the original loop, apart from the intended differences, and chunked output is byte-identical.")
+
+
+if __name__ == "__main__":
+    main()
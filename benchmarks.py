@@ -0,0 +1,379 @@
+## Throughput benchmarks for every converter.
+## Each benchmark runs in a fresh process on a seeded synthetic export.
+## The converter itself is timed end to end first (rows/sec and peak RSS),
+## then parse, map and write are timed as separate stages. Results are
+## written as JSON so runs can be compared over time.
+##
+## EXAMPLE USE
+## python benchmarks.py --rows 100000 --output bench.json
+## python benchmarks.py --rows 10000 --only chirp-dm32 ft3-uvpro
+## python benchmarks.py --rows 200000 --only ft3-uvpro ft3-uvpro-mmap   (csv.reader vs memory-mapped input)
+## python benchmarks.py --rows 200000 --only gd88-rt3 gd88-rt3-cached   (parsing vs loading the columnar cache)
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import synthetic_data
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class StageTimer:
+    """Collects wall-clock seconds, and peak RSS at the end, per named stage."""
+
+    def __init__(self):
+        self.stages = {}
+        self.peak_rss_kb = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            self.peak_rss_kb[name] = peak_rss_kb()
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _write_rows(path, headers, rows, **open_kwargs):
+    with open(path, "w", newline="", **open_kwargs) as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+
+
+def bench_chirp_dm32(workdir, rows, seed, timer):
+    from channel_engine import dm32_row, read_chirp
+    from CHIRPtoDB32channels import DM32_HEADERS, convert_tidradio_to_dm32
+
+    src = os.path.join(workdir, "chirp.csv")
+    synthetic_data.write_chirp(src, rows, seed)
+
+    with timer.stage("total"):
+        convert_tidradio_to_dm32(src, os.path.join(workdir, "dm32.csv"))
+
+    with timer.stage("parse"):
+        channels = list(read_chirp(src))
+    with timer.stage("map"):
+        out_rows = [dm32_row(channel, i) for i, channel in enumerate(channels, start=1)]
+    with timer.stage("write"):
+        _write_rows(os.path.join(workdir, "staged.csv"), DM32_HEADERS, out_rows)
+    del channels, out_rows
+
+    return rows
+
+
+def bench_gd88_rt3(workdir, rows, seed, timer):
+    from channel_engine import read_gd88, rt3_row
+    from GD88ChannelsToRT3 import convert_try_to_rt3s
+    from radio_formats import RT3_CHANNELS
+
+    src = os.path.join(workdir, "gd88.csv")
+    synthetic_data.write_gd88_channels(src, rows, seed)
+
+    with timer.stage("total"):
+        convert_try_to_rt3s(src, os.path.join(workdir, "rt3.csv"))
+
+    with timer.stage("parse"):
+        channels = list(read_gd88(src))
+    with timer.stage("map"):
+        out_rows = [rt3_row(channel) for channel in channels]
+    with timer.stage("write"):
+        _write_rows(os.path.join(workdir, "staged.csv"), RT3_CHANNELS.headers, out_rows)
+    del channels, out_rows
+
+    return rows
+
+
+def bench_gd88_dm32(workdir, rows, seed, timer):
+    import pandas as pd
+    from GD88toDB32channels import GD88_DTYPE, convert_gd88_to_dm32, gd88_frame_to_dm32
+
+    src = os.path.join(workdir, "gd88.csv")
+    synthetic_data.write_gd88_channels(src, rows, seed)
+
+    with timer.stage("total"):
+        convert_gd88_to_dm32(src, None).to_csv(os.path.join(workdir, "dm32.csv"), index=False)
+
+    with timer.stage("parse"):
+        gd88_df = pd.read_csv(src, dtype=GD88_DTYPE)
+    with timer.stage("map"):
+        dm32_df = gd88_frame_to_dm32(gd88_df)
+    with timer.stage("write"):
+        dm32_df.to_csv(os.path.join(workdir, "staged.csv"), index=False)
+    del gd88_df, dm32_df
+
+    return rows
+
+
+def bench_gd88_maverick(workdir, rows, seed, timer):
+    from channel_engine import MaverickWriter, read_gd88
+    import GD88toMaverickChannels as maverick
+
+    synthetic_data.write_gd88_channels(os.path.join(workdir, maverick.GD88_FILE), rows, seed)
+    synthetic_data.write_talkgroups(os.path.join(workdir, maverick.TG_FILE))
+    synthetic_data.write_maverick_template(os.path.join(workdir, maverick.MAV_WORKING_FILE))
+
+    os.chdir(workdir)
+    header, digital_template, analog_template = maverick.load_maverick_templates(maverick.MAV_WORKING_FILE)
+    tg_mapping = maverick.load_tg_mapping(maverick.TG_FILE, verbose=False)
+
+    with timer.stage("total"), contextlib.redirect_stdout(io.StringIO()):
+        maverick.main("quiet")
+
+    with timer.stage("parse"):
+        channels = list(read_gd88(maverick.GD88_FILE))
+    buffer = io.StringIO()
+    with timer.stage("map"):
+        writer = MaverickWriter(buffer, header, digital_template, analog_template, tg_mapping)
+        for channel in channels:
+            writer.write(channel)
+    with timer.stage("write"):
+        with open("staged.csv", "w", newline="", encoding="utf-8-sig") as f:
+            f.write(buffer.getvalue())
+    del channels, buffer, writer
+
+    return rows
+
+
+def bench_ft3_uvpro(workdir, rows, seed, timer):
+    from channel_engine import read_ft3, uvpro_row
+    import ft3_to_uvpro
+    from radio_formats import UV_PRO
+
+    synthetic_data.write_ft3(os.path.join(workdir, "ft3d.csv"), rows, seed)
+    os.chdir(workdir)
+
+    with timer.stage("total"), contextlib.redirect_stdout(io.StringIO()):
+        ft3_to_uvpro.main()
+
+    with timer.stage("parse"):
+        channels = list(read_ft3("ft3d.csv"))
+    with timer.stage("map"):
+        out_rows = [uvpro_row(channel) for channel in channels]
+    with timer.stage("write"):
+        _write_rows("staged.csv", UV_PRO.headers, out_rows)
+    del channels, out_rows
+
+    return rows
+
+
+def bench_gd88_contacts_rt3(workdir, rows, seed, timer):
+    from GD88ContactsToRT3 import call_type_map, convert_gd88_contacts_to_rt3
+    from radio_formats import RT3_CONTACTS
+
+    src = os.path.join(workdir, "contacts.csv")
+    synthetic_data.write_gd88_contacts(src, rows, seed)
+
+    with timer.stage("total"):
+        convert_gd88_contacts_to_rt3(src, os.path.join(workdir, "rt3contacts.csv"))
+
+    with timer.stage("parse"):
+        with open(src, newline="", encoding="utf-8") as f:
+            contacts = list(csv.DictReader(f))
+    with timer.stage("map"):
+        out_rows = [(row["Name"].strip(), call_type_map.get(row["Type"].strip(), "1"), row["DMR ID"].strip(), "0")
+                    for row in contacts]
+    with timer.stage("write"):
+        _write_rows(os.path.join(workdir, "staged.csv"), RT3_CONTACTS.headers, out_rows, encoding="utf-8")
+    del contacts, out_rows
+
+    return rows
+
+
+def bench_gd88_contacts_rt3_stream(workdir, rows, seed, timer):
+    from GD88ContactsToRT3 import convert_gd88_contacts_streaming
+
+    src = os.path.join(workdir, "contacts.csv")
+    synthetic_data.write_gd88_contacts(src, rows, seed)
+
+    with timer.stage("total"):
+        count, _ = convert_gd88_contacts_streaming(src, os.path.join(workdir, "rt3contacts.csv"))
+
+    return count
+
+
+def bench_chirp_dm32_mmap(workdir, rows, seed, timer):
+    from CHIRPtoDB32channels import convert_tidradio_to_dm32
+
+    src = os.path.join(workdir, "chirp.csv")
+    synthetic_data.write_chirp(src, rows, seed)
+
+    with timer.stage("total"):
+        convert_tidradio_to_dm32(src, os.path.join(workdir, "dm32.csv"), mapped=True)
+
+    return rows
+
+
+def bench_gd88_rt3_mmap(workdir, rows, seed, timer):
+    from GD88ChannelsToRT3 import convert_try_to_rt3s
+
+    src = os.path.join(workdir, "gd88.csv")
+    synthetic_data.write_gd88_channels(src, rows, seed)
+
+    with timer.stage("total"):
+        convert_try_to_rt3s(src, os.path.join(workdir, "rt3.csv"), mapped=True)
+
+    return rows
+
+
+def bench_ft3_uvpro_mmap(workdir, rows, seed, timer):
+    from ft3_to_uvpro import convert_ft3_to_uvpro
+
+    src = os.path.join(workdir, "ft3d.csv")
+    synthetic_data.write_ft3(src, rows, seed)
+
+    with timer.stage("total"):
+        convert_ft3_to_uvpro(src, os.path.join(workdir, "channels_out.csv"), mapped=True)
+
+    return rows
+
+
+def bench_gd88_rt3_plan(workdir, rows, seed, timer):
+    from channel_engine import RT3Writer, read_gd88
+    from channel_planner import CAPACITIES, plan_channels, write_plan
+
+    src = os.path.join(workdir, "gd88.csv")
+    synthetic_data.write_gd88_channels(src, rows, seed)
+
+    with timer.stage("total"):
+        write_plan(plan_channels(read_gd88(src), CAPACITIES["rt3"]), os.path.join(workdir, "plug.csv"), RT3Writer)
+
+    return rows
+
+
+def bench_gd88_rt3_cached(workdir, rows, seed, timer):
+    from GD88ChannelsToRT3 import convert_try_to_rt3s
+
+    src = os.path.join(workdir, "gd88.csv")
+    synthetic_data.write_gd88_channels(src, rows, seed)
+
+    # Built in a child process so peak RSS is that of the cached conversion alone
+    with timer.stage("build cache"):
+        subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "channel_cache.py"),
+                        "gd88", src], check=True, stdout=subprocess.DEVNULL)
+    with timer.stage("total"):
+        convert_try_to_rt3s(src, os.path.join(workdir, "rt3.csv"), cache=True)
+
+    return rows
+
+
+def bench_gd88_rt3_pipeline(workdir, rows, seed, timer):
+    from GD88ChannelsToRT3 import convert_try_to_rt3s
+
+    src = os.path.join(workdir, "gd88.csv")
+    synthetic_data.write_gd88_channels(src, rows, seed)
+
+    with timer.stage("total"):
+        convert_try_to_rt3s(src, os.path.join(workdir, "rt3.csv"), pipelined=True, workers=os.cpu_count())
+
+    return rows
+
+
+BENCHMARKS = {
+    "chirp-dm32": bench_chirp_dm32,
+    "gd88-rt3": bench_gd88_rt3,
+    "gd88-dm32": bench_gd88_dm32,
+    "gd88-maverick": bench_gd88_maverick,
+    "ft3-uvpro": bench_ft3_uvpro,
+    "gd88-contacts-rt3": bench_gd88_contacts_rt3,
+    "gd88-contacts-rt3-stream": bench_gd88_contacts_rt3_stream,
+    "chirp-dm32-mmap": bench_chirp_dm32_mmap,
+    "gd88-rt3-mmap": bench_gd88_rt3_mmap,
+    "ft3-uvpro-mmap": bench_ft3_uvpro_mmap,
+    "gd88-rt3-plan": bench_gd88_rt3_plan,
+    "gd88-rt3-cached": bench_gd88_rt3_cached,
+    "gd88-rt3-pipeline": bench_gd88_rt3_pipeline,
+}
+
+
+def run_benchmark(name, rows, seed):
+    """Run one benchmark in the current process and return its result record."""
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        try:
+            count = BENCHMARKS[name](workdir, rows, seed, timer)
+        finally:
+            os.chdir(cwd)
+    total = timer.stages.pop("total")
+    return {
+        "converter": name,
+        "rows": count,
+        "seconds": round(total, 6),
+        "rows_per_sec": round(count / total, 1) if total else None,
+        "peak_rss_kb": timer.peak_rss_kb["total"],
+        "stages": {stage: round(seconds, 6) for stage, seconds in timer.stages.items()},
+    }
+
+
+def run_all(names, rows, seed):
+    """Run each benchmark in its own fresh process so peak RSS is per converter."""
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            try:
+                results.append(pool.submit(run_benchmark, name, rows, seed).result())
+            except Exception as e:
+                results.append({"converter": name, "rows": rows, "error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every converter on synthetic data")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per synthetic export (default: 10000)")
+    parser.add_argument("--seed", type=int, default=88, help="Random seed (default: 88)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    names = args.only or list(BENCHMARKS)
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "seed": args.seed,
+        "results": run_all(names, args.rows, args.seed),
+    }
+
+    for result in report["results"]:
+        if "error" in result:
+            print(f"{result['converter']:>24}: ERROR {result['error']}")
+            continue
+        stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in result["stages"].items())
+        rss = f"{result['peak_rss_kb'] / 1024:.0f} MiB" if result["peak_rss_kb"] else "n/a"
+        print(f"{result['converter']:>24}: {result['rows_per_sec']:>12,.0f} rows/sec  "
+              f"peak RSS {rss}" + (f"  ({stages})" if stages else ""))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote results to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+## Columnar cache of parsed channel exports.
+## Parsing a large master export on every run is most of a conversion's
+## cost, so the parsed channels can be saved next to the source
+## (master.csv.cache/) as typed NumPy columns: int64 Hz frequencies, small
+## ints for color code, slot and bandwidth, and text fields (mode, power,
+## tones, names, contacts, lists) as integer codes into a table of their
+## distinct values. The columns are memory-mapped when loaded and turned
+## back into Channels a batch at a time, so a repeat conversion neither
+## tokenizes the CSV nor holds the whole export in memory.
+##
+## The cache is keyed on the SHA-256 of the source file and rebuilt
+## automatically when the source changes. NumPy is only needed when a
+## cache is used.
+##
+## EXAMPLE USE
+## python channel_engine.py gd88 master.csv --rt3 rt3.csv --cache
+## python CHIRPtoDB32channels.py h8.csv DM32_converted.csv --cache
+## python channel_cache.py gd88 master.csv            (build or check the cache)
+## python channel_cache.py gd88 master.csv --rebuild
+
+import argparse
+import hashlib
+import marshal
+import os
+import shutil
+import sys
+from operator import attrgetter
+from pathlib import Path
+
+from channel_engine import READERS, Channel, _without
+
+# Bump when the cached layout or any reader's output changes so old caches are rebuilt
+CACHE_VERSION = 2
+
+# Channels rebuilt from the columns at a time
+LOAD_BATCH = 1 << 13
+
+# How each Channel field is stored: "int" columns use -1 for None
+FIELD_TYPES = {
+    "rx_hz": ("int", "int64"),
+    "tx_hz": ("int", "int64"),
+    "bandwidth_hz": ("int", "int32"),
+    "color_code": ("int", "int8"),
+    "slot": ("int", "int8"),
+    "digital": ("bool", "bool"),
+    "skip": ("bool", "bool"),
+}
+# Every other field is text, stored as codes into its table of values
+TEXT_FIELDS = tuple(field for field in Channel.__slots__ if field not in FIELD_TYPES)
+
+
+def default_cache_dir(input_file):
+    input_file = Path(input_file)
+    return input_file.with_name(input_file.name + ".cache")
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _code_dtype(np, count):
+    """Smallest signed integer type holding codes 0..count-1 and -1."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if count < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode(values):
+    """(codes, table) for a text column: each value's position in the table of distinct values, -1 for None."""
+    table = {None: -1}
+    codes = [table.setdefault(value, len(table) - 1) for value in values]
+    del table[None]
+    return codes, list(table)
+
+
+def save_rows(rows, cache_dir, key):
+    """Write channel rows (tuples of the Channel fields, in __slots__ order) to cache_dir as columns.
+
+    Any old cache in cache_dir is replaced.
+    """
+    import numpy as np
+
+    cache_dir = Path(cache_dir)
+    tmp_dir = cache_dir.with_name(cache_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+    tables = {}
+    for field, values in zip(Channel.__slots__, zip(*rows) if rows else [()] * len(Channel.__slots__)):
+        if field in FIELD_TYPES:
+            kind, dtype = FIELD_TYPES[field]
+            if kind == "int":
+                values = [-1 if value is None else value for value in values]
+            column = np.array(values, dtype=dtype)
+        else:
+            codes, tables[field] = _encode(values)
+            column = np.array(codes, dtype=_code_dtype(np, len(tables[field])))
+        np.save(tmp_dir / f"{field}.npy", column)
+    # The key is written last, so a half-written cache never matches
+    with open(tmp_dir / "meta", "wb") as f:
+        marshal.dump((key, len(rows), tables), f)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+
+
+def _load_meta(cache_dir, key):
+    try:
+        with open(Path(cache_dir) / "meta", "rb") as f:
+            cached_key, rows, tables = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return (rows, tables) if cached_key == key else None
+
+
+def load_channels(cache_dir, rows, tables):
+    """Yield the Channels saved in cache_dir, rebuilding LOAD_BATCH at a time from memory-mapped columns."""
+    import numpy as np
+
+    cache_dir = Path(cache_dir)
+    columns = []
+    for field in Channel.__slots__:
+        column = np.load(cache_dir / f"{field}.npy", mmap_mode="r")
+        if field in tables:
+            # Code -1 picks the None after the last value
+            lookup = np.empty(len(tables[field]) + 1, dtype=object)
+            lookup[:-1] = tables[field]
+            columns.append((column, lookup, False))
+        else:
+            columns.append((column, None, FIELD_TYPES[field][0] == "int"))
+
+    for start in range(0, rows, LOAD_BATCH):
+        batch = []
+        for column, lookup, nullable in columns:
+            values = column[start:start + LOAD_BATCH]
+            if lookup is not None:
+                values = lookup[values]
+            elif nullable and (values < 0).any():
+                missing = values < 0
+                values = values.astype(object)
+                values[missing] = None
+            batch.append(values.tolist())
+        for values in zip(*batch):
+            yield Channel(*values)
+
+
+def _read_and_save(source, input_file, cache_dir, key, mapped):
+    # Fields are copied out as each channel is read, as a consumer such as the planner may rename it
+    fields = attrgetter(*Channel.__slots__)
+    rows = []
+    for channel in READERS[source](input_file, mapped=mapped):
+        rows.append(fields(channel))
+        yield channel
+    # Only a source that was read to the end is cached
+    try:
+        save_rows(rows, cache_dir, key)
+    except (OSError, ImportError) as e:
+        print(f"Warning: could not write channel cache '{cache_dir}': {e}", file=sys.stderr)
+
+
+def read_cached(source, input_file, mapped=False, skip_rows=None, cache_dir=None, rebuild=False):
+    """Yield the Channels of a source export, from its columnar cache when it is still valid.
+
+    Otherwise the export is read with its reader (see channel_engine.READERS)
+    and the cache is written once the last row has been read. skip_rows
+    leaves out rows by number as the readers do.
+    """
+    cache_dir = Path(cache_dir) if cache_dir else default_cache_dir(input_file)
+    key = (CACHE_VERSION, source, file_digest(input_file))
+    meta = None if rebuild else _load_meta(cache_dir, key)
+    if meta is not None:
+        channels = load_channels(cache_dir, *meta)
+    else:
+        channels = _read_and_save(source, input_file, cache_dir, key, mapped)
+    return _without(channels, skip_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or check the columnar cache of a channel export")
+    parser.add_argument("source", choices=sorted(READERS), help="Source export format")
+    parser.add_argument("input", help="Input CSV file")
+    parser.add_argument("--cache-dir", help="Cache directory (default: <input>.cache)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore and rewrite the cache")
+    parser.add_argument("--mmap", action="store_true", help="Read the input through a memory map (UTF-8 only)")
+    args = parser.parse_args()
+
+    cache_dir = Path(args.cache_dir) if args.cache_dir else default_cache_dir(args.input)
+    key = (CACHE_VERSION, args.source, file_digest(args.input))
+    meta = None if args.rebuild else _load_meta(cache_dir, key)
+    if meta is not None:
+        print(f"'{cache_dir}' is up to date: {meta[0]} channels")
+        return
+    count = sum(1 for _ in _read_and_save(args.source, args.input, cache_dir, key, args.mmap))
+    size = sum(path.stat().st_size for path in cache_dir.iterdir()) if cache_dir.is_dir() else 0
+    print(f"Cached {count} channels in '{cache_dir}' ({size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error caching channels: {e}", file=sys.stderr)
+        sys.exit(1)
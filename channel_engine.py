@@ -0,0 +1,755 @@
+## Any-to-any channel conversion.
+## Readers parse a source export once into compact Channel records and
+## writers emit any target format from them, so one input can be fanned
+## out to several radios in a single pass.
+##
+## EXAMPLE USE
+## python channel_engine.py gd88 gd88.csv --rt3 rt3.csv --uvpro channels_out.csv
+## python channel_engine.py chirp h8.csv --dm32 dm32.csv --uvpro channels_out.csv
+## python channel_engine.py gd88 master.csv --rt3 rt3.csv --mmap   (memory-mapped input, see mapped_csv.py)
+## python channel_engine.py chirp h8.csv --dm32 dm32.csv --validate problems.csv   (skip bad rows, see validation.py)
+## python channel_engine.py gd88 master.csv --rt3 rt3.csv --cache   (reuse the parsed export, see channel_cache.py)
+## python channel_engine.py gd88 master.csv --rt3 rt3.csv --profile profile.json   (see profiling.py)
+## python channel_engine.py dm32 dm32.csv --chirp h8_back.csv   (back to the source format, see roundtrip.py)
+## python channel_engine.py uvpro channels_out.csv --ft3 ft3d_back.csv
+
+import argparse
+import contextlib
+import csv
+import sys
+from collections import Counter
+
+import profiling
+from decode_tables import (CHIRP_POWER, CHIRP_POWER_TEXT, CODE_POWER, FT3_POWER_TEXT, chirp_tone, ft3_tone,
+                           parse_bandwidth, parse_color_code, parse_slot, parse_tone, power_to_code)
+from frequency import apply_offset, format_mhz, parse_hz, parse_mhz, split_offset
+from mapped_csv import open_table
+from radio_formats import CHIRP, DM32, FT3, RT3_CHANNELS, UV_PRO
+
+# Output files are opened with a large buffer so writers hit the disk in big blocks
+BUFFER_SIZE = 1 << 20
+
+
+class Channel:
+    """One radio channel in a radio-independent form.
+
+    Frequencies are integer Hz. Tones are strings such as "88.5" (CTCSS) or
+    "D023N" (DCS), or None when the channel has no tone. Fields a source
+    doesn't provide are None and writers fall back to their own defaults.
+    """
+
+    __slots__ = ("name", "rx_hz", "tx_hz", "digital", "mode", "power", "bandwidth_hz",
+                 "color_code", "slot", "rx_tone", "tx_tone", "contact", "rx_group",
+                 "scan_list", "skip")
+
+    def __init__(self, name, rx_hz, tx_hz, digital=False, mode=None, power=None,
+                 bandwidth_hz=None, color_code=None, slot=None, rx_tone=None, tx_tone=None,
+                 contact=None, rx_group=None, scan_list=None, skip=False):
+        self.name = name
+        self.rx_hz = rx_hz
+        self.tx_hz = tx_hz
+        self.digital = digital
+        self.mode = mode
+        self.power = power
+        self.bandwidth_hz = bandwidth_hz
+        self.color_code = color_code
+        self.slot = slot
+        self.rx_tone = rx_tone
+        self.tx_tone = tx_tone
+        self.contact = contact
+        self.rx_group = rx_group
+        self.scan_list = scan_list
+        self.skip = skip
+
+    def __repr__(self):
+        return f"Channel({self.name!r}, rx_hz={self.rx_hz}, tx_hz={self.tx_hz}, digital={self.digital})"
+
+
+# --- Field decoding ---------------------------------------------------------
+
+# === ADJUST THESE GD88 FIELD NAMES TO MATCH YOUR HEADER ===
+# Each field is taken from the first of its columns that has a value
+GD88_NAME_COLUMNS = ("Name", "CH Name", "NameRX")
+GD88_SLOT_COLUMNS = ("TX TS", "CCTX", "TSTX", "TS TX", "TS")
+GD88_CC_COLUMNS = ("TX CC", "CC", "CC TX", "CCTX")
+
+# Every GD88 column a channel is built from
+GD88_COLUMNS = GD88_NAME_COLUMNS + GD88_SLOT_COLUMNS + GD88_CC_COLUMNS + (
+    "Contact Name", "Contact NameRX Group Name", "RX Freq", "TX Freq", "Type", "Power", "Bandwidth",
+    "RX Tone", "TX Tone", "RX Group Name", "Scan List Name")
+
+# Columns read from the other sources
+CHIRP_COLUMNS = ("Frequency", "Duplex", "Offset", "Name", "Mode", "Tone", "cToneFreq", "DtcsCode", "DtcsPolarity",
+                 "Power")
+FT3_COLUMNS = ("Tone Mode", "CTCSS", "DCS", "Name", "Receive Frequency", "Transmit Frequency",
+               "Operating Mode", "Tx Power", "Skip")
+DM32_READ_COLUMNS = ("Channel Name", "RX Frequency[MHz]", "TX Frequency[MHz]", "Channel Type", "Power",
+                     "Band Width", "Color Code", "Time Slot", "CTC/DCS Decode", "CTC/DCS Encode",
+                     "TX Contact", "RX Group List", "Scan List")
+UVPRO_READ_COLUMNS = ("title", "tx_freq", "rx_freq", "tx_sub_audio(CTCSS=freq/DCS=number)",
+                      "rx_sub_audio(CTCSS=freq/DCS=number)", "tx_power(H/M/L)", "bandwidth(12500/25000)",
+                      "scan(0=OFF/1=ON)", "rx_modulation(0=FM/1=AM)")
+
+
+def _gd88_slot_text(value):
+    ts = value.strip().upper()
+    if ts.startswith("TS"):
+        return ts[2:]
+    return ts
+
+
+def slot_from_gd88(row, default_slot):
+    """Time slot from the first non-empty GD88 slot column."""
+    for key in GD88_SLOT_COLUMNS:
+        if key in row and row[key]:
+            return _gd88_slot_text(row[key])
+    return default_slot
+
+
+def color_code_from_gd88(row, default_cc):
+    """Color code from the first non-empty GD88 color code column."""
+    for key in GD88_CC_COLUMNS:
+        if key in row and row[key]:
+            return row[key].strip()
+    return default_cc
+
+
+def freq_to_hz(freq_str):
+    """Convert frequency in MHz to Hz as integer string ("0" if invalid)."""
+    return str(parse_mhz(freq_str) or 0)
+
+
+def bandwidth_from_mode(mode_str):
+    """Return bandwidth based on FM/AM mode. Default to 25000."""
+    # If you want to handle narrow FM, modify this function.
+    return "25000"
+
+
+# --- Readers ----------------------------------------------------------------
+
+def open_source(input_file, **kwargs):
+    """Open a source path for reading, or pass an already open text file through unchanged."""
+    if hasattr(input_file, "read"):
+        return contextlib.nullcontext(input_file)
+    return open(input_file, newline="", **kwargs)
+
+
+def header_index(header):
+    """{column: position} for a CSV header; a repeated name maps to its last position, as in csv.DictReader."""
+    return {name: i for i, name in enumerate(header)}
+
+
+class GD88Columns:
+    """Column positions of a GD88 export, resolved once from its header.
+
+    Rows are plain lists (as from csv.reader) or the tuples of a table's
+    rows(). The fallback column names are narrowed down to the ones the
+    header actually has, so a row only looks at columns that exist.
+    """
+
+    def __init__(self, header):
+        index = header_index(header)
+        self.width = len(header)
+
+        def present(*names):
+            return tuple(index[name] for name in names if name in index)
+
+        self.names = present(*GD88_NAME_COLUMNS)
+        self.slots = present(*GD88_SLOT_COLUMNS)
+        self.color_codes = present(*GD88_CC_COLUMNS)
+        self.contact = index.get("Contact Name", index.get("Contact NameRX Group Name"))
+        self.contact_fallback = index.get("Contact NameRX Group Name") if "Contact Name" in index else None
+        (self.rx, self.tx, self.type, self.power, self.bandwidth, self.rx_tone, self.tx_tone,
+         self.rx_group, self.scan_list) = (index.get(name) for name in (
+            "RX Freq", "TX Freq", "Type", "Power", "Bandwidth", "RX Tone", "TX Tone",
+            "RX Group Name", "Scan List Name"))
+
+    def pad(self, row):
+        """Pad a short row with None, as csv.DictReader does for missing fields."""
+        if len(row) < self.width:
+            return row + [None] * (self.width - len(row))
+        return row
+
+    def name(self, row):
+        """Channel name of a row."""
+        for i in self.names:
+            if i < len(row) and row[i]:
+                return row[i].strip()
+        return ""
+
+    def channel(self, row):
+        """Build a Channel from a (padded) GD88 row."""
+        def get(i):
+            return None if i is None else row[i]
+
+        contact = get(self.contact)
+        if contact is None:
+            contact = get(self.contact_fallback)
+        slot = next((row[i] for i in self.slots if row[i]), None)
+        cc = next((row[i] for i in self.color_codes if row[i]), None)
+        return Channel(
+            self.name(row),
+            parse_hz(get(self.rx)),
+            parse_hz(get(self.tx)),
+            digital="DIGITAL" in (get(self.type) or "").upper(),
+            power=get(self.power),
+            bandwidth_hz=parse_bandwidth(get(self.bandwidth)),
+            color_code=None if cc is None else parse_color_code(cc.strip()),
+            slot=None if slot is None else parse_slot(_gd88_slot_text(slot)),
+            rx_tone=parse_tone(get(self.rx_tone)),
+            tx_tone=parse_tone(get(self.tx_tone)),
+            contact=contact,
+            rx_group=get(self.rx_group),
+            scan_list=get(self.scan_list),
+        )
+
+
+def _without(rows, skip_rows):
+    """The rows whose number (1 = first row after the header) isn't in skip_rows."""
+    if not skip_rows:
+        return rows
+    return (row for number, row in enumerate(rows, start=1) if number not in skip_rows)
+
+
+def read_gd88(input_file, mapped=False, skip_rows=None):
+    """Yield a Channel for every non-blank row of a GD88 channel export (a path or open file).
+
+    With mapped, a path is read through a memory map (see mapped_csv.py).
+    Rows numbered in skip_rows (e.g. from validation.py) are left out.
+    """
+    with open_table(input_file, encoding="utf-8-sig", mapped=mapped) as table:
+        names = table.select(GD88_COLUMNS)
+        columns = GD88Columns(names)
+        for row in _without(table.rows(names, skip_blank=True), skip_rows):
+            yield columns.channel(row)
+
+
+def read_chirp(input_file, mapped=False, skip_rows=None, blank_tone_off=False):
+    """Yield a Channel for every row of a CHIRP/TID radio export (a path or open file).
+
+    With blank_tone_off, a memory whose Tone column is blank has no tone,
+    as ChirpWriter writes a channel without one; roundtrip.py reads the
+    CHIRP files this tree converted that way. Otherwise cToneFreq is used.
+    """
+    with open_table(input_file, mapped=mapped) as table:
+        names = table.select(CHIRP_COLUMNS)
+        index = header_index(names)
+        freq_i, duplex_i, offset_i, name_i, mode_i = (index[name] for name in
+                                                      ("Frequency", "Duplex", "Offset", "Name", "Mode"))
+        # A missing tone column reads as None
+        tone_mode_i, tone_i, dtcs_i, polarity_i = (index.get(name, len(names)) for name in
+                                                   ("Tone", "cToneFreq", "DtcsCode", "DtcsPolarity"))
+        pad = len(names) in (tone_mode_i, tone_i, dtcs_i, polarity_i)
+        power_i = index.get("Power")
+
+        for row in _without(table.rows(names), skip_rows):
+            if pad:
+                row += (None,)
+            rx_hz = parse_mhz(row[freq_i])
+            if rx_hz is None:
+                raise ValueError(f"invalid frequency: {row[freq_i]!r}")
+            offset_hz = parse_mhz(row[offset_i]) if row[offset_i] else 0
+            if offset_hz is None:
+                raise ValueError(f"invalid offset: {row[offset_i]!r}")
+            tx_hz = apply_offset(rx_hz, row[duplex_i].strip(), offset_hz)
+
+            name = row[name_i]
+            mode = row[mode_i]
+            tone_mode = row[tone_mode_i]
+            if blank_tone_off and tone_mode is not None and not tone_mode.strip():
+                tone = None
+            else:
+                tone = chirp_tone(tone_mode, row[tone_i], row[dtcs_i], row[polarity_i])
+            yield Channel(
+                name, rx_hz, tx_hz,
+                digital=mode == "DMR",
+                mode=mode,
+                power=CHIRP_POWER.get(row[power_i] if power_i is not None else "", "High"),
+                # Bandwidth: assume VHF channels are 25kHz, UHF 12.5kHz
+                bandwidth_hz=25000 if rx_hz < 400_000_000 else 12500,
+                rx_tone=tone,
+                tx_tone=tone,
+                contact=name,
+                rx_group=name,
+            )
+
+
+def _ft3_hz(text):
+    # A blank frequency is an empty memory and reads as 0; anything else must be a frequency
+    hz = parse_mhz(text)
+    if hz is None:
+        if text and text.strip():
+            raise ValueError(f"invalid frequency: {text!r}")
+        return 0
+    return hz
+
+
+def read_ft3(input_file, mapped=False, skip_rows=None):
+    """Yield a Channel for every row of a Yaesu FT3D memory export (a path or open file)."""
+    with open_table(input_file, mapped=mapped) as table:
+        names = table.select(FT3_COLUMNS)
+        index = header_index(names)
+        (tone_mode_i, ctcss_i, dcs_i, name_i, rx_i, tx_i, mode_i, power_i, skip_i) = (
+            index[name] for name in FT3_COLUMNS)
+
+        for row in _without(table.rows(names), skip_rows):
+            tone = ft3_tone(row[tone_mode_i], row[ctcss_i], row[dcs_i])
+            yield Channel(
+                row[name_i],
+                _ft3_hz(row[rx_i]),
+                _ft3_hz(row[tx_i]),
+                mode=row[mode_i],
+                power=row[power_i],
+                rx_tone=tone,
+                tx_tone=tone,
+                skip=row[skip_i] == "On",
+            )
+
+
+def read_dm32(input_file, mapped=False, skip_rows=None):
+    """Yield a Channel for every row of a DM32 channel CSV (a path or open file)."""
+    with open_table(input_file, encoding="utf-8-sig", mapped=mapped) as table:
+        names = table.select(DM32_READ_COLUMNS)
+        index = header_index(names)
+        # A missing column reads as None
+        (name_i, rx_i, tx_i, type_i, power_i, bandwidth_i, cc_i, slot_i, decode_i, encode_i, contact_i,
+         rx_group_i, scan_list_i) = (index.get(name, len(names)) for name in DM32_READ_COLUMNS)
+
+        for row in _without(table.rows(names, skip_blank=True), skip_rows):
+            row += (None,)
+            digital = (row[type_i] or "").strip().upper() == "DIGITAL"
+            scan_list = (row[scan_list_i] or "").strip()
+            yield Channel(
+                row[name_i] or "",
+                parse_hz(row[rx_i]),
+                parse_hz(row[tx_i]),
+                digital=digital,
+                mode="DMR" if digital else "FM",
+                power=row[power_i] or None,
+                bandwidth_hz=parse_bandwidth(row[bandwidth_i]),
+                color_code=parse_color_code(row[cc_i]),
+                slot=parse_slot(row[slot_i]),
+                rx_tone=parse_tone(row[decode_i]),
+                tx_tone=parse_tone(row[encode_i]),
+                contact=row[contact_i],
+                rx_group=row[rx_group_i],
+                scan_list=None if scan_list.upper() in ("", "NONE") else scan_list,
+            )
+
+
+def tone_from_uvpro(text):
+    """Tone of a UV-Pro sub-audio field, the inverse of uvpro_tone: "88.5" is CTCSS, "023" a DCS code."""
+    s = (text or "").strip()
+    if s in ("", "0") or "." in s:
+        return parse_tone(s)
+    return parse_tone(f"D{s}N")
+
+
+def read_uvpro(input_file, mapped=False, skip_rows=None):
+    """Yield a Channel for every row of a UV-Pro channels.csv (a path or open file).
+
+    The inverse of uvpro_row: frequencies are in Hz as freq_to_hz writes
+    them and H/M/L power codes go back to "High", "Mid" and "Low".
+    """
+    with open_table(input_file, mapped=mapped) as table:
+        names = table.select(UVPRO_READ_COLUMNS)
+        index = header_index(names)
+        (name_i, tx_i, rx_i, tx_tone_i, rx_tone_i, power_i, bandwidth_i, scan_i, modulation_i) = (
+            index[name] for name in UVPRO_READ_COLUMNS)
+
+        for row in _without(table.rows(names), skip_rows):
+            yield Channel(
+                row[name_i],
+                parse_hz(row[rx_i]) or 0,
+                parse_hz(row[tx_i]) or 0,
+                mode="AM" if row[modulation_i] == "1" else "FM",
+                power=CODE_POWER.get((row[power_i] or "").strip().upper(), "High"),
+                bandwidth_hz=parse_bandwidth(row[bandwidth_i]),
+                rx_tone=tone_from_uvpro(row[rx_tone_i]),
+                tx_tone=tone_from_uvpro(row[tx_tone_i]),
+                skip=row[scan_i] == "0",
+            )
+
+
+READERS = {
+    "gd88": read_gd88,
+    "chirp": read_chirp,
+    "ft3": read_ft3,
+    "dm32": read_dm32,
+    "uvpro": read_uvpro,
+}
+
+
+# --- Writers ----------------------------------------------------------------
+
+def format_bandwidth(hz):
+    """Format a bandwidth in Hz the way DM32 CPS expects ("12.5KHz", "25KHz")."""
+    return f"{hz / 1000:g}KHz"
+
+
+(_DM32_NO, _DM32_NAME, _DM32_TYPE, _DM32_RX, _DM32_TX, _DM32_POWER, _DM32_BANDWIDTH,
+ _DM32_SCAN, _DM32_CONTACT, _DM32_RX_GROUP, _DM32_CC, _DM32_SLOT, _DM32_DECODE,
+ _DM32_ENCODE) = DM32.indices(
+    "No.", "Channel Name", "Channel Type", "RX Frequency[MHz]", "TX Frequency[MHz]", "Power",
+    "Band Width", "Scan List", "TX Contact", "RX Group List", "Color Code", "Time Slot",
+    "CTC/DCS Decode", "CTC/DCS Encode")
+
+
+def dm32_row(channel, number):
+    """Build a DM32 channel row (a list in DM32 column order). Not for GD88 channels (see OWN_MAPPINGS)."""
+    row = DM32.defaults.copy()
+    row[_DM32_NO] = number
+    row[_DM32_NAME] = channel.name
+    row[_DM32_TYPE] = "Digital" if channel.digital else "Analog"
+    row[_DM32_RX] = format_mhz(channel.rx_hz)
+    row[_DM32_TX] = format_mhz(channel.tx_hz)
+    row[_DM32_POWER] = channel.power or "High"
+    if channel.bandwidth_hz:
+        row[_DM32_BANDWIDTH] = format_bandwidth(channel.bandwidth_hz)
+    if channel.scan_list:
+        row[_DM32_SCAN] = channel.scan_list
+    row[_DM32_CONTACT] = channel.contact
+    row[_DM32_RX_GROUP] = channel.rx_group
+    if channel.color_code is not None:
+        row[_DM32_CC] = str(channel.color_code)
+    if channel.slot is not None:
+        row[_DM32_SLOT] = f"Slot {channel.slot}"
+    if channel.rx_tone:
+        row[_DM32_DECODE] = channel.rx_tone
+    if channel.tx_tone:
+        row[_DM32_ENCODE] = channel.tx_tone
+    return row
+
+
+(_RT3_MODE, _RT3_NAME, _RT3_RX, _RT3_TX, _RT3_POWER, _RT3_CONTACT, _RT3_GROUP_LIST,
+ _RT3_CC, _RT3_SLOT, _RT3_TONE_DEC, _RT3_TONE_ENC) = RT3_CHANNELS.indices(
+    "Channel Mode", "Channel Name", "RX Frequency(MHz)", "TX Frequency(MHz)", "Power",
+    "Contact Name", "Group List", "Color Code", "Repeater Slot", "CTCSS/DCS Dec", "CTCSS/DCS Enc")
+
+
+def rt3_row(channel):
+    """Build an RT3 channel row (a list in RT3 column order)."""
+    row = RT3_CHANNELS.defaults.copy()
+    row[_RT3_MODE] = "2" if channel.digital else "1"
+    row[_RT3_NAME] = channel.name
+    row[_RT3_RX] = format_mhz(channel.rx_hz)
+    row[_RT3_TX] = format_mhz(channel.tx_hz)
+    row[_RT3_POWER] = "2" if (channel.power or "").upper() == "HIGH" else "0"
+    if channel.contact is not None:
+        row[_RT3_CONTACT] = channel.contact
+    if channel.rx_group is not None:
+        row[_RT3_GROUP_LIST] = channel.rx_group
+    if channel.color_code is not None:
+        row[_RT3_CC] = str(channel.color_code)
+    row[_RT3_SLOT] = "1" if channel.slot == 1 else "2"
+    if channel.rx_tone:
+        row[_RT3_TONE_DEC] = channel.rx_tone
+    if channel.tx_tone:
+        row[_RT3_TONE_ENC] = channel.tx_tone
+    return row
+
+
+def uvpro_tone(tone):
+    """UV-Pro sub-audio field: CTCSS frequency, DCS code number, or "0" for none."""
+    if not tone:
+        return "0"
+    if tone[0] in "Dd":
+        return tone[1:4]
+    return tone
+
+
+def uvpro_row(channel):
+    """Build a UV-Pro channel row (a list in UV-Pro column order)."""
+    modulation = "1" if channel.mode == "AM" else "0"
+    return [
+        channel.name, str(channel.tx_hz or 0), str(channel.rx_hz or 0),
+        uvpro_tone(channel.tx_tone), uvpro_tone(channel.rx_tone),
+        power_to_code(channel.power or ""), bandwidth_from_mode(channel.mode),
+        "0" if channel.skip else "1",
+        "0", "0", "0", "0", "0", modulation, modulation,
+    ]
+
+
+# Analog modes CHIRP and the FT3D take as they are; anything else is written as FM
+ANALOG_MODES = frozenset(("FM", "NFM", "AM"))
+
+(_CHIRP_LOCATION, _CHIRP_NAME, _CHIRP_FREQ, _CHIRP_DUPLEX, _CHIRP_OFFSET, _CHIRP_TONE, _CHIRP_RTONE,
+ _CHIRP_CTONE, _CHIRP_DTCS, _CHIRP_POLARITY, _CHIRP_MODE, _CHIRP_SKIP, _CHIRP_POWER) = CHIRP.indices(
+    "Location", "Name", "Frequency", "Duplex", "Offset", "Tone", "rToneFreq", "cToneFreq", "DtcsCode",
+    "DtcsPolarity", "Mode", "Skip", "Power")
+
+
+def chirp_row(channel, number):
+    """Build a CHIRP memory row (a list in CHIRP column order) that read_chirp reads back."""
+    row = CHIRP.defaults.copy()
+    rx_hz = channel.rx_hz or 0
+    duplex, offset_hz = split_offset(rx_hz, channel.tx_hz or rx_hz)
+    row[_CHIRP_LOCATION] = number
+    row[_CHIRP_NAME] = channel.name
+    row[_CHIRP_FREQ] = format_mhz(rx_hz, 6)
+    row[_CHIRP_DUPLEX] = duplex
+    row[_CHIRP_OFFSET] = format_mhz(offset_hz, 6)
+    # CHIRP memories have one tone for both directions
+    tone = channel.tx_tone or channel.rx_tone
+    if tone and tone[0] == "D":
+        row[_CHIRP_TONE] = "DTCS"
+        row[_CHIRP_DTCS] = tone[1:4]
+        row[_CHIRP_POLARITY] = "RR" if tone[4:] == "I" else "NN"
+    elif tone:
+        row[_CHIRP_TONE] = "TSQL" if channel.rx_tone == channel.tx_tone else "Tone"
+        row[_CHIRP_RTONE] = row[_CHIRP_CTONE] = tone
+    if channel.digital:
+        row[_CHIRP_MODE] = "DMR"
+    elif channel.mode in ANALOG_MODES:
+        row[_CHIRP_MODE] = channel.mode
+    if channel.skip:
+        row[_CHIRP_SKIP] = "S"
+    row[_CHIRP_POWER] = CHIRP_POWER_TEXT[power_to_code(channel.power or "")]
+    return row
+
+
+(_FT3_NO, _FT3_RX, _FT3_TX, _FT3_MODE, _FT3_NAME, _FT3_TONE_MODE, _FT3_CTCSS, _FT3_DCS, _FT3_POWER,
+ _FT3_SKIP) = FT3.indices(
+    "Channel No", "Receive Frequency", "Transmit Frequency", "Operating Mode", "Name", "Tone Mode", "CTCSS",
+    "DCS", "Tx Power", "Skip")
+
+
+def ft3_row(channel, number):
+    """Build a Yaesu FT3D memory row (a list in FT3D column order) that read_ft3 reads back."""
+    row = FT3.defaults.copy()
+    row[_FT3_NO] = number
+    row[_FT3_RX] = format_mhz(channel.rx_hz, 6) if channel.rx_hz else ""
+    row[_FT3_TX] = format_mhz(channel.tx_hz, 6) if channel.tx_hz else ""
+    if channel.mode in ANALOG_MODES:
+        row[_FT3_MODE] = channel.mode
+    row[_FT3_NAME] = channel.name
+    tone = channel.tx_tone or channel.rx_tone
+    if tone and tone[0] == "D":
+        row[_FT3_TONE_MODE] = "DCS"
+        row[_FT3_DCS] = tone[1:4]
+    elif tone:
+        row[_FT3_TONE_MODE] = "T Sql" if channel.rx_tone == channel.tx_tone else "Tone"
+        row[_FT3_CTCSS] = f"{tone} Hz"
+    row[_FT3_POWER] = FT3_POWER_TEXT[power_to_code(channel.power or "")]
+    if channel.skip:
+        row[_FT3_SKIP] = "On"
+    return row
+
+
+class ChannelWriter:
+    """Base class: writes channels to an open CSV file, counting rows."""
+
+    headers = None
+
+    def __init__(self, outfile, write_header=True):
+        self.writer = csv.writer(outfile)
+        self.count = 0
+        if write_header and self.headers:
+            self.writer.writerow(self.headers)
+
+    def write(self, channel):
+        self.writer.writerow(self.row(channel))
+        self.count += 1
+
+    def row(self, channel):
+        raise NotImplementedError
+
+
+class DM32Writer(ChannelWriter):
+    headers = DM32.headers
+
+    def __init__(self, outfile, write_header=True, start_number=1):
+        super().__init__(outfile, write_header)
+        self.number = start_number
+
+    def row(self, channel):
+        row = dm32_row(channel, self.number)
+        self.number += 1
+        return row
+
+
+class RT3Writer(ChannelWriter):
+    headers = RT3_CHANNELS.headers
+
+    def row(self, channel):
+        return rt3_row(channel)
+
+
+class UVProWriter(ChannelWriter):
+    headers = UV_PRO.headers
+
+    def row(self, channel):
+        return uvpro_row(channel)
+
+
+class ChirpWriter(ChannelWriter):
+    headers = CHIRP.headers
+
+    def __init__(self, outfile, write_header=True, start_number=0):
+        super().__init__(outfile, write_header)
+        self.number = start_number
+
+    def row(self, channel):
+        row = chirp_row(channel, self.number)
+        self.number += 1
+        return row
+
+
+class FT3Writer(ChannelWriter):
+    headers = FT3.headers
+
+    def __init__(self, outfile, write_header=True, start_number=1):
+        super().__init__(outfile, write_header)
+        self.number = start_number
+
+    def row(self, channel):
+        row = ft3_row(channel, self.number)
+        self.number += 1
+        return row
+
+
+class MaverickWriter:
+    """Writes channels by filling in copies of a Maverick working-copy template row.
+
+    Maverick CPS exports have no fixed layout, so the header and the digital
+    and analog template rows come from the user's own working copy.
+    Contact lookups are only counted here (in `mapped` and `unknown`) so
+    the caller can report them once the conversion is done.
+    """
+
+    def __init__(self, outfile, header, digital_template, analog_template, tg_mapping,
+                 write_header=True, start_number=1000):
+        self.writer = csv.DictWriter(outfile, fieldnames=header)
+        self.digital_template = digital_template
+        self.analog_template = analog_template
+        self.tg_mapping = tg_mapping
+        self.number = start_number  # Adjust if needed to avoid existing channels
+        self.count = 0
+        self.mapped = Counter()
+        self.unknown = Counter()
+        if write_header:
+            self.writer.writeheader()
+
+    def write(self, channel):
+        if not channel.name:
+            return
+        template = self.digital_template if channel.digital else self.analog_template
+        out = dict(template)
+
+        # Core channel fields
+        out["No."] = str(self.number)
+        self.number += 1
+        out["Channel Name"] = channel.name[:16]
+        out["Receive Frequency"] = format_mhz(channel.rx_hz)
+        out["Transmit Frequency"] = format_mhz(channel.tx_hz)
+        out["Channel Type"] = "D-Digital" if channel.digital else "A-Analog"
+
+        # Contact/TG lookup using talkgroups.CSV
+        contact = (channel.contact or "").strip()
+        if contact and contact in self.tg_mapping:
+            out["Contact/TG"] = contact[:16]
+            out["Contact/TG TG/DMR ID"] = self.tg_mapping[contact]
+            self.mapped[contact] += 1
+        elif contact:
+            self.unknown[contact] += 1
+
+        # DMR-specific fields
+        if channel.digital:
+            if channel.slot is not None:
+                out["Slot"] = str(channel.slot)
+            if channel.color_code is not None:
+                out["RX Color Code"] = str(channel.color_code)
+
+        # Optional fields
+        if channel.scan_list:
+            out["Scan List"] = channel.scan_list[:16]
+        if channel.rx_group:
+            out["Receive Group List"] = channel.rx_group[:16]
+
+        self.writer.writerow(out)
+        self.count += 1
+
+
+WRITERS = {
+    "dm32": DM32Writer,
+    "rt3": RT3Writer,
+    "uvpro": UVProWriter,
+    "chirp": ChirpWriter,
+    "ft3": FT3Writer,
+}
+
+# Pairs with their own mapping, which every entry point uses instead of the channel engine.
+# GD88 -> DM32 copies the GD88 text as GD88toDB32channels.py always has, which a Channel can't carry.
+OWN_MAPPINGS = {
+    ("gd88", "dm32"): "GD88toDB32channels.py, or GD88toAllFormats.py --dm32 for several formats at once",
+}
+
+
+def check_pair(source, target):
+    """Raise ValueError if source -> target has its own mapping (see OWN_MAPPINGS)."""
+    if (source, target) in OWN_MAPPINGS:
+        raise ValueError(f"{source} -> {target} has its own mapping; use {OWN_MAPPINGS[source, target]}")
+
+
+def convert(channels, writers):
+    """Send every channel to every writer in a single pass. Returns the number of channels read."""
+    profiler = profiling.active()
+    if profiler is not None:
+        return profiler.convert(channels, writers)
+    count = 0
+    for channel in channels:
+        for writer in writers:
+            writer.write(channel)
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a channel export to one or more radio formats in one pass")
+    parser.add_argument("source", choices=sorted(READERS), help="Source export format")
+    parser.add_argument("input", help="Input CSV file")
+    for name in sorted(WRITERS):
+        parser.add_argument(f"--{name}", metavar="OUTPUT", help=f"Write {name.upper()} channels to OUTPUT")
+    parser.add_argument("--mmap", action="store_true", help="Read the input through a memory map (UTF-8 only)")
+    parser.add_argument("--validate", metavar="REPORT",
+                        help="Check every row first, write the problems to REPORT and skip rows with errors")
+    parser.add_argument("--cache", action="store_true", help="Read the input from its columnar cache, building it if needed")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    targets = [(name, getattr(args, name)) for name in sorted(WRITERS) if getattr(args, name)]
+    if not targets:
+        parser.error("give at least one output, e.g. --dm32 out.csv")
+    for name, _ in targets:
+        check_pair(args.source, name)
+
+    with profiling.profiled(args, [args.input], [path for _, path in targets]):
+        skip_rows = None
+        if args.validate:
+            from validation import validate_to_report
+            with profiling.stage("validate"):
+                skip_rows = validate_to_report(args.source, args.input, args.validate, mapped=args.mmap)
+
+        files = [open(path, "w", newline="", buffering=BUFFER_SIZE) for _, path in targets]
+        try:
+            writers = [WRITERS[name](f) for (name, _), f in zip(targets, files)]
+            if args.cache:
+                from channel_cache import read_cached
+                channels = read_cached(args.source, args.input, mapped=args.mmap, skip_rows=skip_rows)
+            else:
+                channels = READERS[args.source](args.input, mapped=args.mmap, skip_rows=skip_rows)
+            count = convert(channels, writers)
+        finally:
+            for f in files:
+                f.close()
+
+    for name, path in targets:
+        print(f"Wrote {count} channels to '{path}' ({name})")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error converting file: {e}", file=sys.stderr)
+        sys.exit(1)
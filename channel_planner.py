@@ -0,0 +1,306 @@
+## Capacity-aware planning for a target radio.
+## Channels are packed, in input order, into zones and scan lists that fit
+## the target's limits, and given unique names no longer than the radio
+## allows. When the channels don't fit in one radio the plan is split into
+## parts, each written as its own set of import files: plug.csv becomes
+## plug_001.csv, plug_002.csv... with plug_001_zones.csv and
+## plug_001_scanlists.csv beside each. A zone or scan list that is full
+## is continued under a "~2" name, unless the caller keeps scan list names
+## (GD88toMaverickChannels.py --plan does). Planning is a single pass with hash
+## lookups, so 100k channels plan in about the time it takes to read them.
+##
+## EXAMPLE USE
+## python channel_planner.py chirp merged.csv dm32 plug.csv
+## python channel_planner.py chirp repeaters.csv rt3 rt3.csv --zone-by band
+## python channel_planner.py dm32 combined_dm32.csv uvpro channels_out.csv
+## python GD88toMaverickChannels.py --plan
+## python channel_planner.py gd88 merged.csv rt3 plug.csv --profile profile.json   (see profiling.py)
+
+import argparse
+import csv
+import sys
+from itertools import chain
+from pathlib import Path
+
+import profiling
+from channel_engine import BUFFER_SIZE, READERS, WRITERS, check_pair, convert
+from radio_formats import SCAN_LISTS, ZONES
+
+
+class Capacity:
+    """Limits of one target radio. zones/scan_lists of None mean the radio has no such lists."""
+
+    __slots__ = ("channels", "zones", "zone_channels", "scan_lists", "scan_list_channels", "name_length",
+                 "first_number")
+
+    def __init__(self, channels, zones=None, zone_channels=None, scan_lists=None, scan_list_channels=None,
+                 name_length=16, first_number=1):
+        self.channels = channels
+        self.zones = zones
+        self.zone_channels = zone_channels
+        self.scan_lists = scan_lists
+        self.scan_list_channels = scan_list_channels
+        self.name_length = name_length
+        self.first_number = first_number
+
+
+# === ADJUST THESE TO MATCH YOUR RADIO'S FIRMWARE ===
+CAPACITIES = {
+    "dm32": Capacity(4000, zones=250, zone_channels=64, scan_lists=32, scan_list_channels=16),
+    "rt3": Capacity(1000, zones=250, zone_channels=16, scan_lists=250, scan_list_channels=31),
+    "maverick": Capacity(4000, zones=250, zone_channels=64, scan_lists=250, scan_list_channels=64,
+                         first_number=1000),
+    "uvpro": Capacity(30, name_length=10),  # one channel group
+}
+
+DEFAULT_ZONE = "Channels"
+
+
+def _band(channel):
+    return "VHF" if (channel.rx_hz or 0) < 300_000_000 else "UHF"
+
+
+# How channels are grouped into zones; a channel with no group goes to DEFAULT_ZONE
+ZONE_KEYS = {
+    "scan-list": lambda channel: channel.scan_list,
+    "rx-group": lambda channel: channel.rx_group,
+    "band": _band,
+    "none": lambda channel: None,
+}
+
+
+class NameTable:
+    """Hands out unique names of at most `length` characters.
+
+    A name that is already taken gets a "~2", "~3"... suffix in place of
+    its last characters. The next suffix to try is remembered per name, so
+    a thousand channels called "Simplex" cost no more than distinct names.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.used = set()
+        self.next_suffix = {}
+
+    def claim(self, name):
+        base = name[:self.length]
+        if base not in self.used:
+            self.used.add(base)
+            return base
+        n = self.next_suffix.get(base, 2)
+        while True:
+            suffix = f"~{n}"
+            candidate = base[:self.length - len(suffix)] + suffix
+            n += 1
+            if candidate not in self.used:
+                break
+        self.next_suffix[base] = n
+        self.used.add(candidate)
+        return candidate
+
+
+class PlanPart:
+    """The channels, zones and scan lists of one radio's worth of a plan.
+
+    zones and scan_lists map each list name to its channel names, in the
+    order the lists were opened. The channel and zone limits decide where
+    the plan is split; a channel whose scan list has no room left is kept
+    without one and counted in `unlisted`. A list continued under a new
+    name is counted in `continued`. With continue_scan_lists False a full
+    scan list keeps taking channels under its own name instead, and the
+    channels past the limit are counted in `overfull`.
+    """
+
+    def __init__(self, number, capacity, continue_scan_lists=True):
+        self.number = number
+        self.capacity = capacity
+        self.continue_scan_lists = continue_scan_lists
+        self.channels = []
+        self.zones = {}
+        self.scan_lists = {}
+        self.renamed = 0
+        self.unlisted = 0
+        self.continued = 0
+        self.overfull = 0
+        self._names = NameTable(capacity.name_length)
+        self._zone_names = NameTable(capacity.name_length)
+        self._scan_list_names = NameTable(capacity.name_length)
+        self._open_zones = {}  # zone key -> name of the zone being filled
+        self._open_scan_lists = {}
+
+    def _list_for(self, key, lists, open_lists, limit, size):
+        """Name of the open list for `key` with room left, "" if a new one is needed, or None if that won't fit."""
+        name = open_lists.get(key)
+        if name is not None and (size is None or len(lists[name]) < size):
+            return name
+        return "" if len(lists) < limit else None
+
+    def add(self, channel, zone_key):
+        """Add a channel, renaming it to fit; returns False (changing nothing) if this part is full."""
+        cap = self.capacity
+        if len(self.channels) >= cap.channels:
+            return False
+        zone = scan_list = None
+        if cap.zones is not None:
+            zone = self._list_for(zone_key, self.zones, self._open_zones, cap.zones, cap.zone_channels)
+            if zone is None:
+                return False
+        if cap.scan_lists is not None and channel.scan_list:
+            size = cap.scan_list_channels if self.continue_scan_lists else None
+            scan_list = self._list_for(channel.scan_list, self.scan_lists, self._open_scan_lists,
+                                       cap.scan_lists, size)
+            if scan_list is None:
+                self.unlisted += 1
+                channel.scan_list = None
+
+        if channel.name:
+            name = self._names.claim(channel.name)
+            if name != channel.name:
+                self.renamed += 1
+                channel.name = name
+            if zone is not None:
+                if not zone:
+                    self.continued += zone_key in self._open_zones
+                    zone = self._zone_names.claim(zone_key)
+                    self.zones[zone] = []
+                    self._open_zones[zone_key] = zone
+                self.zones[zone].append(channel.name)
+            if scan_list is not None:
+                if not scan_list:
+                    self.continued += channel.scan_list in self._open_scan_lists
+                    scan_list = self._scan_list_names.claim(channel.scan_list)
+                    self.scan_lists[scan_list] = []
+                    self._open_scan_lists[channel.scan_list] = scan_list
+                members = self.scan_lists[scan_list]
+                self.overfull += cap.scan_list_channels is not None and len(members) >= cap.scan_list_channels
+                members.append(channel.name)
+                channel.scan_list = scan_list
+        else:
+            # Zones and scan lists list channels by name, so an unnamed one can't be in either
+            channel.scan_list = None
+        self.channels.append(channel)
+        return True
+
+
+def plan_channels(channels, capacity, zone_by="scan-list", continue_scan_lists=True):
+    """Pack channels into PlanParts that each fit `capacity`, yielding each part once it is full.
+
+    Channels are renamed (and their scan list set to the list they were
+    packed into) in place. There is always at least one part. See PlanPart
+    for continue_scan_lists.
+    """
+    zone_key = ZONE_KEYS[zone_by]
+    part = PlanPart(1, capacity, continue_scan_lists)
+    for channel in channels:
+        key = zone_key(channel) or DEFAULT_ZONE
+        while not part.add(channel, key):
+            if not part.channels:
+                raise ValueError(f"channel '{channel.name}' does not fit in an empty radio; check the capacity")
+            yield part
+            part = PlanPart(part.number + 1, capacity, continue_scan_lists)
+    yield part
+
+
+def part_file(output_file, number, split, kind=""):
+    """Path of one file of a plan: plug.csv, plug_zones.csv, or plug_002.csv, plug_002_zones.csv when split."""
+    output_file = Path(output_file)
+    stem = f"{output_file.stem}_{number:03d}" if split else output_file.stem
+    return output_file.with_name(f"{stem}{kind}{output_file.suffix}")
+
+
+def _write_lists(path, fmt, lists):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(fmt.headers)
+        writer.writerows((number, name, "|".join(members))
+                         for number, (name, members) in enumerate(lists.items(), start=1))
+
+
+def write_plan(parts, output_file, make_writer, encoding=None, buffer_size=BUFFER_SIZE, lists_if_split=False):
+    """Write every part of a plan to its own channel, zone and scan list files.
+
+    make_writer(outfile) returns the channel writer for one part's file
+    (e.g. DM32Writer), so numbering starts over in every file. Only one
+    part beyond the one being written is held in memory. With
+    lists_if_split, a part's zone and scan list files are only written
+    when the plan is split over several files or the part continued a list.
+
+    Returns a list of (paths, channels, zones, scan lists, renamed, unlisted, continued, overfull)
+    tuples, one per part.
+    """
+    parts = iter(parts)
+    first = next(parts)
+    second = next(parts, None)
+    split = second is not None
+
+    results = []
+    for part in chain([first, second] if split else [first], parts):
+        paths = [part_file(output_file, part.number, split)]
+        with open(paths[0], "w", newline="", encoding=encoding, buffering=buffer_size) as outfile:
+            convert(part.channels, [make_writer(outfile)])
+        lists = not lists_if_split or split or part.continued
+        if lists and part.capacity.zones is not None:
+            paths.append(part_file(output_file, part.number, split, "_zones"))
+            _write_lists(paths[-1], ZONES, part.zones)
+        if lists and part.capacity.scan_lists is not None:
+            paths.append(part_file(output_file, part.number, split, "_scanlists"))
+            _write_lists(paths[-1], SCAN_LISTS, part.scan_lists)
+        results.append((paths, len(part.channels), len(part.zones), len(part.scan_lists), part.renamed,
+                        part.unlisted, part.continued, part.overfull))
+    return results
+
+
+def plan_report(results):
+    """Summary lines for the results of write_plan."""
+    lines = []
+    for paths, channels, zones, scan_lists, renamed, unlisted, continued, overfull in results:
+        line = f"{paths[0]}: {channels} channels, {zones} zones, {scan_lists} scan lists"
+        if renamed:
+            line += f", {renamed} renamed"
+        if unlisted:
+            line += f", {unlisted} left out of full scan lists"
+        if continued:
+            line += f", {continued} full zones or scan lists continued under '~2'... names"
+        if overfull:
+            line += f", {overfull} over a scan list's channel limit (list names kept)"
+        lines.append(line)
+    if len(results) > 1:
+        lines.append(f"Split into {len(results)} import files")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan channels into a target radio's zones, scan lists and capacity")
+    parser.add_argument("source", choices=sorted(READERS), help="Source export format")
+    parser.add_argument("input", help="Input CSV file")
+    parser.add_argument("target", choices=sorted(set(WRITERS) & set(CAPACITIES)), help="Target radio format")
+    parser.add_argument("output", help="Output channel CSV (numbered _001, _002... if the plan is split)")
+    parser.add_argument("--zone-by", choices=sorted(ZONE_KEYS), default="scan-list",
+                        help="How channels are grouped into zones (default: scan-list)")
+    parser.add_argument("--max-channels", type=int, help="Override the target's channel capacity")
+    parser.add_argument("--mmap", action="store_true", help="Read the input through a memory map (UTF-8 only)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    check_pair(args.source, args.target)
+    capacity = CAPACITIES[args.target]
+    if args.max_channels:
+        limits = {name: getattr(capacity, name) for name in Capacity.__slots__}
+        capacity = Capacity(**dict(limits, channels=args.max_channels))
+
+    with profiling.profiled(args, [args.input]) as profiler:
+        channels = READERS[args.source](args.input, mapped=args.mmap)
+        results = write_plan(plan_channels(channels, capacity, args.zone_by), args.output, WRITERS[args.target])
+        if profiler is not None:
+            for paths, *_ in results:
+                for path in paths:
+                    profiler.file(path, "written")
+    print("\n".join(plan_report(results)))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error planning channels: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,192 @@
+## EXAMPLE USE
+## python check_roundtrip.py
+## python check_roundtrip.py --rows 100000 --min-rate 20000
+## python check_roundtrip.py --update   (rewrite the expected files after reviewing a change)
+## Converts every source export in golden/ to its target format and back,
+## checks both files are byte-identical to the expected ones next to it
+## (golden/<source>.<target>.csv and golden/<source>.<target>.<source>.csv)
+## and that roundtrip.py finds no differences either way, and that every
+## entry point writing GD88 -> DM32 gives the expected file. Then converts a
+## synthetic export forward and back and diffs it, and fails if any stage
+## runs below --min-rate rows/sec. Exits non-zero if any check fails.
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic_data
+from channel_engine import BUFFER_SIZE, READERS, WRITERS, convert
+from roundtrip import compared_fields, diff_channels, read_converted, summary
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+# (source, target) pairs in the corpus; a source with a writer is also converted back
+GOLDEN_CASES = (
+    ("chirp", "dm32"),
+    ("ft3", "uvpro"),
+    ("dm32", "chirp"),
+    ("uvpro", "ft3"),
+    ("gd88", "dm32"),
+)
+
+# Fields a golden case's converter doesn't map: GD88toDB32channels.py writes every tone as None
+GOLDEN_UNMAPPED = {
+    ("gd88", "dm32"): ("rx_tone", "tx_tone"),
+}
+
+# (source, target) pairs timed on synthetic data
+THROUGHPUT_CASES = (
+    ("chirp", "dm32"),
+    ("ft3", "uvpro"),
+)
+
+
+def _render_gd88_dm32(input_file):
+    # GD88 -> DM32 is GD88toDB32channels.py's mapping (GD88toAllFormats.py --dm32 uses it too)
+    from GD88toDB32channels import convert_gd88_to_dm32
+    return convert_gd88_to_dm32(input_file, None).to_csv(index=False, lineterminator="\n")
+
+
+# Converters used instead of the channel engine for a (source, target) pair
+RENDERERS = {
+    ("gd88", "dm32"): _render_gd88_dm32,
+}
+
+
+def render(source, input_file, target, converted=False):
+    """Convert a file (one this tree converted, if `converted`) to the target format and return the CSV text."""
+    if (source, target) in RENDERERS:
+        return RENDERERS[source, target](input_file)
+    out = io.StringIO(newline="")
+    channels = read_converted(source, input_file) if converted else READERS[source](input_file)
+    convert(channels, [WRITERS[target](out)])
+    return out.getvalue()
+
+
+def check_golden(update=False):
+    """Return a list of (check, ok) for every golden case."""
+    results = []
+    for source, target in GOLDEN_CASES:
+        input_file = os.path.join(GOLDEN_DIR, f"{source}.csv")
+        unmapped = GOLDEN_UNMAPPED.get((source, target), ())
+        fields = tuple(field for field in compared_fields(source, target)[0] if field not in unmapped)
+        steps = [(target, input_file, f"{source}.{target}.csv")]
+        if source in WRITERS:
+            steps.append((source, os.path.join(GOLDEN_DIR, f"{source}.{target}.csv"), f"{source}.{target}.{source}.csv"))
+
+        for fmt, from_file, expected_name in steps:
+            expected_file = os.path.join(GOLDEN_DIR, expected_name)
+            from_fmt = source if from_file == input_file else target
+            text = render(from_fmt, from_file, fmt, converted=from_file != input_file)
+            if update:
+                with open(expected_file, "w", newline="", encoding="utf-8") as f:
+                    f.write(text)
+            try:
+                with open(expected_file, newline="", encoding="utf-8") as f:
+                    same = f.read() == text
+            except OSError:
+                same = False
+            results.append((f"{expected_name} matches {from_fmt} -> {fmt}", same))
+
+            result = diff_channels(lambda: READERS[source](input_file),
+                                   lambda: read_converted(fmt, io.StringIO(text, newline="")), fields)
+            results.append((f"{source}.csv vs {expected_name}: {summary(result)[0]}", not result))
+    return results
+
+
+def check_gd88_dm32_entry_points():
+    """Return a list of (check, ok): each way of writing GD88 -> DM32 gives golden/gd88.dm32.csv."""
+    from conversion_server import ConversionService
+
+    input_file = os.path.join(GOLDEN_DIR, "gd88.csv")
+    with open(os.path.join(GOLDEN_DIR, "gd88.dm32.csv"), newline="", encoding="utf-8") as f:
+        expected = f.read()
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        out_file = os.path.join(tmp, "dm32.csv")
+        for name, command in (
+            ("GD88toDB32channels.py", ["GD88toDB32channels.py", input_file, out_file]),
+            ("GD88toAllFormats.py --dm32", ["GD88toAllFormats.py", input_file, "--dm32", out_file]),
+        ):
+            done = subprocess.run([sys.executable, *command], cwd=here, capture_output=True)
+            try:
+                with open(out_file, newline="", encoding="utf-8") as f:
+                    text = f.read()
+                os.remove(out_file)
+            except OSError:
+                text = None
+            results.append((f"{name} writes gd88.dm32.csv",
+                            done.returncode == 0 and text is not None and text.replace("\r\n", "\n") == expected))
+
+    out = io.StringIO(newline="")
+    ConversionService().convert("gd88", "dm32", input_file, out)
+    results.append(("conversion_server.py gd88 -> dm32 writes gd88.dm32.csv",
+                    out.getvalue().replace("\r\n", "\n") == expected))
+    return results
+
+
+def stage_rates(source, target, rows, seed, workdir):
+    """Convert a synthetic export forward and back and diff it; returns [(stage, rows/sec)]."""
+    input_file = os.path.join(workdir, f"{source}.csv")
+    forward_file = os.path.join(workdir, f"{source}.{target}.csv")
+    back_file = os.path.join(workdir, f"{source}.{target}.{source}.csv")
+    synthetic_data.GENERATORS[source](input_file, rows, seed)
+
+    rates = []
+    for stage, fmt, channels, out_file in (
+        (f"{source} -> {target}", target, lambda: READERS[source](input_file), forward_file),
+        (f"{target} -> {source}", source, lambda: read_converted(target, forward_file), back_file),
+    ):
+        start = time.perf_counter()
+        with open(out_file, "w", newline="", buffering=BUFFER_SIZE) as f:
+            convert(channels(), [WRITERS[fmt](f)])
+        rates.append((stage, rows / (time.perf_counter() - start)))
+
+    fields, _ = compared_fields(source, target)
+    start = time.perf_counter()
+    result = diff_channels(lambda: READERS[source](input_file), lambda: read_converted(source, back_file), fields)
+    rates.append((f"diff {source} round trip", rows / (time.perf_counter() - start)))
+    return rates, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the golden round-trip corpus and conversion throughput")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows per synthetic export (default: 20000)")
+    parser.add_argument("--seed", type=int, default=88, help="Random seed (default: 88)")
+    parser.add_argument("--min-rate", type=float, default=10000,
+                        help="Fail a stage slower than this many rows/sec (default: 10000, 0 = don't check)")
+    parser.add_argument("--update", action="store_true", help="Rewrite the expected golden files from this tree")
+    args = parser.parse_args()
+
+    failed = False
+    for name, ok in check_golden(args.update):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        failed = failed or not ok
+    if args.update:
+        print(f"Rewrote the expected files in '{GOLDEN_DIR}'")
+    for name, ok in check_gd88_dm32_entry_points():
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        failed = failed or not ok
+
+    print(f"\n{args.rows} synthetic rows")
+    with tempfile.TemporaryDirectory() as tmp:
+        for source, target in THROUGHPUT_CASES:
+            rates, result = stage_rates(source, target, args.rows, args.seed, tmp)
+            print(f"{'ok  ' if not result else 'FAIL'} {source} round trip: {summary(result)[0]}")
+            failed = failed or bool(result)
+            for stage, rate in rates:
+                slow = args.min_rate and rate < args.min_rate
+                print(f"{'FAIL' if slow else 'ok  '} {stage:>24}: {rate:12,.0f} rows/sec")
+                failed = failed or slow
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+## Long-running conversion service.
+## Keeps talkgroup tables, Maverick templates and the format schemas in
+## memory and converts jobs concurrently, so each request costs
+## milliseconds instead of a Python + import start-up.
+##
+## EXAMPLE USE
+## python conversion_server.py serve --port 8088
+## curl --data-binary @gd88.csv http://127.0.0.1:8088/convert/gd88/rt3 > rt3.csv
+## python conversion_server.py stdin < jobs.jsonl
+## python conversion_server.py client --input gd88.csv --source gd88 --target rt3 --requests 500
+##
+## HTTP: POST /convert/<source>/<target> with the source CSV as the body.
+## The converted CSV is streamed back with chunked transfer encoding.
+## Maverick jobs take ?template=...&talkgroups=... (default: the server's --maverick-template/--talkgroups).
+## Those name the default files or a file inside --data-dir; any other path is refused.
+##
+## stdin: one JSON job per line, e.g.
+## {"id": 1, "source": "gd88", "target": "dm32", "input": "gd88.csv", "output": "dm32.csv"}
+## {"id": 2, "source": "chirp", "target": "uvpro", "data": "Location,Name,..."}
+## and one JSON result per line on stdout, in completion order.
+
+import argparse
+import http.client
+import io
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from channel_engine import READERS, WRITERS, MaverickWriter, check_pair, convert
+from GD88toMaverickChannels import MAV_WORKING_FILE, TG_FILE, load_maverick_templates
+from talkgroup_index import load_talkgroups
+
+TARGETS = sorted(WRITERS) + ["maverick"]
+
+# Streamed responses are sent in chunks of about this many bytes
+CHUNK_SIZE = 64 * 1024
+
+
+class ConversionService:
+    """Runs conversion jobs, keeping parsed talkgroups and Maverick templates warm.
+
+    Cached files are re-read only when their size or modification time
+    changes. The service is safe to share between threads.
+    """
+
+    def __init__(self, maverick_template=MAV_WORKING_FILE, talkgroups=TG_FILE, data_dir=None):
+        self.maverick_template = Path(maverick_template)
+        self.talkgroups = Path(talkgroups)
+        self.data_dir = Path(data_dir).resolve() if data_dir else None
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, kind, path, loader):
+        path = Path(path)
+        st = path.stat()
+        key = (kind, str(path.resolve()))
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+        value = loader(path)
+        with self._lock:
+            self._cache[key] = (stamp, value)
+        return value
+
+    def tg_mapping(self, path=None):
+        return self._cached("talkgroups", path or self.talkgroups, lambda p: load_talkgroups(p).by_name)
+
+    def templates(self, path=None):
+        def load(p):
+            header, digital_template, analog_template = load_maverick_templates(p)
+            if digital_template is None or analog_template is None:
+                raise ValueError(f"{p} is missing digital/analog template rows.")
+            return header, digital_template, analog_template
+        return self._cached("templates", path or self.maverick_template, load)
+
+    def allowed_file(self, path, default):
+        """The file a remote job named: None for `default`, else `default` itself or a file inside data_dir.
+
+        Raises ValueError for any other path, so a client can't have the
+        server read (or index) arbitrary files.
+        """
+        if not path:
+            return None
+        if Path(path).resolve() == default.resolve():
+            return default
+        if self.data_dir is not None:
+            candidate = (self.data_dir / path).resolve()
+            if candidate.is_relative_to(self.data_dir):
+                return candidate
+        raise ValueError(f"'{path}' is not the server's default file or inside its --data-dir")
+
+    def preload(self):
+        """Load the default Maverick template and talkgroups, if they exist, before the first job."""
+        for path, loader in ((self.talkgroups, self.tg_mapping), (self.maverick_template, self.templates)):
+            if path.exists():
+                loader(path)
+
+    def writer(self, target, outfile, template=None, talkgroups=None):
+        if target == "maverick":
+            header, digital_template, analog_template = self.templates(template)
+            return MaverickWriter(outfile, header, digital_template, analog_template, self.tg_mapping(talkgroups))
+        try:
+            return WRITERS[target](outfile)
+        except KeyError:
+            raise ValueError(f"Unknown target '{target}'. Known targets: {', '.join(TARGETS)}") from None
+
+    def convert(self, source, target, infile, outfile, template=None, talkgroups=None):
+        """Convert `infile` (a path or open text file) from `source` to `target` into `outfile`.
+
+        Returns the number of channels read.
+        """
+        try:
+            reader = READERS[source]
+        except KeyError:
+            raise ValueError(f"Unknown source '{source}'. Known sources: {', '.join(sorted(READERS))}") from None
+        if (source, target) == ("gd88", "dm32"):
+            # Same mapping and output as GD88toDB32channels.py (see channel_engine.OWN_MAPPINGS)
+            from GD88toDB32channels import write_gd88_as_dm32
+            return write_gd88_as_dm32(infile, outfile)
+        check_pair(source, target)
+        return convert(reader(infile), [self.writer(target, outfile, template, talkgroups)])
+
+
+# --- HTTP -------------------------------------------------------------------
+
+class ChunkedResponse(io.TextIOBase):
+    """Text file that sends an HTTP/1.1 chunked response body.
+
+    Nothing is sent until CHUNK_SIZE bytes are buffered, so a job that fails
+    early can still get a proper error status instead of a cut-off body.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.buffer = []
+        self.buffered = 0
+        self.started = False
+
+    def write(self, s):
+        self.buffer.append(s)
+        self.buffered += len(s)
+        if self.buffered >= CHUNK_SIZE:
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if not self.started:
+            self.handler.send_response(200)
+            self.handler.send_header("Content-Type", "text/csv; charset=utf-8")
+            self.handler.send_header("Transfer-Encoding", "chunked")
+            self.handler.end_headers()
+            self.started = True
+        data = "".join(self.buffer).encode("utf-8")
+        self.buffer = []
+        self.buffered = 0
+        self.handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def finish(self):
+        self.flush()
+        if not self.started:  # empty output still needs a response
+            self.handler.send_response(200)
+            self.handler.send_header("Content-Type", "text/csv; charset=utf-8")
+            self.handler.send_header("Content-Length", "0")
+            self.handler.end_headers()
+            return
+        self.handler.wfile.write(b"0\r\n\r\n")
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    service = None  # set by serve()
+
+    def log_message(self, format, *args):
+        pass  # per-request logging to stderr would dominate latency
+
+    def _send_text(self, status, text):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_text(200, "ok\n")
+        else:
+            self._send_text(404, "Not found\n")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8-sig")
+        if len(parts) != 3 or parts[0] != "convert":
+            self._send_text(404, "Use POST /convert/<source>/<target>\n")
+            return
+
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        response = ChunkedResponse(self)
+        try:
+            template = self.service.allowed_file(query.get("template"), self.service.maverick_template)
+            talkgroups = self.service.allowed_file(query.get("talkgroups"), self.service.talkgroups)
+            self.service.convert(parts[1], parts[2], io.StringIO(body), response, template, talkgroups)
+        except (OSError, KeyError, ValueError) as e:
+            if response.started:
+                self.close_connection = True  # can't change the status any more; cut the body short
+                return
+            self._send_text(400, f"Error converting file: {e}\n")
+            return
+        response.finish()
+
+
+def serve(service, host="127.0.0.1", port=8088):
+    handler = type("Handler", (ConversionHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    print(f"Serving conversions on http://{host}:{server.server_port}/convert/<source>/<target>", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# --- stdin/stdout JSON lines ------------------------------------------------
+
+def run_job(service, job):
+    """Run one JSON job and return its JSON result."""
+    result = {"id": job.get("id")}
+    try:
+        source = job["source"]
+        target = job["target"]
+        infile = io.StringIO(job["data"]) if "data" in job else job["input"]
+        if job.get("output"):
+            with open(job["output"], "w", newline="", encoding="utf-8-sig" if target == "maverick" else None) as f:
+                result["rows"] = service.convert(source, target, infile, f, job.get("template"), job.get("talkgroups"))
+        else:
+            out = io.StringIO()
+            result["rows"] = service.convert(source, target, infile, out, job.get("template"), job.get("talkgroups"))
+            result["csv"] = out.getvalue()
+    except (OSError, KeyError, ValueError) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def serve_stdin(service, workers=None, infile=sys.stdin, outfile=sys.stdout):
+    lock = threading.Lock()
+
+    def handle(line):
+        job = None
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("a job must be a JSON object")
+            result = run_job(service, job)
+        except json.JSONDecodeError as e:
+            result = {"id": None, "error": f"Invalid JSON: {e}"}
+        except Exception as e:  # every job line gets a result line, whatever went wrong
+            result = {"id": job.get("id") if isinstance(job, dict) else None, "error": f"{type(e).__name__}: {e}"}
+        with lock:
+            outfile.write(json.dumps(result) + "\n")
+            outfile.flush()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in infile:
+            if line.strip():
+                pool.submit(handle, line)
+
+
+# --- Local client -----------------------------------------------------------
+
+def run_client(host, port, source, target, body, requests=200, concurrency=8):
+    """POST the same job repeatedly from several threads.
+
+    Returns (sorted latencies in ms of the successful requests, number of failed requests).
+    """
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    per_thread = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+
+    def worker(count):
+        conn = http.client.HTTPConnection(host, port)
+        mine = []
+        failed = 0
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                conn.request("POST", f"/convert/{source}/{target}", body=body,
+                             headers={"Content-Type": "text/csv"})
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()  # reconnect for the next request
+                continue
+            if response.status != 200:
+                failed += 1
+                continue
+            mine.append((time.perf_counter() - start) * 1000)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            failures.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(count,)) for count in per_thread]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(latencies), sum(failures)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running conversion service")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("serve", "stdin"):
+        p = sub.add_parser(name, help="Serve over HTTP" if name == "serve" else "Read JSON jobs from stdin")
+        p.add_argument("--maverick-template", default=str(MAV_WORKING_FILE), help=f"Default Maverick working copy (default: {MAV_WORKING_FILE})")
+        p.add_argument("--talkgroups", default=str(TG_FILE), help=f"Default talkgroup list (default: {TG_FILE})")
+        if name == "serve":
+            p.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+            p.add_argument("--port", type=int, default=8088, help="Port to listen on (default: 8088)")
+            p.add_argument("--data-dir", help="Directory ?template= and ?talkgroups= may name files in "
+                                              "(default: only the two default files are allowed)")
+        else:
+            p.add_argument("--workers", type=int, help="Concurrent jobs (default: thread pool default)")
+
+    p = sub.add_parser("client", help="Measure request latency against a running server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8088)
+    p.add_argument("--input", required=True, help="Source CSV to send with every request")
+    p.add_argument("--source", default="gd88", choices=sorted(READERS))
+    p.add_argument("--target", default="rt3", choices=TARGETS)
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--concurrency", type=int, default=8)
+
+    args = parser.parse_args()
+
+    if args.command == "client":
+        with open(args.input, "rb") as f:
+            body = f.read()
+        start = time.perf_counter()
+        latencies, failures = run_client(args.host, args.port, args.source, args.target, body,
+                                         args.requests, args.concurrency)
+        elapsed = time.perf_counter() - start
+        print(f"{len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s), {failures} failed")
+        if not latencies:
+            print("No request succeeded", file=sys.stderr)
+            sys.exit(1)
+        for pct in (50, 90, 99):
+            print(f"p{pct}: {percentile(latencies, pct):.1f} ms")
+        if failures:
+            sys.exit(1)
+        return
+
+    service = ConversionService(args.maverick_template, args.talkgroups, getattr(args, "data_dir", None))
+    service.preload()
+    if args.command == "serve":
+        serve(service, args.host, args.port)
+    else:
+        serve_stdin(service, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+## Shared decode tables for the small fields every converter parses.
+## Exports repeat the same few values (tones, power levels, slots, color
+## codes, bandwidths) on every row, so each distinct string is decoded once
+## and the result is reused from a cache. Tones are checked against the
+## standard CTCSS and DCS tables and written the same way for every target.
+
+from functools import lru_cache
+
+# Standard CTCSS tones in Hz, as written in every output ("88.5", "100.0")
+CTCSS_TONES = (
+    "67.0", "69.3", "71.9", "74.4", "77.0", "79.7", "82.5", "85.4", "88.5", "91.5",
+    "94.8", "97.4", "100.0", "103.5", "107.2", "110.9", "114.8", "118.8", "123.0", "127.3",
+    "131.8", "136.5", "141.3", "146.2", "150.0", "151.4", "156.7", "159.8", "162.2", "165.5",
+    "167.9", "171.3", "173.8", "177.3", "179.9", "183.5", "186.2", "189.9", "192.8", "196.6",
+    "199.5", "203.5", "206.5", "210.7", "218.1", "225.7", "229.1", "233.6", "241.8", "250.3",
+    "254.1",
+)
+
+# Standard DCS codes (octal, three digits)
+DCS_CODES = (
+    "023", "025", "026", "031", "032", "036", "043", "047", "051", "053", "054", "065", "071",
+    "072", "073", "074", "114", "115", "116", "122", "125", "131", "132", "134", "143", "145",
+    "152", "155", "156", "162", "165", "172", "174", "205", "212", "223", "225", "226", "243",
+    "244", "245", "246", "251", "252", "255", "261", "263", "265", "266", "271", "274", "306",
+    "311", "315", "325", "331", "332", "343", "346", "351", "356", "364", "365", "371", "411",
+    "412", "413", "423", "431", "432", "445", "446", "452", "454", "455", "462", "464", "465",
+    "466", "503", "506", "516", "523", "526", "532", "546", "565", "606", "612", "624", "627",
+    "631", "632", "654", "662", "664", "703", "712", "723", "731", "732", "734", "743", "754",
+)
+
+_CTCSS = frozenset(CTCSS_TONES)
+_DCS = frozenset(DCS_CODES)
+_NO_TONE = frozenset(("", "NONE", "OFF", "0", "0.0"))
+
+# Distinct field values seen in a run are few; the bound only guards against junk input
+_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def decode_tone(text):
+    """Decode a CTCSS/DCS field into (tone, valid).
+
+    tone is "88.5" for CTCSS, "D023N" / "D023I" for DCS, or None for no
+    tone. valid is False when the value isn't a standard CTCSS tone or DCS
+    code; the cleaned-up text is still returned as the tone in that case.
+    """
+    if not text:
+        return None, True
+    s = str(text).strip()
+    upper = s.upper().replace("HZ", "").strip()
+    if upper in _NO_TONE:
+        return None, True
+
+    if upper[0] == "D" or upper[-1] in "NI" and upper[:-1].isdigit():
+        body = upper[1:] if upper[0] == "D" else upper
+        polarity = "N"
+        if body and body[-1] in "NIR":
+            polarity = "I" if body[-1] in "IR" else "N"
+            body = body[:-1]
+        if body.isdigit() and len(body) <= 3:
+            code = body.zfill(3)
+            return f"D{code}{polarity}", code in _DCS
+        return s, False
+
+    try:
+        tone = f"{float(upper):.1f}"
+    except ValueError:
+        return s, False
+    return tone, tone in _CTCSS
+
+
+def parse_tone(text):
+    """Normalize a CTCSS/DCS field ("88.5", "88.5 Hz", "D023N") to a tone string or None."""
+    return decode_tone(text)[0]
+
+
+def tone_is_valid(text):
+    """True for a blank field, a standard CTCSS tone or a standard DCS code."""
+    return decode_tone(text)[1]
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def parse_bandwidth(text):
+    """Parse "12.5K", "25KHz" or "12500" into Hz. Returns None if blank or invalid."""
+    if not text:
+        return None
+    s = str(text).strip().upper().replace("HZ", "")
+    try:
+        if s.endswith("K"):
+            return int(round(float(s[:-1]) * 1000))
+        return int(round(float(s)))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def parse_slot(text):
+    """Parse "TS1", "Slot 2" or "1" into a time slot number. Returns None if unknown."""
+    if not text:
+        return None
+    digits = "".join(ch for ch in str(text) if ch.isdigit())
+    return int(digits) if digits in ("1", "2") else None
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def parse_color_code(text):
+    """Parse a DMR color code (0-15). Returns None if blank or invalid."""
+    try:
+        cc = int(str(text).strip())
+    except (TypeError, ValueError):
+        return None
+    return cc if 0 <= cc <= 15 else None
+
+
+# CHIRP/TID radio power column to channel power
+CHIRP_POWER = {"8.0W": "High", "4.0W": "Low"}
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def power_to_code(power_str):
+    """Convert power string to H/M/L code."""
+    if "High" in power_str:
+        return "H"
+    elif "Low" in power_str:
+        return "L"
+    elif "Mid" in power_str or "Med" in power_str:
+        return "M"
+    return "H"  # default
+
+
+# H/M/L power codes back to power text, the inverse of power_to_code
+CODE_POWER = {"H": "High", "M": "Mid", "L": "Low"}
+CHIRP_POWER_TEXT = {"H": "8.0W", "M": "8.0W", "L": "4.0W"}  # CHIRP_POWER has no mid level
+FT3_POWER_TEXT = {"H": "High (5W)", "M": "Mid (2.5W)", "L": "Low (0.3W)"}
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def ctcss_dcs_to_field(tone_mode, ctcss, dcs):
+    """Determine sub-audio field for CTCSS/DCS."""
+    if tone_mode == "Tone" or tone_mode == "T Sql":
+        return ctcss.replace(" Hz", "")
+    elif tone_mode == "DCS":
+        return dcs
+    return "0"
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def ft3_tone(tone_mode, ctcss, dcs):
+    """Tone of an FT3D memory from its Tone Mode, CTCSS and DCS columns."""
+    tone = ctcss_dcs_to_field(tone_mode, ctcss, dcs)
+    if tone_mode == "DCS":
+        tone = f"D{tone}N"
+    return parse_tone(tone)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def chirp_tone(tone_mode, ctone, dtcs_code, dtcs_polarity):
+    """Tone of a CHIRP memory from its Tone, cToneFreq, DtcsCode and DtcsPolarity columns.
+
+    A DTCS memory uses DtcsCode and DtcsPolarity; any other mode, a blank
+    one included, uses cToneFreq, as the converters always have (see
+    read_chirp's blank_tone_off). tone_mode is None for an export without a
+    Tone column.
+    """
+    if tone_mode == "DTCS":
+        polarity = "I" if (dtcs_polarity or "N")[:1] == "R" else "N"
+        return parse_tone(f"D{dtcs_code}{polarity}")
+    return parse_tone(ctone)
@@ -0,0 +1,118 @@
+## Exact frequency parsing and formatting.
+## Frequencies are read from text straight into integer Hz, without going
+## through float, so "146.52" is always 146520000 and never 146519999.
+## Offsets are added and subtracted as integers and output is formatted
+## from the integer with divmod, so results are exact and reproducible.
+
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+from functools import lru_cache
+
+HZ_PER_MHZ = 1_000_000
+
+# Exports repeat the same few hundred frequencies; each distinct value is
+# parsed or formatted once per run and then served from the cache
+_CACHE_SIZE = 65536
+
+# Values above this are taken to be in Hz rather than MHz (see parse_hz)
+_AUTO_HZ_THRESHOLD = 1000 * HZ_PER_MHZ
+
+
+def _round_half_even(value, remainder, half):
+    """Round `value` up by one if `remainder` is past `half` (ties go to the even value)."""
+    if remainder > half or (remainder == half and value % 2):
+        return value + 1
+    return value
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def parse_mhz(text):
+    """Parse a frequency in MHz ("146.52", "146.520000", "-0.6") into integer Hz.
+
+    Digits past 1 Hz are rounded half to even. Returns None if the text is
+    blank or not a number.
+    """
+    if not text:
+        return None
+    s = str(text).strip()
+    whole, _, frac = s.partition(".")
+    # The usual form: plain digits with at most six decimals
+    if len(frac) <= 6 and s.isascii() and whole.isdigit() and (frac.isdigit() or not frac):
+        return int(whole + frac.ljust(6, "0"))
+
+    sign = 1
+    if s[:1] in "+-":
+        sign = -1 if s[0] == "-" else 1
+        s = s[1:]
+    whole, _, frac = s.partition(".")
+    if (whole.isdigit() or (not whole and frac)) and (not frac or frac.isdigit()) and whole.isascii() and frac.isascii():
+        hz = int(whole or "0") * HZ_PER_MHZ
+        if len(frac) <= 6:
+            return sign * (hz + int(frac.ljust(6, "0")))
+        rest = frac[6:]
+        hz = _round_half_even(hz + int(frac[:6]), int(rest), 5 * 10 ** (len(rest) - 1))
+        return sign * hz
+
+    # Exponents and other forms Decimal understands
+    try:
+        value = Decimal(str(text).strip()) * HZ_PER_MHZ
+        return int(value.to_integral_value(rounding=ROUND_HALF_EVEN))
+    except (InvalidOperation, ValueError, OverflowError):
+        return None
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def parse_hz(text):
+    """Parse a frequency given in Hz or MHz into integer Hz. Returns None if blank or invalid.
+
+    As before, a value above 1000 is taken to be Hz and anything else MHz.
+    """
+    micro = parse_mhz(text)  # the value times 1e6, exactly
+    if micro is None or micro <= _AUTO_HZ_THRESHOLD:
+        return micro
+    hz, rest = divmod(micro, HZ_PER_MHZ)
+    return _round_half_even(hz, rest, HZ_PER_MHZ // 2)
+
+
+def apply_offset(rx_hz, duplex, offset_hz):
+    """TX frequency from RX, a duplex sign ("+", "-", anything else = simplex) and an offset in Hz."""
+    if duplex == "+":
+        return rx_hz + offset_hz
+    if duplex == "-":
+        return rx_hz - offset_hz
+    return rx_hz
+
+
+def split_offset(rx_hz, tx_hz):
+    """(duplex, offset_hz) that apply_offset turns back into tx_hz: "+", "-" or "" for simplex."""
+    if tx_hz > rx_hz:
+        return "+", tx_hz - rx_hz
+    if tx_hz < rx_hz:
+        return "-", rx_hz - tx_hz
+    return "", 0
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def format_mhz(hz, places=5):
+    """Format integer Hz as MHz with `places` decimals (default five), or "" if unknown.
+
+    The last digit is rounded half to even on the exact value.
+    """
+    if hz is None:
+        return ""
+    if hz < 0:
+        return "-" + format_mhz(-hz, places)
+    if places >= 6:
+        mhz, rest = divmod(hz, HZ_PER_MHZ)
+        return f"{mhz}.{rest:06d}" + "0" * (places - 6)
+    unit = 10 ** (6 - places)
+    steps, rest = divmod(hz, unit)
+    steps = _round_half_even(steps, rest, unit // 2)
+    if places == 0:
+        return str(steps)
+    mhz, frac = divmod(steps, 10 ** places)
+    return f"{mhz}.{frac:0{places}d}"
+
+
+def format_hz(hz):
+    """Format integer Hz as a whole number of Hz, or "" if unknown."""
+    return "" if hz is None else str(hz)
@@ -1,80 +1,59 @@
-import csv
+## EXAMPLE USE
+## python ft3_to_uvpro.py                                   (ft3d.csv -> channels_out.csv)
+## python ft3_to_uvpro.py ft3d.csv channels_out.csv --profile profile.json
+## python ft3_to_uvpro.py ft3d.csv channels_out.csv --pipeline --workers 4   (see pipeline.py)
+## --validate problems.csv checks every row first, lists the problems and converts only rows without errors.
+## Without it a row with a frequency that isn't a number stops the conversion (a blank one is an empty memory).
 
-def freq_to_hz(freq_str):
-    """Convert frequency in MHz to Hz as integer string."""
-    try:
-        return str(int(float(freq_str) * 1_000_000))
-    except:
-        return "0"
+import argparse
+import os
+import sys
 
-def power_to_code(power_str):
-    """Convert power string to H/M/L code."""
-    if "High" in power_str:
-        return "H"
-    elif "Low" in power_str:
-        return "L"
-    elif "Mid" in power_str or "Med" in power_str:
-        return "M"
-    return "H"  # default
+import profiling
 
-def bandwidth_from_mode(mode_str):
-    """Return bandwidth based on FM/AM mode. Default to 25000."""
-    # If you want to handle narrow FM, modify this function.
-    return "25000"
+# The field helpers live in channel_engine and decode_tables; they are imported here so existing callers keep working
+from channel_engine import BUFFER_SIZE, UVProWriter, bandwidth_from_mode, convert, freq_to_hz, read_ft3
+from decode_tables import ctcss_dcs_to_field, power_to_code
 
-def ctcss_dcs_to_field(tone_mode, ctcss, dcs):
-    """Determine sub-audio field for CTCSS/DCS."""
-    if tone_mode == "Tone" or tone_mode == "T Sql":
-        return ctcss.replace(" Hz", "")
-    elif tone_mode == "DCS":
-        return dcs
-    return "0"
+def convert_ft3_to_uvpro(input_file, output_file, mapped=False, pipelined=False, workers=None, skip_rows=None):
+    """Convert a Yaesu FT3D memory export to a UV-Pro channels.csv. Returns the number of channels.
 
-def main():
-    import os
-    print("Current working directory:", os.getcwd())
+    With `mapped`, the input is read through a memory map (see mapped_csv.py).
+    Rows numbered in `skip_rows` (e.g. from validation.py) are left out.
+    With `pipelined`, reading, mapping and writing overlap on separate
+    threads, mapping in `workers` processes if more than one is given (see pipeline.py).
+    """
+    if pipelined:
+        from pipeline import convert_pipelined
+        with open(output_file, 'w', newline='', buffering=BUFFER_SIZE) as outfile:
+            as_is = not (mapped or skip_rows)
+            channels = None if as_is else read_ft3(input_file, mapped=mapped, skip_rows=skip_rows)
+            return convert_pipelined("ft3", input_file, "uvpro", outfile, channels, workers)
 
-    with open('ft3d.csv', newline='') as infile, open('channels_out.csv', 'w', newline='') as outfile:
-        reader = csv.DictReader(infile)
-        writer = csv.writer(outfile)
-        
-        # Write header as in channels.csv
-        writer.writerow([
-            "title", "tx_freq", "rx_freq", "tx_sub_audio(CTCSS=freq/DCS=number)", "rx_sub_audio(CTCSS=freq/DCS=number)",
-            "tx_power(H/M/L)", "bandwidth(12500/25000)", "scan(0=OFF/1=ON)", "talk around(0=OFF/1=ON)",
-            "pre_de_emph_bypass(0=OFF/1=ON)", "sign(0=OFF/1=ON)", "tx_dis(0=OFF/1=ON)", "mute(0=OFF/1=ON)",
-            "rx_modulation(0=FM/1=AM)", "tx_modulation(0=FM/1=AM)"
-        ])
-        
-        for row in reader:
-            title = row["Name"]
-            tx_freq = freq_to_hz(row["Transmit Frequency"])
-            rx_freq = freq_to_hz(row["Receive Frequency"])
-            tx_power = power_to_code(row["Tx Power"])
-            bandwidth = bandwidth_from_mode(row["Operating Mode"])
-            
-            # Sub-audio
-            tx_sub_audio = ctcss_dcs_to_field(row["Tone Mode"], row["CTCSS"], row["DCS"])
-            rx_sub_audio = ctcss_dcs_to_field(row["Tone Mode"], row["CTCSS"], row["DCS"])
-            
-            # Scan: 1 if not skipped, 0 if Skip == "On"
-            scan = "0" if row["Skip"] == "On" else "1"
-            
-            # The rest default to 0 unless otherwise specified
-            talk_around = "0"
-            pre_de_emph_bypass = "0"
-            sign = "0"
-            tx_dis = "0"
-            mute = "0"
-            
-            # Modulation: FM=0, AM=1
-            rx_modulation = "0" if row["Operating Mode"] == "FM" else "1"
-            tx_modulation = rx_modulation
-            
-            writer.writerow([
-                title, tx_freq, rx_freq, tx_sub_audio, rx_sub_audio, tx_power, bandwidth, scan,
-                talk_around, pre_de_emph_bypass, sign, tx_dis, mute, rx_modulation, tx_modulation
-            ])
+    with open(output_file, 'w', newline='') as outfile:
+        return convert(read_ft3(input_file, mapped=mapped, skip_rows=skip_rows), [UVProWriter(outfile)])
+
+def main(input_file='ft3d.csv', output_file='channels_out.csv', pipelined=False, workers=None, report_file=None):
+    print("Current working directory:", os.getcwd())
+    skip_rows = None
+    if report_file:
+        from validation import validate_to_report
+        with profiling.stage("validate"):
+            skip_rows = validate_to_report("ft3", input_file, report_file)
+    convert_ft3_to_uvpro(input_file, output_file, pipelined=pipelined, workers=workers, skip_rows=skip_rows)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Convert a Yaesu FT3D memory export to UV-Pro channels")
+    parser.add_argument("input", nargs="?", default="ft3d.csv", help="FT3D memory CSV (default: ft3d.csv)")
+    parser.add_argument("output", nargs="?", default="channels_out.csv", help="UV-Pro channel CSV (default: channels_out.csv)")
+    parser.add_argument("--pipeline", action="store_true", help="Overlap reading, mapping and writing")
+    parser.add_argument("--workers", type=int, help="With --pipeline, map in this many processes (default: none)")
+    parser.add_argument("--validate", metavar="REPORT", help="Write every problem row to REPORT and convert only rows without errors")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    try:
+        with profiling.profiled(args, [args.input], [args.output]):
+            main(args.input, args.output, args.pipeline, args.workers, args.validate)
+    except (OSError, ValueError) as e:
+        print(f"Error converting file: {e}", file=sys.stderr)
+        sys.exit(1)
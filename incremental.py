@@ -0,0 +1,161 @@
+## Incremental conversion.
+## A manifest saved next to the output (<output>.manifest) holds a content
+## hash, the "No." and the rendered output line of every source row. On the
+## next run only rows whose hash is new are mapped again; every other line
+## is copied from the manifest, so a re-run of an unchanged export costs
+## about as much as parsing and hashing it.
+##
+## "No." stays the same for unchanged rows. A changed row keeps the number
+## of the old row with the same name, and new rows are numbered after the
+## highest number used so far. The manifest is discarded, and everything
+## reconverted, when the source header or the converter's settings change
+## (bump MANIFEST_VERSION when a converter's output changes).
+##
+## EXAMPLE USE
+## python GD88ChannelsToRT3.py master.csv rt3.csv --incremental
+## python GD88toDB32channels.py master.csv dm32.csv --incremental
+## python GD88toMaverickChannels.py --incremental
+
+import csv
+import hashlib
+import marshal
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from channel_engine import open_source
+
+# Bump when any converter's output for the same input changes
+MANIFEST_VERSION = 2
+
+
+def default_manifest_file(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.name + ".manifest")
+
+
+def file_stamp(path):
+    """(mtime_ns, size) of a file that affects the output, for a manifest context."""
+    st = Path(path).stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def _load_manifest(manifest_file, context):
+    try:
+        with open(manifest_file, "rb") as f:
+            version, cached_context, entries = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return []
+    if version != MANIFEST_VERSION or cached_context != context:
+        return []
+    return entries
+
+
+def _save_manifest(manifest_file, context, entries):
+    tmp_file = manifest_file.with_name(manifest_file.name + ".tmp")
+    try:
+        with open(tmp_file, "wb") as f:
+            marshal.dump((MANIFEST_VERSION, context, entries), f)
+        os.replace(tmp_file, manifest_file)
+    except OSError as e:
+        print(f"Warning: could not write manifest '{manifest_file}': {e}", file=sys.stderr)
+
+
+def render_lines(rows):
+    """Render rows (lists) as CSV text, one string per row."""
+    lines = []
+    # csv.writer makes exactly one write() call per row
+    csv.writer(SimpleNamespace(write=lines.append)).writerows(rows)
+    return lines
+
+
+def convert_incremental(input_file, output_file, header_text, render, context=(), start_number=1,
+                        namer=None, skip_row=None, encoding=None, input_encoding="utf-8-sig",
+                        manifest_file=None):
+    """Convert only the rows of `input_file` that changed since the last run.
+
+    Args:
+        input_file: Source CSV (a path or open file).
+        output_file: Output CSV; it is always rewritten in full.
+        header_text (str): The output header line(s), written as is.
+        render: render(header, changed, new_number) maps the changed source
+            rows. `changed` is a list of (position, row, number): the row's
+            position among the rows read, its list of fields, and the "No."
+            to reuse, or None. It returns one
+            (number, line) per row, with line None for a row that produces
+            no output; new numbers come from calling new_number().
+        context (tuple): Settings that affect the output (format, template
+            file stamps...). A manifest from a different context is ignored.
+        start_number (int): First "No." when there is no manifest.
+        namer: namer(header) returns a function giving a row's channel
+            name, used to keep the number of a channel whose row changed.
+        skip_row: skip_row(row) is True for source rows to ignore
+            (default: rows with no non-empty field).
+
+    Returns:
+        (written, converted): output rows written and source rows that had to be mapped.
+    """
+    output_file = Path(output_file)
+    manifest_file = Path(manifest_file) if manifest_file else default_manifest_file(output_file)
+    skip_row = skip_row or (lambda row: not any(row))
+
+    with open_source(input_file, encoding=input_encoding) as infile:
+        reader = csv.reader(infile)
+        header = next(reader, [])
+        context = (tuple(header),) + tuple(context)
+        old = {key: (name, number, line) for key, name, number, line in _load_manifest(manifest_file, context)}
+
+        keys = []
+        changed = []
+        occurrences = {}
+        for row in reader:
+            if skip_row(row):
+                continue
+            position = len(keys)
+            digest = hashlib.blake2b("\x1f".join(row).encode("utf-8"), digest_size=16).digest()
+            # Identical rows are told apart by how many came before them
+            seen = occurrences.get(digest, 0)
+            occurrences[digest] = seen + 1
+            key = (digest, seen)
+            keys.append(key)
+            if key not in old:
+                changed.append((key, position, row))
+
+    # Numbers of old rows that are gone can be taken over by a changed row with the same name
+    kept = set(keys)
+    free_by_name = {}
+    for key, (name, number, _) in old.items():
+        if key not in kept and name and number is not None:
+            free_by_name.setdefault(name, number)
+
+    next_number = max((number for _, number, _ in old.values() if number is not None),
+                      default=start_number - 1) + 1
+
+    def new_number():
+        nonlocal next_number
+        next_number += 1
+        return next_number - 1
+
+    name_of = namer(header) if namer else (lambda row: None)
+    names = [name_of(row) for _, _, row in changed]
+    requests = [(position, row, free_by_name.pop(name, None) if name else None)
+                for (_, position, row), name in zip(changed, names)]
+    rendered = render(header, requests, new_number)
+
+    new = {key: (name, number, line)
+           for (key, _, _), name, (number, line) in zip(changed, names, rendered)}
+
+    entries = []
+    written = 0
+    with open(output_file, "w", newline="", encoding=encoding) as outfile:
+        outfile.write(header_text)
+        for key in keys:
+            name, number, line = old.get(key) or new[key]
+            entries.append((key, name, number, line))
+            if line is not None:
+                outfile.write(line)
+                written += 1
+
+    _save_manifest(manifest_file, context, entries)
+    return written, len(changed)
@@ -0,0 +1,220 @@
+## Table-style CSV reading for the channel readers.
+## A table has the source header and yields each row as a tuple holding
+## only the columns a reader asked for, so no dict is built per row and
+## unused fields are dropped straight away.
+##
+## MappedCSV reads the file through a read-only memory map, 256 KiB at a
+## time, and lets the kernel drop each block once it has been read. A
+## block without quotes or carriage returns (the usual export) is split on
+## "\n" and "," directly, stopping at the last wanted column; any other
+## block goes through csv.reader, so quoted fields, embedded line breaks
+## and "\r\n" line ends parse exactly as before. A UTF-8 BOM is skipped.
+## ReaderCSV does the same over csv.reader and also takes an open file.
+## read_blocks() cuts an open CSV file into blocks of whole records as text,
+## for GD88ContactsToRT3.py's process pool and pipeline.py's worker processes.
+##
+## EXAMPLE USE
+## python channel_engine.py gd88 master.csv --rt3 rt3.csv --mmap
+##
+##     with open_table("master.csv", mapped=True) as table:
+##         names = table.select(("CH Name", "RX Freq"))
+##         for name, rx in table.rows(names):
+##             ...
+
+import codecs
+import csv
+import io
+import mmap
+import os
+from itertools import islice
+from operator import itemgetter
+
+import profiling
+
+# Bytes mapped and decoded at a time; blocks are cut at record boundaries
+BLOCK_SIZE = 1 << 18
+
+# Rows ReaderCSV parses per batch
+READER_BATCH = 512
+
+
+class _Table:
+    """Shared header handling and projection; subclasses provide _batches()."""
+
+    header = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def select(self, names):
+        """The given column names that are in the header, in the given order, each once."""
+        present = set(self.header)
+        return list(dict.fromkeys(name for name in names if name in present))
+
+    def rows(self, names=None, skip_blank=False):
+        """Yield a tuple of the `names` fields of every row (all fields if None).
+
+        Every name must be in the header (see select). A repeated column
+        name reads its last column, as in csv.DictReader, and fields
+        missing from a short row are None. Empty lines are skipped, and
+        with skip_blank so are rows with no non-empty field.
+        """
+        for batch in self.batches(names, skip_blank):
+            yield from batch
+
+    def batches(self, names=None, skip_blank=False):
+        """Like rows(), but yields the row tuples in lists of a few thousand."""
+        index = {name: i for i, name in enumerate(self.header)}
+        positions = list(range(len(self.header))) if names is None else [index[name] for name in names]
+        if len(positions) == 1:
+            position = positions[0]
+            take = lambda row: (row[position],)  # noqa: E731
+        else:
+            take = itemgetter(*positions) if positions else (lambda row: ())
+        return self._batches(positions, take, skip_blank)
+
+
+def _project(records, positions, take, skip_blank):
+    """Project a list of csv.reader rows (lists) to tuples, padding short rows with None."""
+    if skip_blank:
+        records = list(filter(any, records))
+    width = max(positions, default=-1) + 1
+    if records and min(map(len, records)) < width:
+        for row in records:
+            if len(row) < width:
+                row += [None] * (width - len(row))
+    return list(map(take, records))
+
+
+class MappedCSV(_Table):
+    """A UTF-8 CSV file read through a read-only memory map (see the module notes)."""
+
+    def __init__(self, path, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            # An empty file can't be mapped
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        except BaseException:
+            self._file.close()
+            raise
+        if size and hasattr(mmap, "MADV_SEQUENTIAL"):
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+        self._start = len(codecs.BOM_UTF8) if self._map[:3] == codecs.BOM_UTF8 else 0
+
+        end, chunk = self._cut(self._start, 1)
+        self.header = next(csv.reader(io.StringIO(str(chunk, "utf-8"), newline="")), [])
+        self._start = end
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def _cut(self, start, length):
+        """(end, bytes) of the block of about `length` bytes at `start`, ending on a record boundary."""
+        data = self._map
+        size = len(data)
+        end = start + length
+        if end >= size:
+            end = size
+        else:
+            end = data.rfind(b"\n", start, end) + 1 or data.find(b"\n", end) + 1 or size
+        chunk = data[start:end]
+        # An odd number of quotes means the block ends inside a quoted field
+        quotes = chunk.count(b'"')
+        while quotes % 2 and end < size:
+            next_end = data.find(b"\n", end) + 1 or size
+            more = data[end:next_end]
+            quotes += more.count(b'"')
+            chunk += more
+            end = next_end
+        return end, chunk
+
+    def _release(self, end):
+        """Drop the mapped pages before `end` from memory once they have been read (where supported)."""
+        end -= end % mmap.PAGESIZE
+        if end and hasattr(mmap, "MADV_DONTNEED"):
+            self._map.madvise(mmap.MADV_DONTNEED, 0, end)
+
+    def _batches(self, positions, take, skip_blank):
+        # Fields past the last wanted column are left unsplit
+        splits = max(positions, default=-1) + 1
+        start = self._start
+        while start < len(self._map):
+            start, chunk = self._cut(start, self.block_size)
+            self._release(start)
+            text = str(chunk, "utf-8")
+            if "\r" in text and '"' not in text:
+                text = text.replace("\r\n", "\n")
+            if '"' in text or "\r" in text:
+                yield _project([row for row in csv.reader(io.StringIO(text, newline="")) if row],
+                               positions, take, skip_blank)
+                continue
+
+            lines = text.split("\n")
+            lines = [line for line in lines if line.strip(",")] if skip_blank else [line for line in lines if line]
+            try:
+                yield [take(line.split(",", splits)) for line in lines]
+            except IndexError:  # a short row
+                yield _project([line.split(",") for line in lines], positions, take, False)
+
+
+class ReaderCSV(_Table):
+    """The same table interface over csv.reader, for open files and non-mapped reading."""
+
+    def __init__(self, input_file, encoding=None):
+        if hasattr(input_file, "read"):
+            self._file, self._owned = input_file, False
+        else:
+            self._file, self._owned = open(input_file, newline="", encoding=encoding), True
+        self._reader = csv.reader(self._file)
+        self.header = next(self._reader, [])
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+
+    def _batches(self, positions, take, skip_blank):
+        while True:
+            batch = list(islice(self._reader, READER_BATCH))
+            if not batch:
+                return
+            yield _project([row for row in batch if row], positions, take, skip_blank)
+
+
+def open_table(input_file, encoding=None, mapped=False):
+    """Open a CSV source as a table: a MappedCSV for a path when `mapped`, else a ReaderCSV.
+
+    `encoding` only applies to ReaderCSV; mapped files are always read as UTF-8.
+    """
+    if mapped and not hasattr(input_file, "read"):
+        return MappedCSV(input_file)
+    return ReaderCSV(input_file, encoding=encoding)
+
+
+def read_blocks(infile, chunksize):
+    """Yield blocks of up to chunksize CSV records as text.
+
+    A block is only cut where the number of quote characters so far is
+    even, so a quoted field that spans lines is never split.
+    """
+    while True:
+        with profiling.stage("read"):
+            lines = list(islice(infile, chunksize))
+        if not lines:
+            return
+        block = "".join(lines)
+        while block.count('"') % 2:
+            line = infile.readline()
+            if not line:
+                break
+            block += line
+        yield block
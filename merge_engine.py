@@ -0,0 +1,124 @@
+## Duplicate detection for merged channel and contact lists.
+## Every item is reduced to a normalized key and looked up in a hash index,
+## so duplicates are found in one streaming pass instead of by pairwise
+## comparison. The first item with a key is kept and later ones are dropped
+## and recorded against it for the merge report.
+##
+## EXAMPLE USE
+## python merge_engine.py dm32 combined_dm32.csv --report merged.csv
+## python merge_engine.py gd88 master.csv other.csv --report merged.csv
+## python CHIRPtoDB32channels.py h8.csv DM32_converted.csv --dedupe --merge-report merged.csv
+
+import argparse
+import csv
+import sys
+
+import profiling
+from channel_engine import READERS, parse_tone
+
+
+def channel_key(channel):
+    """Normalized duplicate key for a Channel.
+
+    Two channels are duplicates when they have the same RX/TX frequency,
+    analog/digital mode and tones, and (for digital channels) the same
+    color code and time slot. A digital channel without a color code or
+    slot counts as CC 1 / slot 1, the values written for it by default.
+    Names, contacts and power are ignored.
+    """
+    rx_tone = parse_tone(channel.rx_tone)
+    tx_tone = parse_tone(channel.tx_tone)
+    if channel.digital:
+        cc = 1 if channel.color_code is None else channel.color_code
+        return (channel.rx_hz, channel.tx_hz, True, cc, channel.slot or 1, rx_tone, tx_tone)
+    return (channel.rx_hz, channel.tx_hz, False, None, None, rx_tone, tx_tone)
+
+
+def contact_key(call_type, dmr_id):
+    """Normalized duplicate key for a contact: its call type and DMR ID without leading zeros."""
+    dmr_id = (dmr_id or "").strip()
+    return call_type, dmr_id.lstrip("0") or dmr_id
+
+
+class Deduplicator:
+    """Streaming duplicate filter backed by a dict from key to the first item's label.
+
+    Memory grows with the number of unique keys, not with the input, and
+    only dropped items are recorded for the report.
+    """
+
+    def __init__(self, key=channel_key, label=lambda item: item.name):
+        self.key = key
+        self.label = label
+        self.index = {}
+        self.kept = 0
+        self.dropped = 0
+        self.merged = {}  # key -> labels of the dropped duplicates
+
+    def add_key(self, key, label):
+        """Record `key`. Returns True the first time it is seen, False for a duplicate."""
+        if key not in self.index:
+            self.index[key] = label
+            self.kept += 1
+            return True
+        self.dropped += 1
+        self.merged.setdefault(key, []).append(label)
+        return False
+
+    def add(self, item):
+        return self.add_key(self.key(item), self.label(item))
+
+    def seed(self, items):
+        """Index items that are already in the output so new copies of them are dropped."""
+        for item in items:
+            self.index.setdefault(self.key(item), self.label(item))
+
+    def unique(self, items):
+        """Yield only the items whose key hasn't been seen yet."""
+        for item in items:
+            if self.add(item):
+                yield item
+
+    def report(self, top=10):
+        """Summary lines for the merge: counts and the largest duplicate groups."""
+        lines = [f"Merge: kept {self.kept}, dropped {self.dropped} duplicate(s) "
+                 f"in {len(self.merged)} group(s)"]
+        groups = sorted(self.merged.items(), key=lambda item: -len(item[1]))
+        for key, labels in groups[:top]:
+            lines.append(f"  '{self.index[key]}' absorbed {len(labels)}: {', '.join(labels[:5])}"
+                         + (" ..." if len(labels) > 5 else ""))
+        return lines
+
+    def write_report(self, report_file):
+        """Write one CSV row per dropped item: the kept label, the dropped label and the key."""
+        with open(report_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Kept", "Dropped", "Key"])
+            for key, labels in self.merged.items():
+                for label in labels:
+                    writer.writerow([self.index[key], label, "|".join("" if k is None else str(k) for k in key)])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report duplicate channels across one or more exports")
+    parser.add_argument("source", choices=sorted(READERS), help="Format of the input files")
+    parser.add_argument("inputs", nargs="+", help="Channel CSV files, checked in order")
+    parser.add_argument("--report", help="Write every dropped duplicate to this CSV")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    dedupe = Deduplicator()
+    try:
+        with profiling.profiled(args, args.inputs, [args.report]):
+            for path in args.inputs:
+                with profiling.stage("dedupe"):
+                    for _ in dedupe.unique(READERS[args.source](path)):
+                        pass
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error reading channels: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print("\n".join(dedupe.report()))
+    if args.report:
+        dedupe.write_report(args.report)
+        print(f"Wrote merge report to '{args.report}'")
@@ -0,0 +1,249 @@
+## Overlapped read / map / write for large conversions.
+## A reader thread parses the source, the calling thread maps channels to
+## output rows and a writer thread formats and writes them through a large
+## buffer, with small bounded queues in between. While one stage waits on
+## the disk or a network share the others keep working, and memory stays
+## bounded by the queue depth rather than the file size. Batches go through
+## the queues in order, so the output is the same as a plain conversion.
+##
+## With workers > 1 the reader thread only cuts the file into blocks of
+## records and a process pool parses and maps them, at most two blocks per
+## worker in flight, which spreads the CPU work across cores.
+##
+## EXAMPLE USE
+## python CHIRPtoDB32channels.py h8.csv DM32_converted.csv --pipeline
+## python GD88ChannelsToRT3.py master.csv rt3.csv --pipeline --workers 4
+## python ft3_to_uvpro.py ft3d.csv channels_out.csv --pipeline
+
+import csv
+import io
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import profiling
+from channel_engine import READERS, WRITERS, check_pair, dm32_row, rt3_row, uvpro_row
+from mapped_csv import read_blocks
+
+# Channels per batch passed between the stages
+PIPELINE_BATCH = 2048
+
+# Batches each queue holds before the stage feeding it waits
+QUEUE_DEPTH = 8
+
+# Rows per target; a numbered target's "No." is filled in as rows are written
+ROW_FUNCS = {
+    "dm32": lambda channel: dm32_row(channel, None),
+    "rt3": rt3_row,
+    "uvpro": uvpro_row,
+}
+NUMBER_COLUMNS = {"dm32": WRITERS["dm32"].headers.index("No.")}
+
+# Source encodings, as the readers open them
+ENCODINGS = {"gd88": "utf-8-sig", "dm32": "utf-8-sig"}
+
+_DONE = object()
+
+
+class _Failed:
+    """Carries an exception from a stage thread to the thread reading its queue."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+class _StageThread(threading.Thread):
+    """Runs work(self) on its own thread; the work keeps its busy time, rows and error here."""
+
+    def __init__(self, name, work):
+        super().__init__(name=f"pipeline-{name}", daemon=True)
+        self.work = work
+        self.seconds = 0.0
+        self.rows = 0
+        self.error = None
+
+    def run(self):
+        self.work(self)
+
+
+def _drain(q, waited=None):
+    """Yield items from a stage queue until the stage is done, re-raising its error.
+
+    Seconds spent waiting for items are added to waited[0] if given.
+    """
+    while True:
+        if waited is None:
+            item = q.get()
+        else:
+            start = time.perf_counter()
+            item = q.get()
+            waited[0] += time.perf_counter() - start
+        if item is _DONE:
+            return
+        if isinstance(item, _Failed):
+            raise item.error
+        yield item
+
+
+def _read_stage(batches, out_queue, stop):
+    def work(stage):
+        try:
+            batches_iter = iter(batches)
+            while not stop.is_set():
+                start = time.perf_counter()
+                batch = next(batches_iter, _DONE)
+                stage.seconds += time.perf_counter() - start
+                if batch is _DONE:
+                    break
+                out_queue.put(batch)
+        except BaseException as e:
+            out_queue.put(_Failed(e))
+        else:
+            out_queue.put(_DONE)
+    return _StageThread("read", work)
+
+
+def _write_stage(outfile, in_queue, headers):
+    def work(stage):
+        writer = csv.writer(outfile)
+        try:
+            if headers:
+                writer.writerow(headers)
+            for rows in _drain(in_queue):
+                start = time.perf_counter()
+                writer.writerows(rows)
+                stage.seconds += time.perf_counter() - start
+                stage.rows += len(rows)
+        except BaseException as e:
+            stage.error = e
+            # Keep taking batches so the mapping stage never blocks on a full queue
+            for _ in _drain(in_queue):
+                pass
+    return _StageThread("write", work)
+
+
+def run_pipeline(batches, map_batches, outfile, headers=None, number_column=None, start_number=1):
+    """Read `batches` on a reader thread, map them with `map_batches` and write the rows on a writer thread.
+
+    map_batches(iterable of batches) yields a list of rows per batch, in
+    order. If `number_column` is given, that column of every row is filled
+    with a running number from `start_number`. Returns the number of rows
+    written.
+    """
+    read_queue = queue.Queue(QUEUE_DEPTH)
+    write_queue = queue.Queue(QUEUE_DEPTH)
+    stop = threading.Event()
+    reader = _read_stage(batches, read_queue, stop)
+    writer = _write_stage(outfile, write_queue, headers)
+    reader.start()
+    writer.start()
+
+    number = start_number
+    mapping = 0.0
+    waited = [0.0]
+    mapped = iter(map_batches(_drain(read_queue, waited)))
+    try:
+        while True:
+            start = time.perf_counter()
+            rows = next(mapped, None)
+            mapping += time.perf_counter() - start
+            if rows is None:
+                break
+            if number_column is not None:
+                for row in rows:
+                    row[number_column] = number
+                    number += 1
+            write_queue.put(rows)
+    finally:
+        # Shuts down a process pool still running if mapping failed
+        mapped.close()
+        write_queue.put(_DONE)
+        writer.join()
+        # On an error, let a reader blocked on a full queue finish
+        stop.set()
+        while reader.is_alive():
+            try:
+                read_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+    if writer.error is not None:
+        raise writer.error
+
+    profiler = profiling.active()
+    if profiler is not None:
+        profiler.add("read", reader.seconds, writer.rows)
+        profiler.add("map", mapping - waited[0], writer.rows)
+        profiler.add("write", writer.seconds, writer.rows)
+    return writer.rows
+
+
+def _map_channels(target):
+    row = ROW_FUNCS[target]
+
+    def map_batches(batches):
+        for batch in batches:
+            yield [row(channel) for channel in batch]
+    return map_batches
+
+
+def _map_block(source, target, header, block):
+    """Worker: parse a block of source records (under its header line) and map it to target rows."""
+    row = ROW_FUNCS[target]
+    return [row(channel) for channel in READERS[source](io.StringIO(header + block))]
+
+
+def _map_in_pool(source, target, workers):
+    def map_batches(blocks):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for header, block in blocks:
+                pending.append(pool.submit(_map_block, source, target, header, block))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    return map_batches
+
+
+def _channel_batches(channels):
+    channels = iter(channels)
+    while True:
+        batch = list(islice(channels, PIPELINE_BATCH))
+        if not batch:
+            return
+        yield batch
+
+
+def _text_blocks(input_file, encoding):
+    with open(input_file, newline="", encoding=encoding) as f:
+        header = f.readline()
+        for block in read_blocks(f, PIPELINE_BATCH):
+            yield header, block
+
+
+def convert_pipelined(source, input_file, target, outfile, channels=None, workers=None, write_header=True,
+                      start_number=1):
+    """Convert a source export to one target format with reading, mapping and writing overlapped.
+
+    `channels` (e.g. deduplicated or validated) replaces reading input_file
+    with the source's reader. With workers > 1 and no `channels`, blocks of
+    the file are parsed and mapped in a process pool instead. Rows are
+    written to the open `outfile`, after the header if `write_header`.
+    Returns the number of channels written.
+    """
+    check_pair(source, target)
+    headers = WRITERS[target].headers if write_header else None
+    if channels is None and workers and workers > 1:
+        batches = _text_blocks(input_file, ENCODINGS.get(source))
+        map_batches = _map_in_pool(source, target, workers)
+    else:
+        if channels is None:
+            channels = READERS[source](input_file)
+        batches = _channel_batches(channels)
+        map_batches = _map_channels(target)
+    return run_pipeline(batches, map_batches, outfile, headers, NUMBER_COLUMNS.get(target), start_number)
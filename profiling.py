@@ -0,0 +1,242 @@
+## Profiling for the converter entry points.
+## --profile profile.json records, for the whole run and for each stage,
+## the wall time, rows processed and peak traced memory (tracemalloc),
+## plus the bytes of every file read and written, and saves it all as one
+## JSON summary. --profile-pstats adds a cProfile dump of the run for
+## pstats/snakeviz. Without either option nothing is set up and the only
+## cost is one check per conversion.
+##
+## Conversions that go through channel_engine.convert() are split into
+## "read" (parsing and decoding the source) and one "write <Writer>" stage
+## per target (mapping, formatting and writing). These interleave row by
+## row, so their peak memory is reported on the enclosing "convert" stage.
+## tracemalloc slows allocation-heavy code down several times over; add
+## --profile-no-memory for stage times close to those of a normal run.
+##
+## EXAMPLE USE
+## python channel_engine.py gd88 master.csv --rt3 rt3.csv --profile profile.json
+## python GD88toMaverickChannels.py --profile profile.json --profile-pstats maverick.pstats
+## python -m pstats maverick.pstats
+
+import contextlib
+import cProfile
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+
+# The profiler of the run in progress, or None
+_active = None
+
+
+def active():
+    """The Profiler of the current run, or None when profiling is off."""
+    return _active
+
+
+class _Stage:
+    __slots__ = ("seconds", "rows", "peak_bytes")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.rows = 0
+        self.peak_bytes = None
+
+
+class Profiler:
+    """Per-stage wall time, rows and peak traced memory, and file sizes, for one run."""
+
+    def __init__(self, command):
+        self.command = command
+        self.stages = {}
+        self.files = {}
+        self._open = []  # stages being timed, innermost last
+
+    def _get(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = _Stage()
+        return stage
+
+    @contextlib.contextmanager
+    def stage(self, name, rows=0):
+        """Time a block as stage `name`, with its peak traced memory. Stages may nest and repeat."""
+        stage = self._get(name)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # Keep the enclosing stage's peak so far before restarting the count
+            if self._open:
+                self._raise_peak(self._open[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._open.append(stage)
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - start
+            stage.rows += rows
+            self._open.pop()
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                self._raise_peak(stage, peak)
+                if self._open:
+                    self._raise_peak(self._open[-1], peak)
+
+    @staticmethod
+    def _raise_peak(stage, peak):
+        if stage.peak_bytes is None or peak > stage.peak_bytes:
+            stage.peak_bytes = peak
+
+    def add(self, name, seconds, rows=0):
+        """Add time and rows measured elsewhere to stage `name`."""
+        stage = self._get(name)
+        stage.seconds += seconds
+        stage.rows += rows
+
+    def file(self, path, mode):
+        """Record a file that was "read" or "written"; its size is taken when the summary is made."""
+        self.files[str(path)] = mode
+
+    def convert(self, channels, writers):
+        """channel_engine.convert(), timing the reader and each writer separately."""
+        clock = time.perf_counter
+        names = [f"write {type(writer).__name__}" for writer in writers]
+        spent = [0.0] * len(writers)
+        read = 0.0
+        count = 0
+        with self.stage("convert") as stage:
+            channels = iter(channels)
+            start = clock()
+            for channel in channels:
+                now = clock()
+                read += now - start
+                for i, writer in enumerate(writers):
+                    writer.write(channel)
+                    done = clock()
+                    spent[i] += done - now
+                    now = done
+                count += 1
+                start = clock()
+            read += clock() - start
+            stage.rows += count
+        self.add("read", read, count)
+        for name, seconds in zip(names, spent):
+            self.add(name, seconds, count)
+        return count
+
+    def summary(self):
+        """The run as a dict ready for JSON."""
+        total = self.stages.get("total")
+        stages = []
+        for name, stage in self.stages.items():
+            if name == "total":
+                continue
+            stages.append({
+                "name": name,
+                "seconds": round(stage.seconds, 6),
+                "rows": stage.rows,
+                "rows_per_sec": round(stage.rows / stage.seconds, 1) if stage.rows and stage.seconds else None,
+                "peak_memory_bytes": stage.peak_bytes,
+            })
+        files = []
+        for path, mode in self.files.items():
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = None
+            files.append({"path": path, "mode": mode, "bytes": size})
+        return {
+            "command": self.command,
+            "argv": sys.argv[1:],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seconds": round(total.seconds, 6) if total else None,
+            "peak_memory_bytes": total.peak_bytes if total else None,
+            "bytes_read": sum(f["bytes"] or 0 for f in files if f["mode"] == "read"),
+            "bytes_written": sum(f["bytes"] or 0 for f in files if f["mode"] == "written"),
+            "stages": stages,
+            "files": files,
+        }
+
+
+def stage(name, rows=0):
+    """Profiler.stage() of the current run, or a no-op context when profiling is off.
+
+    Stages nest, so they are only recorded on the main thread; other
+    threads report their time with Profiler.add().
+    """
+    if _active is None or threading.current_thread() is not threading.main_thread():
+        return contextlib.nullcontext()
+    return _active.stage(name, rows)
+
+
+def count(name, rows):
+    """Add rows to stage `name` of the current run, if any."""
+    if _active is not None:
+        _active.add(name, 0.0, rows)
+
+
+def add_arguments(parser):
+    """Add --profile and --profile-pstats to an entry point's argument parser."""
+    parser.add_argument("--profile", metavar="JSON",
+                        help="Write stage times, rows, bytes and peak memory of this run to JSON")
+    parser.add_argument("--profile-pstats", metavar="FILE", help="Also run under cProfile and dump its stats to FILE")
+    parser.add_argument("--profile-no-memory", action="store_true",
+                        help="Don't trace memory with --profile, so stage times aren't slowed down")
+
+
+@contextlib.contextmanager
+def profiled(args, inputs=(), outputs=()):
+    """Profile the block as the "total" stage when args.profile or args.profile_pstats is set.
+
+    Yields the Profiler, or None when profiling is off. `inputs` and
+    `outputs` are the paths read and written (None entries are ignored);
+    more can be added with Profiler.file() as they become known.
+    """
+    global _active
+    profile_file = getattr(args, "profile", None)
+    pstats_file = getattr(args, "profile_pstats", None)
+    if not profile_file and not pstats_file:
+        yield None
+        return
+
+    profiler = Profiler(os.path.basename(sys.argv[0]))
+    for paths, mode in ((inputs, "read"), (outputs, "written")):
+        for path in paths:
+            if path is not None:
+                profiler.file(path, mode)
+    trace_memory = not getattr(args, "profile_no_memory", False)
+    if trace_memory:
+        tracemalloc.start()
+    code_profile = cProfile.Profile() if pstats_file else None
+    _active = profiler
+    try:
+        with profiler.stage("total"):
+            if code_profile is not None:
+                code_profile.enable()
+            try:
+                yield profiler
+            finally:
+                if code_profile is not None:
+                    code_profile.disable()
+    finally:
+        _active = None
+        if trace_memory:
+            tracemalloc.stop()
+        summary = profiler.summary()
+        if pstats_file:
+            code_profile.dump_stats(pstats_file)
+            summary["pstats"] = str(pstats_file)
+        if profile_file:
+            with open(profile_file, "w") as f:
+                json.dump(summary, f, indent=2)
+        line = f"Profile: {summary['seconds']:.3f}s"
+        if trace_memory:
+            line += f", peak {summary['peak_memory_bytes'] / 1e6:.1f} MB traced"
+        if profile_file:
+            line += f", written to '{profile_file}'"
+        print(line, file=sys.stderr)
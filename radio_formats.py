@@ -0,0 +1,224 @@
+## Column layouts for every target radio format, defined once.
+## Converters copy a format's precomputed default row and fill in only the
+## fields that change per channel, then write it with csv.writer.
+
+
+class RadioFormat:
+    """Ordered CSV headers for one radio format plus a constant default row."""
+
+    __slots__ = ("name", "headers", "index", "defaults")
+
+    def __init__(self, name, headers, defaults=None):
+        self.name = name
+        self.headers = list(headers)
+        self.index = {header: i for i, header in enumerate(self.headers)}
+        if len(self.index) != len(self.headers):
+            raise ValueError(f"{name}: duplicate column names")
+        self.defaults = [""] * len(self.headers)
+        self.defaults = self.template(defaults or {})
+
+    def template(self, values):
+        """Return a new default row (list) with `values` ({column: value}) filled in."""
+        row = list(self.defaults)
+        for column, value in values.items():
+            row[self.index[column]] = value
+        return row
+
+    def indices(self, *columns):
+        """Resolve column names to list positions, once, for use in a hot loop."""
+        return tuple(self.index[column] for column in columns)
+
+
+DM32 = RadioFormat("dm32", [
+    "No.", "Channel Name", "Channel Type", "RX Frequency[MHz]", "TX Frequency[MHz]",
+    "Power", "Band Width", "Scan List", "TX Admit", "Emergency System", "Squelch Level",
+    "APRS Report Type", "Forbid TX", "APRS Receive", "Forbid Talkaround", "Auto Scan",
+    "Lone Work", "Emergency Indicator", "Emergency ACK", "Analog APRS PTT Mode",
+    "Digital APRS PTT Mode", "TX Contact", "RX Group List", "Color Code", "Time Slot",
+    "Encryption", "Encryption ID", "APRS Report Channel", "Direct Dual Mode",
+    "Private Confirm", "Short Data Confirm", "DMR ID", "CTC/DCS Decode", "CTC/DCS Encode",
+    "Scramble", "RX Squelch Mode", "Signaling Type", "PTT ID", "VOX Function", "PTT ID Display"
+], {
+    "Scan List": "None",
+    "TX Admit": "Always",
+    "Emergency System": "None",
+    "Squelch Level": "3",
+    "APRS Report Type": "Off",
+    "Forbid TX": "0",
+    "APRS Receive": "0",
+    "Forbid Talkaround": "0",
+    "Auto Scan": "0",
+    "Lone Work": "0",
+    "Emergency Indicator": "0",
+    "Emergency ACK": "0",
+    "Analog APRS PTT Mode": "0",
+    "Digital APRS PTT Mode": "0",
+    "Color Code": "1",
+    "Time Slot": "Slot 1",
+    "Encryption": "0",
+    "Encryption ID": "None",
+    "APRS Report Channel": "1",
+    "Direct Dual Mode": "0",
+    "Private Confirm": "0",
+    "Short Data Confirm": "0",
+    "DMR ID": "DM32",
+    "CTC/DCS Decode": "None",
+    "CTC/DCS Encode": "None",
+    "Scramble": "None",
+    "RX Squelch Mode": "Carrier/CTC",
+    "Signaling Type": "None",
+    "PTT ID": "OFF",
+    "VOX Function": "0",
+    "PTT ID Display": "0"
+})
+
+# The second DM32 default set, written by the GD88 converters (GD88toDB32channels.py
+# and GD88toAllFormats.py --dm32): the CPS defaults with their own TX Admit and DMR ID
+DM32_GD88_DEFAULTS = DM32.template({"TX Admit": "Allow TX", "DMR ID": "Radio 1"})
+
+RT3_CHANNELS = RadioFormat("rt3", [
+    "Channel Mode", "Channel Name", "RX Frequency(MHz)", "TX Frequency(MHz)", "Band Width",
+    "Scan List", "Squelch", "RX Ref Frequency", "TX Ref Frequency", "TOT[s]", "TOT Rekey Delay[s]",
+    "Power", "Admit Criteria", "Auto Scan", "Rx Only", "Lone Worker", "VOX", "Allow Talkaround",
+    "Send GPS Info", "Receive GPS Info", "Private Call Confirmed", "Emergency Alarm Ack",
+    "Data Call Confirmed", "Allow Interrupt", "DCDM Switch", "Leader/MS", "Emergency System",
+    "Contact Name", "Group List", "Color Code", "Repeater Slot", "In Call Criteria", "Privacy",
+    "Privacy No.", "GPS System", "CTCSS/DCS Dec", "CTCSS/DCS Enc", "Rx Signaling System",
+    "Tx Signaling System", "QT Reverse", "Non-QT/DQT Turn-off Freq", "Display PTT ID",
+    "Reverse Burst/Turn-off Code", "Decode 1", "Decode 2", "Decode 3", "Decode 4", "Decode 5",
+    "Decode 6", "Decode 7", "Decode 8"
+], {
+    "Band Width": "0",
+    "Scan List": "0",
+    "Squelch": "3",
+    "RX Ref Frequency": "0",
+    "TX Ref Frequency": "0",
+    "TOT[s]": "4",
+    "TOT Rekey Delay[s]": "0",
+    "Admit Criteria": "0",
+    "Auto Scan": "0",
+    "Rx Only": "0",
+    "Lone Worker": "0",
+    "VOX": "0",
+    "Allow Talkaround": "0",
+    "Send GPS Info": "0",
+    "Receive GPS Info": "0",
+    "Private Call Confirmed": "0",
+    "Emergency Alarm Ack": "0",
+    "Data Call Confirmed": "0",
+    "Allow Interrupt": "0",
+    "DCDM Switch": "1",
+    "Leader/MS": "0",
+    "Emergency System": "1",
+    "Contact Name": "None",
+    "Group List": "None",
+    "Color Code": "1",
+    "In Call Criteria": "1",
+    "Privacy": "0",
+    "Privacy No.": "0",
+    "GPS System": "0",
+    "CTCSS/DCS Dec": "None",
+    "CTCSS/DCS Enc": "None",
+    "Rx Signaling System": "0",
+    "Tx Signaling System": "0",
+    "QT Reverse": "0",
+    "Non-QT/DQT Turn-off Freq": "0",
+    "Display PTT ID": "0",
+    "Reverse Burst/Turn-off Code": "0",
+    "Decode 1": "0",
+    "Decode 2": "0",
+    "Decode 3": "0",
+    "Decode 4": "0",
+    "Decode 5": "0",
+    "Decode 6": "0",
+    "Decode 7": "0",
+    "Decode 8": "0"
+})
+
+RT3_CONTACTS = RadioFormat("rt3-contacts", [
+    "Contact Name", "Call Type", "Call ID", "Call Receive Tone"
+], {
+    "Call Type": "1",
+    "Call Receive Tone": "0"
+})
+
+UV_PRO = RadioFormat("uvpro", [
+    "title", "tx_freq", "rx_freq", "tx_sub_audio(CTCSS=freq/DCS=number)", "rx_sub_audio(CTCSS=freq/DCS=number)",
+    "tx_power(H/M/L)", "bandwidth(12500/25000)", "scan(0=OFF/1=ON)", "talk around(0=OFF/1=ON)",
+    "pre_de_emph_bypass(0=OFF/1=ON)", "sign(0=OFF/1=ON)", "tx_dis(0=OFF/1=ON)", "mute(0=OFF/1=ON)",
+    "rx_modulation(0=FM/1=AM)", "tx_modulation(0=FM/1=AM)"
+], {
+    "tx_sub_audio(CTCSS=freq/DCS=number)": "0",
+    "rx_sub_audio(CTCSS=freq/DCS=number)": "0",
+    "tx_power(H/M/L)": "H",
+    "bandwidth(12500/25000)": "25000",
+    "scan(0=OFF/1=ON)": "1",
+    "talk around(0=OFF/1=ON)": "0",
+    "pre_de_emph_bypass(0=OFF/1=ON)": "0",
+    "sign(0=OFF/1=ON)": "0",
+    "tx_dis(0=OFF/1=ON)": "0",
+    "mute(0=OFF/1=ON)": "0",
+    "rx_modulation(0=FM/1=AM)": "0",
+    "tx_modulation(0=FM/1=AM)": "0"
+})
+
+# Source formats, written when converting back (e.g. DM32 -> CHIRP) to check a migration
+CHIRP = RadioFormat("chirp", [
+    "Location", "Name", "Frequency", "Duplex", "Offset", "Tone", "rToneFreq", "cToneFreq",
+    "DtcsCode", "DtcsPolarity", "Mode", "TStep", "Skip", "Power", "Comment"
+], {
+    "Offset": "0.000000",
+    "rToneFreq": "88.5",
+    "cToneFreq": "88.5",
+    "DtcsCode": "023",
+    "DtcsPolarity": "NN",
+    "Mode": "FM",
+    "TStep": "5.00",
+    "Power": "8.0W"
+})
+
+FT3 = RadioFormat("ft3", [
+    "Channel No", "Priority CH", "Receive Frequency", "Transmit Frequency", "Offset Frequency",
+    "Offset Direction", "AUTO MODE", "Operating Mode", "DIG/ANALOG", "TAG", "Name", "Tone Mode",
+    "CTCSS", "DCS", "DCS Polarity", "User CTCSS", "RX DG-ID", "TX DG-ID", "Tx Power", "Skip",
+    "AUTO STEP", "Step", "Memory Mask", "ATT", "S-Meter SQL", "Bell", "Narrow", "Clock Shift",
+    "BANK1", "Comment"
+], {
+    "Priority CH": "OFF",
+    "AUTO MODE": "ON",
+    "Operating Mode": "FM",
+    "DIG/ANALOG": "AMS",
+    "TAG": "OFF",
+    "Tone Mode": "OFF",
+    "CTCSS": "88.5 Hz",
+    "DCS": "023",
+    "DCS Polarity": "RX Normal TX Normal",
+    "User CTCSS": "1500 Hz",
+    "RX DG-ID": "RX 00",
+    "TX DG-ID": "TX 00",
+    "Tx Power": "High (5W)",
+    "Skip": "OFF",
+    "AUTO STEP": "ON",
+    "Step": "5.0KHz",
+    "Memory Mask": "OFF",
+    "ATT": "OFF",
+    "S-Meter SQL": "OFF",
+    "Bell": "OFF",
+    "Narrow": "OFF",
+    "Clock Shift": "OFF"
+})
+
+# Zone and scan list files written by channel_planner.py; members are channel names joined with "|"
+ZONES = RadioFormat("zones", ["No.", "Zone Name", "Channel Members"])
+
+SCAN_LISTS = RadioFormat("scan-lists", ["No.", "Scan List Name", "Channel Members"])
+
+FORMATS = {fmt.name: fmt for fmt in (DM32, RT3_CHANNELS, RT3_CONTACTS, UV_PRO, CHIRP, FT3, ZONES, SCAN_LISTS)}
+
+
+def get_format(name):
+    """Look up a registered format by name, e.g. "dm32" or "rt3"."""
+    try:
+        return FORMATS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown radio format '{name}'. Known formats: {', '.join(FORMATS)}") from None
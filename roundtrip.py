@@ -0,0 +1,257 @@
+## Round-trip diff of a source export against a converted file read back.
+## Both files are read with their format's reader and every channel is
+## reduced to a canonical record of the fields the two formats both carry
+## (tones as "88.5"/"D023N", power as H/M/L, frequencies in Hz...). The
+## source records are counted by hash, the converted file is streamed
+## against the counts, and only channels left unmatched are kept, so the
+## diff is O(n) and order-independent. Unmatched channels with the same
+## name are reported as changed, field by field; the rest as missing or
+## extra. Fields only one of the formats carries are listed, not compared.
+##
+## Rows are numbered as the readers count them (see validation.py).
+##
+## EXAMPLE USE
+## python roundtrip.py chirp h8.csv dm32 DM32_converted.csv
+## python roundtrip.py gd88 master.csv dm32 dm32.csv --report diff.csv
+## python channel_engine.py uvpro channels_out.csv --ft3 ft3d_back.csv
+## python roundtrip.py ft3 ft3d.csv ft3 ft3d_back.csv
+## python check_roundtrip.py   (golden corpus and throughput check)
+
+import argparse
+import csv
+import sys
+from collections import Counter, defaultdict, deque
+
+import profiling
+from channel_engine import READERS
+from decode_tables import power_to_code
+
+# Canonical fields each format's reader gets back from what its writer (or CPS) wrote
+FORMAT_FIELDS = {
+    "gd88": ("name", "rx_hz", "tx_hz", "digital", "power", "bandwidth_hz", "color_code", "slot", "rx_tone",
+             "tx_tone", "contact", "rx_group", "scan_list"),
+    "dm32": ("name", "rx_hz", "tx_hz", "digital", "power", "bandwidth_hz", "color_code", "slot", "rx_tone",
+             "tx_tone", "contact", "rx_group", "scan_list"),
+    "chirp": ("name", "rx_hz", "tx_hz", "digital", "modulation", "power", "rx_tone", "tx_tone"),
+    "ft3": ("name", "rx_hz", "tx_hz", "modulation", "power", "rx_tone", "tx_tone", "skip"),
+    "uvpro": ("name", "rx_hz", "tx_hz", "modulation", "power", "rx_tone", "tx_tone", "skip"),
+}
+
+REPORT_HEADERS = ["Source Row", "Converted Row", "Name", "Field", "Source", "Converted"]
+
+# Reader options for a file this tree's writers produced, as opposed to a CPS or CHIRP export:
+# ChirpWriter leaves Tone blank on a channel without a tone
+CONVERTED_READ = {"chirp": {"blank_tone_off": True}}
+
+
+def _list_name(value):
+    value = (value or "").strip()
+    return "" if value.upper() == "NONE" else value
+
+
+def _digital_default(value, channel):
+    # On a digital channel an unset color code or slot takes the CPS default of 1
+    if not channel.digital:
+        return None
+    return 1 if value is None else value
+
+
+CANONICAL = {
+    "name": lambda channel: channel.name or "",
+    "rx_hz": lambda channel: channel.rx_hz or 0,
+    "tx_hz": lambda channel: channel.tx_hz or 0,
+    "digital": lambda channel: bool(channel.digital),
+    "modulation": lambda channel: "AM" if (channel.mode or "").upper() == "AM" else "FM",
+    "power": lambda channel: power_to_code(channel.power or ""),
+    "bandwidth_hz": lambda channel: channel.bandwidth_hz,
+    "color_code": lambda channel: _digital_default(channel.color_code, channel),
+    "slot": lambda channel: _digital_default(channel.slot, channel),
+    "rx_tone": lambda channel: channel.rx_tone,
+    "tx_tone": lambda channel: channel.tx_tone,
+    "contact": lambda channel: _list_name(channel.contact),
+    "rx_group": lambda channel: _list_name(channel.rx_group),
+    "scan_list": lambda channel: _list_name(channel.scan_list),
+    "skip": lambda channel: bool(channel.skip),
+}
+
+
+def compared_fields(source, target):
+    """(compared, not compared): the source's fields the target also carries, and the rest."""
+    carried = set(FORMAT_FIELDS[target])
+    fields = FORMAT_FIELDS[source]
+    return (tuple(field for field in fields if field in carried),
+            tuple(field for field in fields if field not in carried))
+
+
+def canonical(fields):
+    """A function turning a Channel into its canonical record (a tuple) on `fields`."""
+    getters = tuple(CANONICAL[field] for field in fields)
+    return lambda channel: tuple(get(channel) for get in getters)
+
+
+class RoundTripDiff:
+    """Result of diff_channels(). changed holds (source row, converted row, source record, converted record);
+    missing and extra hold (row, record)."""
+
+    __slots__ = ("fields", "source_rows", "converted_rows", "changed", "missing", "extra")
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.source_rows = 0
+        self.converted_rows = 0
+        self.changed = []
+        self.missing = []
+        self.extra = []
+
+    @property
+    def matched(self):
+        return self.source_rows - len(self.changed) - len(self.missing)
+
+    def __bool__(self):
+        """True if the two channel sets differ."""
+        return bool(self.changed or self.missing or self.extra)
+
+
+def diff_channels(read_source, read_converted, fields):
+    """Compare two channel sets on `fields`, ignoring order, and return a RoundTripDiff.
+
+    read_source() and read_converted() each return an iterable of Channels.
+    The converted channels are read once; the source is read a second time
+    only to pick out the records of unmatched channels.
+    """
+    record = canonical(fields)
+    result = RoundTripDiff(fields)
+
+    counts = Counter()
+    for channel in read_source():
+        counts[hash(record(channel))] += 1
+        result.source_rows += 1
+
+    extra = []
+    for channel in read_converted():
+        result.converted_rows += 1
+        key = record(channel)
+        h = hash(key)
+        if counts[h]:
+            counts[h] -= 1
+        else:
+            extra.append((result.converted_rows, key))
+
+    unmatched = +counts
+    missing = []
+    if unmatched:
+        for number, channel in enumerate(read_source(), start=1):
+            key = record(channel)
+            h = hash(key)
+            if unmatched[h]:
+                unmatched[h] -= 1
+                missing.append((number, key))
+
+    # Pair what is left by name, in order, so a changed channel shows its fields
+    if "name" in fields:
+        name_at = fields.index("name")
+        extra_by_name = defaultdict(deque)
+        for item in extra:
+            extra_by_name[item[1][name_at]].append(item)
+        for number, key in missing:
+            candidates = extra_by_name.get(key[name_at])
+            if candidates:
+                other_number, other_key = candidates.popleft()
+                result.changed.append((number, other_number, key, other_key))
+            else:
+                result.missing.append((number, key))
+        paired = {other_number for _, other_number, _, _ in result.changed}
+        result.extra = [item for item in extra if item[0] not in paired]
+    else:
+        result.missing = missing
+        result.extra = extra
+    return result
+
+
+def report_rows(result):
+    """Report lines for a RoundTripDiff: one per changed field, one per missing or extra channel."""
+    fields = result.fields
+    name_at = fields.index("name") if "name" in fields else None
+
+    def name(key):
+        return "" if name_at is None else key[name_at]
+
+    for number, other_number, key, other_key in result.changed:
+        for field, value, other in zip(fields, key, other_key):
+            if value != other:
+                yield [number, other_number, name(key), field, value, other]
+    for number, key in result.missing:
+        yield [number, "", name(key), "channel", "present", "missing"]
+    for number, key in result.extra:
+        yield ["", number, name(key), "channel", "missing", "present"]
+
+
+def write_report(result, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(REPORT_HEADERS)
+        writer.writerows(report_rows(result))
+
+
+def summary(result, skipped=()):
+    """Summary lines: counts, then the fields that weren't compared."""
+    lines = [f"{result.source_rows} source and {result.converted_rows} converted channels compared on "
+             f"{', '.join(result.fields)}: {result.matched} match, {len(result.changed)} changed, "
+             f"{len(result.missing)} missing, {len(result.extra)} extra"]
+    if skipped:
+        lines.append(f"Not compared (not carried by both formats): {', '.join(skipped)}")
+    return lines
+
+
+def read_converted(fmt, converted_file, mapped=False):
+    """Read a file converted to `fmt` by this tree (see CONVERTED_READ)."""
+    return READERS[fmt](converted_file, mapped=mapped, **CONVERTED_READ.get(fmt, {}))
+
+
+def diff_files(source, input_file, target, converted_file, mapped=False):
+    """Diff a source export against a converted file. Returns (RoundTripDiff, fields not compared)."""
+    fields, skipped = compared_fields(source, target)
+    result = diff_channels(lambda: READERS[source](input_file, mapped=mapped),
+                           lambda: read_converted(target, converted_file, mapped), fields)
+    return result, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a source export with a converted file read back")
+    parser.add_argument("source", choices=sorted(FORMAT_FIELDS), help="Source export format")
+    parser.add_argument("input", help="Source export CSV")
+    parser.add_argument("target", choices=sorted(FORMAT_FIELDS), help="Format of the converted file")
+    parser.add_argument("converted", help="Converted CSV (a target export, or one converted back to the source format)")
+    parser.add_argument("--report", help="Write every difference to this CSV")
+    parser.add_argument("--show", type=int, default=10, help="Differences to print (default: 10)")
+    parser.add_argument("--mmap", action="store_true", help="Read both files through a memory map (UTF-8 only)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    outputs = [args.report] if args.report else []
+    with profiling.profiled(args, [args.input, args.converted], outputs):
+        with profiling.stage("diff"):
+            result, skipped = diff_files(args.source, args.input, args.target, args.converted, args.mmap)
+        if args.report:
+            with profiling.stage("write report"):
+                write_report(result, args.report)
+
+    print("\n".join(summary(result, skipped)))
+    for i, row in enumerate(report_rows(result)):
+        if i == args.show:
+            print("  ...")
+            break
+        source_row, converted_row, name, field, value, other = row
+        print(f"  source row {source_row or '-'} / converted row {converted_row or '-'} {name!r}: "
+              f"{field} {value!r} -> {other!r}")
+    if args.report:
+        print(f"Wrote the differences to '{args.report}'")
+    sys.exit(1 if result else 0)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error comparing files: {e}", file=sys.stderr)
+        sys.exit(2)
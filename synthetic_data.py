@@ -0,0 +1,188 @@
+## Seeded synthetic source exports for benchmarks and tests.
+## The same seed and row count always produce the same file.
+##
+## EXAMPLE USE
+## python synthetic_data.py gd88 100000 gd88.csv
+## python synthetic_data.py chirp 1000000 h8.csv --seed 7
+
+import argparse
+import csv
+import random
+
+GD88_CHANNEL_HEADERS = [
+    "No.", "CH Name", "Type", "RX Freq", "TX Freq", "Power", "Bandwidth", "Scan List Name",
+    "Contact Name", "RX Group Name", "RX CC", "TX CC", "RX TS", "TX TS", "RX Tone", "TX Tone"
+]
+
+GD88_CONTACT_HEADERS = ["No.", "Name", "DMR ID", "Type"]
+
+CHIRP_HEADERS = [
+    "Location", "Name", "Frequency", "Duplex", "Offset", "Tone", "rToneFreq", "cToneFreq",
+    "DtcsCode", "DtcsPolarity", "Mode", "TStep", "Skip", "Power", "Comment"
+]
+
+FT3_HEADERS = [
+    "Channel No", "Priority CH", "Receive Frequency", "Transmit Frequency", "Offset Frequency",
+    "Offset Direction", "AUTO MODE", "Operating Mode", "DIG/ANALOG", "TAG", "Name", "Tone Mode",
+    "CTCSS", "DCS", "DCS Polarity", "User CTCSS", "RX DG-ID", "TX DG-ID", "Tx Power", "Skip",
+    "AUTO STEP", "Step", "Memory Mask", "ATT", "S-Meter SQL", "Bell", "Narrow", "Clock Shift",
+    "BANK1", "Comment"
+]
+
+TALKGROUP_HEADERS = ["No.", "Radio ID", "Name", "Call Type", "Call Alert"]
+
+MAVERICK_HEADERS = [
+    "No.", "Channel Name", "Receive Frequency", "Transmit Frequency", "Channel Type",
+    "Transmit Power", "Band Width", "CTC/DCS Decode", "CTC/DCS Encode", "Contact/TG",
+    "Contact/TG TG/DMR ID", "Radio ID", "Busy Lock/TX Permit", "Squelch Mode", "Optional Signal",
+    "DTMF ID", "2Tone ID", "5Tone ID", "PTT ID", "RX Color Code", "Slot", "Scan List",
+    "Receive Group List", "PTT Prohibit", "Reverse", "Simplex TDMA", "Slot Suit",
+    "AES Digital Encryption", "Digital Encryption", "Call Confirmation", "Talk Around(Simplex)",
+    "Work Alone", "Custom CTCSS", "2TONE Decode", "Ranging", "Through Mode", "APRS RX",
+    "Analog APRS PTT Mode", "Digital APRS PTT Mode", "APRS Report Type",
+    "Digital APRS Report Channel", "Correct Frequency[Hz]", "SMS Confirmation",
+    "Exclude channel from roaming", "DMR MODE", "DataACK Disable", "R5toneBot", "R5ToneEot",
+    "Auto Scan", "Ana Aprs Mute", "Send Talker Alias", "AnaAprsTxPath", "ARC4", "ex_emg_kind"
+]
+
+CTCSS_TONES = ("67.0", "77.0", "88.5", "100.0", "103.5", "110.9", "123.0", "131.8", "146.2", "156.7")
+DCS_CODES = ("023", "025", "125", "245", "411", "754")
+
+# Number of distinct talkgroups referenced by generated GD88 channels
+TALKGROUP_COUNT = 5000
+
+
+def _frequency_hz(rng):
+    """A channel frequency on a 12.5 kHz raster in the 2 m or 70 cm band."""
+    return rng.choice((144_000_000, 430_000_000)) + rng.randrange(0, 4_000_000, 12_500)
+
+
+def _repeater_offset_hz(rng, rx_hz):
+    if rng.random() < 0.3:
+        return 0
+    shift = 600_000 if rx_hz < 400_000_000 else 5_000_000
+    return shift if rng.random() < 0.5 else -shift
+
+
+def write_gd88_channels(path, rows, seed=88):
+    """GD88 channel export with a mix of analog and digital channels."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(GD88_CHANNEL_HEADERS)
+        for i in range(1, rows + 1):
+            digital = rng.random() < 0.6
+            rx = _frequency_hz(rng)
+            tx = rx + rng.choice((0, 600_000, -600_000, 5_000_000))
+            tone = rng.choice(CTCSS_TONES) if not digital and rng.random() < 0.5 else "None"
+            writer.writerow([
+                i, f"CH{i:06d}", "Digital" if digital else "Analog", rx, tx,
+                rng.choice(("High", "Low")), "12.5K" if digital else "25K", f"Scan{i % 16}",
+                f"TG{rng.randrange(1, TALKGROUP_COUNT)}", f"RXG{i % 32}",
+                rng.randrange(0, 16), rng.randrange(0, 16),
+                rng.choice(("Slot 1", "Slot 2")), rng.choice(("TS1", "TS2")),
+                tone, tone,
+            ])
+
+
+def write_gd88_contacts(path, rows, seed=88):
+    """GD88 contact list: mostly private IDs plus some talkgroups."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(GD88_CONTACT_HEADERS)
+        for i in range(1, rows + 1):
+            if rng.random() < 0.1:
+                writer.writerow([i, f"TG{i}", rng.randrange(1, 99999), "Group"])
+            else:
+                writer.writerow([i, f"User {i}", rng.randrange(1_000_000, 9_999_999), "Private"])
+
+
+def write_chirp(path, rows, seed=88):
+    """CHIRP/TID radio export of analog repeaters and simplex channels."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CHIRP_HEADERS)
+        for i in range(rows):
+            rx = _frequency_hz(rng)
+            offset = _repeater_offset_hz(rng, rx)
+            duplex = "" if offset == 0 else ("+" if offset > 0 else "-")
+            tone = rng.choice(CTCSS_TONES)
+            writer.writerow([
+                i, f"RPT{i:06d}", f"{rx / 1e6:.6f}", duplex, f"{abs(offset) / 1e6:.6f}",
+                "Tone" if duplex else "", tone, tone, rng.choice(DCS_CODES), "NN",
+                rng.choice(("FM", "FM", "NFM")), "5.00", "", rng.choice(("8.0W", "4.0W")), "",
+            ])
+
+
+def write_ft3(path, rows, seed=88):
+    """Yaesu FT3D memory export."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(FT3_HEADERS)
+        for i in range(1, rows + 1):
+            rx = _frequency_hz(rng)
+            tx = rx + _repeater_offset_hz(rng, rx)
+            writer.writerow([
+                i, "OFF", f"{rx / 1e6:.6f}", f"{tx / 1e6:.6f}", "", "", "ON",
+                rng.choice(("FM", "FM", "AM")), "AMS", "OFF", f"MEM{i:06d}",
+                rng.choice(("OFF", "Tone", "T Sql", "DCS")), f"{rng.choice(CTCSS_TONES)} Hz",
+                rng.choice(DCS_CODES), "RX Normal TX Normal", "1500 Hz", "RX 00", "TX 00",
+                rng.choice(("High (5W)", "Mid (2.5W)", "Low (0.3W)")), rng.choice(("OFF", "On")),
+                "ON", "12.5KHz", "OFF", "OFF", "OFF", "OFF", "OFF", "OFF", "", "",
+            ])
+
+
+def write_talkgroups(path, rows=TALKGROUP_COUNT, seed=88):
+    """talkgroups.CSV with names matching the contacts used by write_gd88_channels."""
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(TALKGROUP_HEADERS)
+        for i in range(1, rows + 1):
+            writer.writerow([i, 3100 + i, f"TG{i}", "Group Call", "None"])
+
+
+def write_maverick_template(path, rows=2, seed=88):
+    """Maverick working copy with one digital and one analog template channel."""
+    common = {header: "Off" for header in MAVERICK_HEADERS}
+    digital = dict(common, **{
+        "No.": "1", "Channel Name": "Digital", "Receive Frequency": "438.00000",
+        "Transmit Frequency": "430.40000", "Channel Type": "D-Digital", "Transmit Power": "High",
+        "Band Width": "12.5K", "Contact/TG": "Local", "Contact/TG TG/DMR ID": "9",
+        "RX Color Code": "1", "Slot": "1", "Scan List": "None", "Receive Group List": "None",
+    })
+    analog = dict(common, **{
+        "No.": "2", "Channel Name": "Analog", "Receive Frequency": "146.52000",
+        "Transmit Frequency": "146.52000", "Channel Type": "A-Analog", "Transmit Power": "High",
+        "Band Width": "25K", "Contact/TG": "", "Contact/TG TG/DMR ID": "",
+        "RX Color Code": "1", "Slot": "1", "Scan List": "None", "Receive Group List": "None",
+    })
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=MAVERICK_HEADERS)
+        writer.writeheader()
+        writer.writerow(digital)
+        writer.writerow(analog)
+
+
+GENERATORS = {
+    "gd88": write_gd88_channels,
+    "gd88-contacts": write_gd88_contacts,
+    "chirp": write_chirp,
+    "ft3": write_ft3,
+    "talkgroups": write_talkgroups,
+    "maverick-template": write_maverick_template,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic source export")
+    parser.add_argument("kind", choices=sorted(GENERATORS), help="Kind of export to generate")
+    parser.add_argument("rows", type=int, help="Number of rows (ignored for maverick-template)")
+    parser.add_argument("output", help="Output CSV file")
+    parser.add_argument("--seed", type=int, default=88, help="Random seed (default: 88)")
+    args = parser.parse_args()
+
+    GENERATORS[args.kind](args.output, args.rows, args.seed)
+    print(f"Wrote {args.kind} export to '{args.output}'")
@@ -0,0 +1,119 @@
+## Cached talkgroup lookup.
+## Parsing a full BrandMeister talkgroups.CSV on every run is slow, so the
+## parsed tables are saved next to it (talkgroups.CSV.idx) and reused until
+## the CSV's size or modification time changes.
+##
+## EXAMPLE USE
+## python talkgroup_index.py talkgroups.CSV --name "Local"
+## python talkgroup_index.py talkgroups.CSV --id 91
+
+import argparse
+import csv
+import marshal
+import os
+import sys
+from pathlib import Path
+
+# Bump when the cached layout changes so old .idx files are rebuilt
+CACHE_VERSION = 1
+
+
+class TalkgroupIndex:
+    """Talkgroup names to Radio IDs and back."""
+
+    __slots__ = ("by_name", "by_id")
+
+    def __init__(self, by_name, by_id):
+        self.by_name = by_name
+        self.by_id = by_id
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def radio_id(self, name, default=None):
+        """Radio ID for a talkgroup name."""
+        return self.by_name.get(name, default)
+
+    def name(self, radio_id, default=None):
+        """First talkgroup name listed for a Radio ID."""
+        return self.by_id.get(str(radio_id).strip(), default)
+
+
+def parse_talkgroups(tg_file):
+    """Read talkgroups.CSV into ({name: radio_id}, {radio_id: name})."""
+    by_name = {}
+    by_id = {}
+    with Path(tg_file).open("r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            name = (row.get("Name") or "").strip()
+            radio_id = (row.get("Radio ID") or "").strip()
+            if name and radio_id:
+                by_name[name] = radio_id
+                by_id.setdefault(radio_id, name)
+    return by_name, by_id
+
+
+def default_cache_file(tg_file):
+    tg_file = Path(tg_file)
+    return tg_file.with_name(tg_file.name + ".idx")
+
+
+def load_talkgroups(tg_file, cache_file=None, rebuild=False):
+    """Load a TalkgroupIndex for tg_file, from its cache file when it is still valid.
+
+    The cache is keyed on the CSV's size and modification time and is
+    rebuilt automatically when either changes. If the cache can't be
+    written (read-only directory, say) the parsed index is still returned.
+    """
+    tg_file = Path(tg_file)
+    cache_file = Path(cache_file) if cache_file else default_cache_file(tg_file)
+    st = tg_file.stat()
+    key = (CACHE_VERSION, st.st_mtime_ns, st.st_size)
+
+    if not rebuild:
+        try:
+            with cache_file.open("rb") as f:
+                # loads() on the whole file is several times faster than load(f)
+                cached_key, by_name, by_id = marshal.loads(f.read())
+            if cached_key == key:
+                return TalkgroupIndex(by_name, by_id)
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+    by_name, by_id = parse_talkgroups(tg_file)
+
+    tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+    try:
+        with tmp_file.open("wb") as f:
+            marshal.dump((key, by_name, by_id), f)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Warning: could not write talkgroup cache '{cache_file}': {e}", file=sys.stderr)
+
+    return TalkgroupIndex(by_name, by_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up talkgroups by name or Radio ID using a cached index")
+    parser.add_argument("tg_file", nargs="?", default="talkgroups.CSV", help="Talkgroup CSV (default: talkgroups.CSV)")
+    parser.add_argument("--name", help="Print the Radio ID for this talkgroup name")
+    parser.add_argument("--id", help="Print the talkgroup name for this Radio ID")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore and rewrite the cache file")
+    args = parser.parse_args()
+
+    try:
+        index = load_talkgroups(args.tg_file, rebuild=args.rebuild)
+    except OSError as e:
+        print(f"Error reading talkgroups: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.name:
+        print(index.radio_id(args.name, "Not found"))
+    elif args.id:
+        print(index.name(args.id, "Not found"))
+    else:
+        print(f"{len(index)} talkgroups, {len(index.by_id)} Radio IDs")
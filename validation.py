@@ -0,0 +1,227 @@
+## Validation pass for channel exports.
+## Every row is checked for frequencies outside the band plan, tones that
+## aren't standard CTCSS/DCS codes, color codes outside 0-15, unknown time
+## slots and names longer than the target radio allows. All problems are
+## collected in one pass and written to a CSV report, one line per problem,
+## instead of stopping at the first bad row. Rows with an error can then be
+## left out of the conversion (readers take skip_rows) while the good rows
+## are converted as usual; warnings are reported only.
+##
+## Rows are numbered as the readers count them: 1 is the first row after
+## the header, and empty lines (and for GD88/DM32, rows with no values)
+## are not counted.
+##
+## EXAMPLE USE
+## python validation.py chirp merged.csv --report problems.csv --workers 4
+## python validation.py gd88 master.csv --report problems.csv --profile profile.json
+## python channel_engine.py chirp merged.csv --dm32 dm32.csv --validate problems.csv
+## python CHIRPtoDB32channels.py h8.csv DM32_converted.csv --validate problems.csv
+
+import argparse
+import csv
+import os
+import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import profiling
+from channel_engine import GD88_CC_COLUMNS, GD88_NAME_COLUMNS, GD88_SLOT_COLUMNS, _gd88_slot_text
+from decode_tables import parse_color_code, parse_slot, tone_is_valid
+from frequency import format_mhz, parse_hz, parse_mhz
+from mapped_csv import open_table
+
+# === ADJUST TO THE BANDS YOUR RADIOS COVER (Hz, inclusive) ===
+BAND_PLAN = (
+    (136_000_000, 174_000_000),  # VHF
+    (219_000_000, 225_000_000),  # 1.25 m
+    (400_000_000, 520_000_000),  # UHF
+)
+
+REPORT_HEADERS = ["Row", "Column", "Value", "Severity", "Problem"]
+
+# CHIRP Tone modes the converters read; DTCS uses DtcsCode, the others cToneFreq
+CHIRP_TONE_MODES = ("Tone", "TSQL", "DTCS")
+# Other CHIRP Tone modes, which are converted as if they used cToneFreq for both directions
+CHIRP_OTHER_TONE_MODES = ("TSQL-R", "DTCS-R", "Cross")
+
+# Columns checked for each source, and how
+SOURCE_FIELDS = {
+    "gd88": (("RX Freq", "hz"), ("TX Freq", "hz"), ("RX Tone", "tone"), ("TX Tone", "tone"))
+            + tuple((name, "cc") for name in GD88_CC_COLUMNS)
+            + tuple((name, "slot") for name in GD88_SLOT_COLUMNS)
+            + tuple((name, "name") for name in GD88_NAME_COLUMNS),
+    "chirp": (("Frequency", "mhz"), ("Offset", "offset"), ("Tone", "chirp_tone_mode"), ("cToneFreq", "tone"),
+              ("DtcsCode", "dcs"), ("Name", "name")),
+    "ft3": (("Receive Frequency", "mhz"), ("Transmit Frequency", "mhz"), ("CTCSS", "tone"), ("DCS", "dcs"),
+            ("Name", "name")),
+    "dm32": (("RX Frequency[MHz]", "hz"), ("TX Frequency[MHz]", "hz"), ("CTC/DCS Decode", "tone"),
+             ("CTC/DCS Encode", "tone"), ("Color Code", "cc"), ("Time Slot", "slot"), ("Channel Name", "name")),
+    "uvpro": (("rx_freq", "hz"), ("tx_freq", "hz"), ("title", "name")),
+}
+
+# Sources whose readers also skip rows with no values, so row numbers line up
+SKIP_BLANK = {"gd88": True, "chirp": False, "ft3": False, "dm32": True, "uvpro": False}
+
+
+def in_band(hz):
+    return any(low <= hz <= high for low, high in BAND_PLAN)
+
+
+def _check_frequency(hz, value):
+    if hz is None:
+        return "error", "missing frequency" if not (value or "").strip() else "not a frequency"
+    if not in_band(hz):
+        return "error", f"{format_mhz(hz)} MHz is outside the band plan"
+    return None
+
+
+def check_field(kind, value, name_length):
+    """(severity, problem) for one field value, or None if it is fine."""
+    if kind == "mhz":
+        return _check_frequency(parse_mhz(value), value)
+    if kind == "hz":
+        return _check_frequency(parse_hz(value), value)
+    if not value:
+        return None
+    if kind == "offset":
+        return None if parse_mhz(value) is not None else ("error", "not an offset")
+    if kind == "tone":
+        return None if tone_is_valid(value) else ("error", "not a standard CTCSS tone or DCS code")
+    if kind == "dcs":
+        return None if tone_is_valid(f"D{value.strip()}N") else ("error", "not a standard DCS code")
+    if kind == "chirp_tone_mode":
+        mode = value.strip()
+        if not mode or mode in CHIRP_TONE_MODES:
+            return None
+        if mode in CHIRP_OTHER_TONE_MODES:
+            return "warning", f"{mode} is converted using cToneFreq as the tone"
+        return "error", "not a CHIRP tone mode"
+    if kind == "cc":
+        return None if parse_color_code(value) is not None else ("error", "color code must be 0-15")
+    if kind == "slot":
+        return None if parse_slot(_gd88_slot_text(value)) is not None else ("error", "time slot must be 1 or 2")
+    if kind == "name":
+        if len(value.strip()) > name_length:
+            return "warning", f"name longer than {name_length} characters will be cut"
+        return None
+    raise ValueError(f"unknown field kind '{kind}'")
+
+
+def check_rows(rows, fields, first_row=1, name_length=16):
+    """Check rows (tuples of the `fields` columns, in order) and return a list of problem tuples.
+
+    Each problem is (row, column, value, severity, problem), with rows
+    numbered from `first_row`.
+    """
+    problems = []
+    for number, row in enumerate(rows, start=first_row):
+        for (column, kind), value in zip(fields, row):
+            found = check_field(kind, value, name_length)
+            if found is not None:
+                problems.append((number, column, value, *found))
+    return problems
+
+
+def _chunks(rows, chunksize):
+    first_row = 1
+    while True:
+        chunk = list(islice(rows, chunksize))
+        if not chunk:
+            return
+        yield first_row, chunk
+        first_row += len(chunk)
+
+
+def validate_file(source, input_file, name_length=16, workers=None, chunksize=20000, mapped=False):
+    """Check every row of a channel export and return its problems, in row order.
+
+    Rows are checked in chunks of `chunksize`; with more than one worker
+    the chunks are checked in parallel processes, at most two per worker
+    in flight.
+    """
+    workers = workers or os.cpu_count() or 1
+    encoding = "utf-8-sig" if source in ("gd88", "dm32") else None
+    problems = []
+    with open_table(input_file, encoding=encoding, mapped=mapped) as table:
+        # A column listed twice (GD88 "CCTX") is checked as the first kind given
+        kinds = {}
+        for name, kind in SOURCE_FIELDS[source]:
+            kinds.setdefault(name, kind)
+        fields = tuple((name, kinds[name]) for name in table.select(kinds))
+        rows = table.rows([name for name, _ in fields], skip_blank=SKIP_BLANK[source])
+        chunks = _chunks(rows, chunksize)
+
+        if workers == 1:
+            for first_row, chunk in chunks:
+                problems.extend(check_rows(chunk, fields, first_row, name_length))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for first_row, chunk in chunks:
+                    pending.append(pool.submit(check_rows, chunk, fields, first_row, name_length))
+                    if len(pending) >= 2 * workers:
+                        problems.extend(pending.popleft().result())
+                while pending:
+                    problems.extend(pending.popleft().result())
+    return problems
+
+
+def rejected_rows(problems):
+    """Row numbers with at least one error, for a reader's skip_rows."""
+    return {row for row, _, _, severity, _ in problems if severity == "error"}
+
+
+def write_report(problems, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(REPORT_HEADERS)
+        writer.writerows(problems)
+
+
+def summary(problems):
+    """Summary lines: error and warning counts, then counts per problem."""
+    severities = Counter(severity for _, _, _, severity, _ in problems)
+    kinds = Counter((severity, column, problem) for _, column, _, severity, problem in problems)
+    lines = [f"{severities['error']} errors in {len(rejected_rows(problems))} rows, {severities['warning']} warnings"]
+    for (severity, column, problem), count in kinds.most_common():
+        lines.append(f"  {count:>8} {severity}: {column}: {problem}")
+    return lines
+
+
+def validate_to_report(source, input_file, report_file, name_length=16, workers=None, mapped=False):
+    """Validate, write the report and print its summary; returns the rows a conversion should skip."""
+    problems = validate_file(source, input_file, name_length, workers, mapped=mapped)
+    write_report(problems, report_file)
+    print("\n".join(summary(problems)), file=sys.stderr)
+    return rejected_rows(problems)
+
+
+def main():
+    from channel_engine import READERS
+    from channel_planner import CAPACITIES
+
+    parser = argparse.ArgumentParser(description="Check a channel export and report every problem row")
+    parser.add_argument("source", choices=sorted(READERS), help="Source export format")
+    parser.add_argument("input", help="Input CSV file")
+    parser.add_argument("--report", default="validation_report.csv", help="Problem report CSV (default: validation_report.csv)")
+    parser.add_argument("--target", choices=sorted(CAPACITIES), help="Check names against this radio's name length (default: 16)")
+    parser.add_argument("--workers", type=int, help="Processes (default: CPU count, 1 = no pool)")
+    parser.add_argument("--chunksize", type=int, default=20000, help="Rows per chunk (default: 20000)")
+    parser.add_argument("--mmap", action="store_true", help="Read the input through a memory map (UTF-8 only)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    name_length = CAPACITIES[args.target].name_length if args.target else 16
+    with profiling.profiled(args, [args.input], [args.report]):
+        with profiling.stage("validate"):
+            problems = validate_file(args.source, args.input, name_length, args.workers, args.chunksize, args.mmap)
+        with profiling.stage("write report", len(problems)):
+            write_report(problems, args.report)
+    print("\n".join(summary(problems)))
+    print(f"Wrote {len(problems)} problems to '{args.report}'")
+    sys.exit(1 if rejected_rows(problems) else 0)
+
+
+if __name__ == "__main__":
+    main()